@@ -0,0 +1,5 @@
+def pytest_configure(config):
+    """Tests clear the cache freely: keep them off the shared one in CACHES"""
+    from django.conf import settings
+
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
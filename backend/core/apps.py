@@ -1,5 +1,23 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def install_search_index(sender, using, **kwargs):
+    """
+    Create the SQLite full-text index (core/search.py) and its triggers,
+    refilling it when it is new or a migration remade the posts table
+    """
+    from django.db import connections
+    from . import search
+
+    connection = connections[using]
+    if search.fts_enabled(connection) and search.install(connection):
+        search.rebuild(connection)
+
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        post_migrate.connect(install_search_index, sender=self)
@@ -0,0 +1,42 @@
+"""
+Unread badge counters.
+
+Each user row carries ``notificacoes_nao_lidas`` and ``mensagens_nao_lidas``.
+They change with F() updates wherever a notification or direct message
+becomes unread (the outbox worker, ChatView) or read (the notification
+``read``/``read_all`` actions, ChatView, MessageReadView), so BadgesView
+answers from the user row that authentication has already loaded, without
+counting any table. ``manage.py recount`` repairs drift.
+
+Every change is also recorded in the realtime outbox, from which open event
+streams learn that the counters moved (see core/realtime.py).
+"""
+from collections import defaultdict
+
+from django.db.models import F
+
+from .models import EventoTempoReal, Usuario
+
+NOTIFICATIONS = 'notificacoes_nao_lidas'
+MESSAGES = 'mensagens_nao_lidas'
+
+
+def adjust_unread(field, counts, record=True):
+    """
+    Add ``{user_id: change}`` to a badge counter, with one UPDATE per
+    distinct change rather than one per user, and record the change in the
+    realtime outbox unless the caller records its own events
+    """
+    by_change = defaultdict(list)
+    for user_id, change in counts.items():
+        if change:
+            by_change[change].append(user_id)
+    for change, user_ids in by_change.items():
+        Usuario.objects.filter(pk__in=user_ids).update(**{field: F(field) + change})
+    if record:
+        changed = [user_id for user_ids in by_change.values() for user_id in user_ids]
+        EventoTempoReal.objects.bulk_create([EventoTempoReal(usuario_id=user_id) for user_id in changed])
+
+
+def badges(user):
+    return {'notificacoes': getattr(user, NOTIFICATIONS), 'mensagens': getattr(user, MESSAGES)}
@@ -0,0 +1,111 @@
+"""
+Per-viewer response cache with strong ETags for polled list endpoints.
+
+Clients poll the following feed and the notification list far more often
+than either changes. A list view using ``ConditionalListMixin`` describes
+what its response depends on through ``get_list_version()``: the viewer's
+graph version and version tokens that the writes to the list bump (the
+timeline's in core/timeline.py, ``versao_notificacoes`` on the user row),
+so checking it is a few key lookups, never a query over the list. That
+description is hashed into an ETag:
+
+* ``If-None-Match`` with the current ETag gets a ``304`` before the page is
+  queried or serialized;
+* otherwise the serialized page is cached under (viewer, view, query string)
+  and reused while the ETag stays the same.
+
+Counters on other users' posts (likes, comments) are not part of the
+version; the ETag also carries a FEED_CACHE_TTL time bucket, so they are
+at most that stale. The viewer's own writes through the view bump a
+per-viewer version and take effect immediately.
+"""
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, quote_etag
+from rest_framework import status
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+
+def feed_cache_ttl():
+    return getattr(settings, 'FEED_CACHE_TTL', 60)
+
+
+def _activity_key(user_id):
+    return f'feed:{user_id}:activity'
+
+
+def activity_version(user_id):
+    version = cache.get(_activity_key(user_id))
+    if version is None:
+        cache.add(_activity_key(user_id), uuid.uuid4().hex, None)
+        version = cache.get(_activity_key(user_id))
+    return version
+
+
+def bump_activity_version(user_id):
+    """Invalidate every cached list response of this viewer"""
+    cache.set(_activity_key(user_id), uuid.uuid4().hex, None)
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+    return quote_etag(digest)
+
+
+def _matches(request, etag):
+    header = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return etag in [tag.strip() for tag in header.split(',')]
+
+
+class ConditionalListMixin:
+    """
+    Adds ETag / If-None-Match handling and a per-viewer response cache to
+    ``list``. Views return the parts their response depends on from
+    ``get_list_version()``, or ``None`` when a request must not be cached.
+    """
+    feed_cache_prefix = None
+
+    def get_list_version(self):
+        return None
+
+    def list(self, request, *args, **kwargs):
+        parts = self.get_list_version()
+        if parts is None:
+            return super().list(request, *args, **kwargs)
+
+        ttl = feed_cache_ttl()
+        etag = make_etag(
+            self.feed_cache_prefix or self.__class__.__name__,
+            request.get_full_path(),
+            activity_version(request.user.pk),
+            int(time.time() // ttl) if ttl else 0,
+            *parts
+        )
+        if _matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        key = f'feed:{request.user.pk}:{etag}'
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+        else:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(key, response.data, ttl)
+        response['ETag'] = etag
+        # Per-viewer content: keep it out of shared caches, always revalidate
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS and request.user.is_authenticated and response.status_code < 400:
+            bump_activity_version(request.user.pk)
+        return super().finalize_response(request, response, *args, **kwargs)
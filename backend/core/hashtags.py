@@ -0,0 +1,89 @@
+"""
+Hashtag links of a post, kept in sync with the #tags in its text.
+
+Linking is set-based whatever the number of tags: one insert-or-ignore of
+unknown hashtags, one F() update of the usage counters and one bulk insert
+of the links (plus the matching deletes when an edit drops tags). Counters
+are never read and written back, so concurrent posts cannot lose updates.
+``manage.py recount`` repairs ``contagem_uso`` if it ever drifts.
+
+Tags an edit drops are remembered in ``Publicacao.hashtags_removidas`` with
+their association time. A later edit that adds one back restores that time
+instead of linking the tag now, so the post keeps its place on the hashtag
+page and the use goes back into its original trending hour; only tags the
+post never had count as new uses.
+"""
+import re
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Hashtag, Publicacao, PublicacaoHashtag, search_key
+from .trends import count_hashtag_uses, restore_hashtag_uses, uncount_hashtag_uses
+
+HASHTAG_RE = re.compile(r'#(\w+)')
+MAX_LENGTH = Hashtag._meta.get_field('texto_hashtag').max_length
+
+
+def extract_hashtags(text):
+    """Distinct hashtags in ``text``, without the '#'"""
+    return {tag for tag in HASHTAG_RE.findall(text or '') if len(tag) <= MAX_LENGTH}
+
+
+def sync_post_hashtags(post):
+    """Link the post to the hashtags in its text and unlink the ones removed"""
+    wanted = extract_hashtags(post.conteudo_texto)
+    with transaction.atomic():
+        linked = {
+            text: (hashtag_id, when)
+            for text, hashtag_id, when in PublicacaoHashtag.objects.filter(
+                publicacao=post
+            ).values_list('hashtag__texto_hashtag', 'hashtag_id', 'data_associacao')
+        }
+        forgotten = dict(post.hashtags_removidas)
+        dropped = linked.keys() - wanted
+        removed = [linked[text] for text in dropped]
+        if removed:
+            ids = [hashtag_id for hashtag_id, _ in removed]
+            PublicacaoHashtag.objects.filter(publicacao=post, hashtag_id__in=ids).delete()
+            Hashtag.objects.filter(pk__in=ids).update(contagem_uso=F('contagem_uso') - 1)
+            uncount_hashtag_uses(removed)
+            forgotten.update({text: linked[text][1].isoformat() for text in dropped})
+
+        added = wanted - linked.keys()
+        if added:
+            now = timezone.now()
+            # bulk_create skips save(), so the search key is filled in here
+            Hashtag.objects.bulk_create([
+                Hashtag(texto_hashtag=text, texto_busca=search_key(text), contagem_uso=0,
+                        primeira_utilizacao=now, ultima_utilizacao=now)
+                for text in added
+            ], ignore_conflicts=True)
+            ids = dict(Hashtag.objects.filter(texto_hashtag__in=added).values_list('texto_hashtag', 'pk'))
+            Hashtag.objects.filter(pk__in=ids.values()).update(
+                contagem_uso=F('contagem_uso') + 1, ultima_utilizacao=now
+            )
+            # A tag the post had before keeps its original association time
+            restored = {text: parse_datetime(forgotten.pop(text)) for text in ids if text in forgotten}
+            PublicacaoHashtag.objects.bulk_create([
+                PublicacaoHashtag(publicacao=post, hashtag_id=hashtag_id, data_associacao=restored.get(text, now))
+                for text, hashtag_id in ids.items()
+            ], ignore_conflicts=True)
+            count_hashtag_uses([hashtag_id for text, hashtag_id in ids.items() if text not in restored], now)
+            restore_hashtag_uses([(ids[text], when) for text, when in restored.items()])
+
+        if forgotten != post.hashtags_removidas:
+            Publicacao.objects.filter(pk=post.pk).update(hashtags_removidas=forgotten)
+            post.hashtags_removidas = forgotten
+
+
+def release_post_hashtags(post):
+    """Take a post that is being deleted off its hashtags' counters"""
+    links = list(PublicacaoHashtag.objects.filter(publicacao=post).values_list('hashtag_id', 'data_associacao'))
+    if links:
+        Hashtag.objects.filter(pk__in=[hashtag_id for hashtag_id, _ in links]).update(
+            contagem_uso=F('contagem_uso') - 1
+        )
+        uncount_hashtag_uses(links)
@@ -0,0 +1,130 @@
+"""
+Buffered impression (view) counting for posts and comments.
+
+Clients report batches of ids they have shown. Increments are accumulated in
+a process-local buffer and written out by a background thread every
+IMPRESSIONS_FLUSH_SECONDS, or by the reporting request once
+IMPRESSIONS_FLUSH_SIZE distinct ids are pending. A flush issues one UPDATE
+per distinct increment:
+
+    UPDATE publicacoes SET views_count = views_count + n WHERE id_publicacao IN (...)
+
+so scrolling a feed never opens a write transaction of its own, and a hot
+post takes one row update per flush instead of one per view. Counts held by
+a process that dies before flushing are lost; views_count is approximate.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+from .models import Comentario, Publicacao
+
+logger = logging.getLogger(__name__)
+
+UPDATE_BATCH_SIZE = 500
+
+
+def flush_seconds():
+    return getattr(settings, 'IMPRESSIONS_FLUSH_SECONDS', 10)
+
+
+class ImpressionBuffer:
+    """Thread-safe per-process accumulator of views_count increments"""
+
+    models = {'posts': Publicacao, 'comments': Comentario}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {kind: Counter() for kind in self.models}
+        self._last_flush = time.monotonic()
+        self._flusher = None
+
+    def add(self, kind, ids):
+        with self._lock:
+            self._pending[kind].update(ids)
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically, name='impressions-flush', daemon=True
+                )
+                self._flusher.start()
+
+    def pending(self, kind):
+        with self._lock:
+            return dict(self._pending[kind])
+
+    def is_due(self):
+        interval = flush_seconds()
+        size = getattr(settings, 'IMPRESSIONS_FLUSH_SIZE', 1000)
+        with self._lock:
+            pending = sum(len(counter) for counter in self._pending.values())
+            return pending > 0 and (
+                pending >= size or time.monotonic() - self._last_flush >= interval
+            )
+
+    def flush(self):
+        """Write all pending increments; returns the number of rows updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {kind: Counter() for kind in self.models}
+            self._last_flush = time.monotonic()
+
+        updated = 0
+        try:
+            with transaction.atomic():
+                for kind, counter in pending.items():
+                    updated += self._write(self.models[kind], counter)
+        except DatabaseError:
+            # e.g. SQLite busy: keep the counts for the next flush
+            logger.warning('Impression flush failed; retrying on next flush', exc_info=True)
+            with self._lock:
+                for kind, counter in pending.items():
+                    self._pending[kind].update(counter)
+            return 0
+        return updated
+
+    def _flush_periodically(self):
+        """Timer loop, so counts are written even when no further reports arrive"""
+        while True:
+            time.sleep(flush_seconds())
+            if self.is_due():
+                self.flush()
+                connection.close()  # this thread's connection
+
+    def _write(self, model, counter):
+        by_increment = defaultdict(list)
+        for pk, n in counter.items():
+            by_increment[n].append(pk)
+
+        updated = 0
+        for n, ids in by_increment.items():
+            for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+                updated += model.objects.filter(
+                    pk__in=ids[start:start + UPDATE_BATCH_SIZE]
+                ).update(views_count=F('views_count') + n)
+        return updated
+
+
+buffer = ImpressionBuffer()
+
+
+def record_impressions(posts=(), comments=()):
+    """Buffer one view per id, flushing if the buffer is due"""
+    if posts:
+        buffer.add('posts', posts)
+    if comments:
+        buffer.add('comments', comments)
+    if buffer.is_due():
+        buffer.flush()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        pass
@@ -0,0 +1,79 @@
+"""
+Rebuild the materialized home timeline from posts and the follow graph.
+Run once after deploying the timeline table, or to repair drift.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import EntradaTimeline, Publicacao, Seguidor, Usuario
+from core.timeline import FANOUT_VISIBILITIES, bump_timeline_versions, celebrity_ids
+
+
+class Command(BaseCommand):
+    help = 'Backfill the "following" home timeline for every user'
+
+    FIELDS = ('id_publicacao', 'usuario', 'data_publicacao')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only rebuild the timeline of this user id'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=200,
+            help='Most recent posts copied per followed author (default: 200)'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete existing timeline rows before rebuilding'
+        )
+
+    def handle(self, *args, **options):
+        users = Usuario.objects.filter(status=1)
+        if options['user']:
+            users = users.filter(id_usuario=options['user'])
+
+        limit = options['limit']
+        celebrities = celebrity_ids()
+        total = 0
+
+        for user in users.iterator():
+            with transaction.atomic():
+                if options['clear']:
+                    EntradaTimeline.objects.filter(usuario=user).delete()
+                total += self.backfill_user(user, celebrities, limit)
+
+        self.stdout.write(self.style.SUCCESS(f'Timeline backfilled: {total} entries written'))
+
+    def backfill_user(self, user, celebrities, limit):
+        author_ids = set(
+            Seguidor.objects.filter(
+                usuario_seguidor=user, status=1
+            ).values_list('usuario_seguido_id', flat=True)
+        ) - celebrities
+
+        entries = []
+        own_posts = Publicacao.objects.filter(usuario=user).only(*self.FIELDS).order_by('-data_publicacao')[:limit]
+        entries += [self.entry(user, post) for post in own_posts]
+
+        for author_id in author_ids:
+            posts = Publicacao.objects.filter(
+                usuario_id=author_id,
+                visibilidade__in=FANOUT_VISIBILITIES
+            ).only(*self.FIELDS).order_by('-data_publicacao')[:limit]
+            entries += [self.entry(user, post) for post in posts]
+
+        EntradaTimeline.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+        bump_timeline_versions([user.pk])
+        return len(entries)
+
+    def entry(self, user, post):
+        return EntradaTimeline(
+            usuario=user,
+            publicacao_id=post.id_publicacao,
+            autor_id=post.usuario_id,
+            data_publicacao=post.data_publicacao,
+        )
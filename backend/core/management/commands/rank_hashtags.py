@@ -0,0 +1,52 @@
+"""
+Recompute the trending hashtags from the hourly usage buckets and prune
+expired buckets. Run it with --loop as a long-lived process (the
+``trending`` service in docker-compose) or from cron every few minutes;
+run it once with --backfill after deploying to fill the buckets from
+existing posts.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from core.trends import hashtag_rebuild_seconds, rebuild_hashtag_buckets, rebuild_trending_hashtags
+
+
+class Command(BaseCommand):
+    help = 'Recompute trending hashtags from recent hourly usage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='First recount the hourly buckets from publicacao_hashtags'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Recompute every HASHTAG_TRENDING_REBUILD_SECONDS until interrupted'
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            buckets = rebuild_hashtag_buckets()
+            self.stdout.write(f'  {buckets} hourly buckets recounted')
+        if not options['loop']:
+            total = rebuild_trending_hashtags()
+            self.stdout.write(self.style.SUCCESS(f'Trending hashtags rebuilt: {total} hashtags ranked'))
+            return
+
+        interval = hashtag_rebuild_seconds()
+        self.stdout.write(f'Recomputing trending hashtags every {interval}s (Ctrl+C to stop)')
+        try:
+            while True:
+                try:
+                    total = rebuild_trending_hashtags()
+                    self.stdout.write(f'  {total} hashtags ranked')
+                except DatabaseError as exc:
+                    # e.g. SQLite "database is locked" under write load: retry next round
+                    self.stderr.write(f'  Trending hashtags rebuild failed: {exc}')
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
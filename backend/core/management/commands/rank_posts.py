@@ -0,0 +1,42 @@
+"""
+Recompute the "For You" ranking table. Run it with --loop as a long-lived
+process (the ``ranking`` service in docker-compose) or from cron, so scores
+keep decaying; posts published between runs are scored per request.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from core.ranking import rebuild_ranking, rebuild_seconds
+
+
+class Command(BaseCommand):
+    help = 'Recompute time-decayed "For You" scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Rebuild every RANKING_REBUILD_SECONDS until interrupted'
+        )
+
+    def handle(self, *args, **options):
+        if not options['loop']:
+            total = rebuild_ranking()
+            self.stdout.write(self.style.SUCCESS(f'Ranking rebuilt: {total} posts scored'))
+            return
+
+        interval = rebuild_seconds()
+        self.stdout.write(f'Rebuilding the ranking every {interval}s (Ctrl+C to stop)')
+        try:
+            while True:
+                try:
+                    total = rebuild_ranking()
+                    self.stdout.write(f'  {total} posts scored')
+                except DatabaseError as exc:
+                    # e.g. SQLite "database is locked" under write load: retry next round
+                    self.stderr.write(f'  Ranking rebuild failed: {exc}')
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,19 @@
+"""
+Rebuild the full-text post index (core/search.py) from the publicacoes table.
+Run it after restoring a backup or running VACUUM on SQLite.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import search
+from core.models import Publicacao
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite FTS5 index used by dream search'
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            raise CommandError('Full-text index is only available on SQLite')
+        search.install()
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt: {Publicacao.objects.count()} posts indexed'))
@@ -0,0 +1,22 @@
+"""
+Recount the daily emotion / dream type buckets behind the Explore trends
+from the posts table. Run it once to backfill existing posts, and again
+after bulk edits that bypass the model signals.
+"""
+from django.core.management.base import BaseCommand
+
+from core.trends import rebuild_trends
+
+
+class Command(BaseCommand):
+    help = 'Recount the daily trending emotion and dream type buckets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Only recount the last N days (default: all posts)'
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_trends(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Trends rebuilt: {total} daily buckets'))
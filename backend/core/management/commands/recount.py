@@ -0,0 +1,53 @@
+"""
+Repair drift in the denormalized counter columns.
+
+Each counter is recomputed with a single correlated-subquery UPDATE that
+only touches rows whose stored value differs from the real count, so it is
+safe to run on a schedule against a live database.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core.models import (
+    Comentario, Comunidade, Hashtag, MembroComunidade, MensagemDireta, Notificacao, Publicacao,
+    PublicacaoHashtag, ReacaoComentario, ReacaoPublicacao, Seguidor, Usuario
+)
+
+
+def count_of(model, fk, **filters):
+    """Correlated COUNT(*) of ``model`` rows pointing at the outer row"""
+    return Coalesce(Subquery(
+        model.objects.filter(**{fk: OuterRef('pk')}, **filters)
+        .values(fk).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized counters (likes, comments, replies, followers, members, hashtag uses, unread badges)'
+
+    def handle(self, *args, **options):
+        counters = [
+            (Publicacao, 'likes_count', count_of(ReacaoPublicacao, 'publicacao')),
+            (Publicacao, 'comentarios_count', count_of(Comentario, 'publicacao', status=1)),
+            (Comentario, 'likes_count', count_of(ReacaoComentario, 'comentario')),
+            (Comentario, 'respostas_count', count_of(Comentario, 'comentario_pai', status=1)),
+            (Usuario, 'seguidores_count', count_of(Seguidor, 'usuario_seguido', status=1)),
+            (Usuario, 'seguindo_count', count_of(Seguidor, 'usuario_seguidor', status=1)),
+            (Usuario, 'notificacoes_nao_lidas', count_of(Notificacao, 'usuario_destino', lida=False)),
+            (Usuario, 'mensagens_nao_lidas', count_of(MensagemDireta, 'usuario_destinatario', lida=False)),
+            (Comunidade, 'membros_count', count_of(MembroComunidade, 'comunidade')),
+            (Hashtag, 'contagem_uso', count_of(PublicacaoHashtag, 'hashtag')),
+        ]
+
+        for model, field, real_count in counters:
+            with transaction.atomic():
+                fixed = model.objects.annotate(
+                    real_count=real_count
+                ).exclude(
+                    **{field: F('real_count')}
+                ).update(**{field: real_count})
+            self.stdout.write(f'  {model._meta.db_table}.{field}: {fixed} rows fixed')
+
+        self.stdout.write(self.style.SUCCESS('Counters recomputed'))
@@ -4,6 +4,7 @@ Populates the database with realistic sample data for development and testing.
 Dream content is original, inspired by real dream journal narratives.
 """
 import random
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
@@ -682,6 +683,10 @@ class Command(BaseCommand):
         self.create_likes(users, posts)
         self.create_comments(users, posts)
         self.create_reports(users, posts)
+        call_command('backfill_timeline', stdout=self.stdout)
+        call_command('recount', stdout=self.stdout)
+        call_command('rank_posts', stdout=self.stdout)
+        call_command('rank_hashtags', '--backfill', stdout=self.stdout)
         
         self.stdout.write(self.style.SUCCESS('✅ Seed completed successfully!'))
         self.print_summary()
@@ -0,0 +1,65 @@
+"""
+Notification outbox worker: delivers queued notifications in batches (see
+core/notifications.py). Run it as a long-lived process next to the web
+server, or with --once from cron.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from core.notifications import batch_size, dispatch_pending, drain
+from core.realtime import prune_events
+
+# Longest pause between retries after repeated database errors
+MAX_BACKOFF_SECONDS = 60
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued notifications from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Deliver what is queued now and exit'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Outbox rows per transaction (default: NOTIFICATIONS_BATCH_SIZE)'
+        )
+
+    def handle(self, *args, **options):
+        limit = options['batch_size'] or batch_size()
+        if options['once']:
+            total = drain(limit)
+            self.stdout.write(self.style.SUCCESS(f'Notifications delivered: {total}'))
+            return
+
+        interval = getattr(settings, 'NOTIFICATIONS_POLL_SECONDS', 2)
+        self.stdout.write(f'Delivering notifications every {interval}s (Ctrl+C to stop)')
+        failures = 0
+        try:
+            while True:
+                try:
+                    dequeued, delivered = dispatch_pending(limit)
+                    if dequeued < limit:
+                        # Web processes prune too, but only while streams are open
+                        prune_events()
+                except DatabaseError as exc:
+                    # e.g. SQLite "database is locked" while the web process
+                    # writes: the batch was rolled back, so retry it later
+                    failures += 1
+                    delay = min(interval * 2 ** failures, MAX_BACKOFF_SECONDS)
+                    self.stderr.write(f'  Delivery failed ({exc}); retrying in {delay:g}s')
+                    close_old_connections()
+                    time.sleep(delay)
+                    continue
+                failures = 0
+                if delivered:
+                    self.stdout.write(f'  {delivered} notifications delivered')
+                if dequeued < limit:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            pass
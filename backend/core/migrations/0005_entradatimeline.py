@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:57
+
+import django.db.models.deletion
+import uuid6
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_remove_usuario_pergunta_secreta_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntradaTimeline',
+            fields=[
+                ('id_entrada', models.UUIDField(default=uuid6.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('data_publicacao', models.DateTimeField()),
+                ('autor', models.ForeignKey(db_column='id_autor', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('publicacao', models.ForeignKey(db_column='id_publicacao', on_delete=django.db.models.deletion.CASCADE, related_name='entradas_timeline', to='core.publicacao')),
+                ('usuario', models.ForeignKey(db_column='id_usuario', on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'timeline',
+                'indexes': [models.Index(fields=['usuario', '-data_publicacao'], name='timeline_usuario_data_idx'), models.Index(fields=['usuario', 'autor'], name='timeline_usuario_autor_idx')],
+                'unique_together': {('usuario', 'publicacao')},
+            },
+        ),
+    ]
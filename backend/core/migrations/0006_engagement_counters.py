@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:58
+
+import django.db.models.expressions
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(model, fk, **filters):
+    return Coalesce(Subquery(
+        model.objects.filter(**{fk: OuterRef('pk')}, **filters)
+        .values(fk).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def populate_counters(apps, schema_editor):
+    Publicacao = apps.get_model('core', 'Publicacao')
+    Comentario = apps.get_model('core', 'Comentario')
+    ReacaoPublicacao = apps.get_model('core', 'ReacaoPublicacao')
+    ReacaoComentario = apps.get_model('core', 'ReacaoComentario')
+
+    Publicacao.objects.update(
+        likes_count=_count(ReacaoPublicacao, 'publicacao'),
+        comentarios_count=_count(Comentario, 'publicacao', status=1),
+    )
+    Comentario.objects.update(
+        likes_count=_count(ReacaoComentario, 'comentario'),
+        respostas_count=_count(Comentario, 'comentario_pai', status=1),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_entradatimeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comentario',
+            name='likes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comentario',
+            name='respostas_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='publicacao',
+            name='comentarios_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='publicacao',
+            name='likes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='publicacao',
+            index=models.Index(models.OrderBy(django.db.models.expressions.CombinedExpression(models.F('likes_count'), '+', models.F('comentarios_count')), descending=True), models.OrderBy(models.F('data_publicacao'), descending=True), name='publicacoes_engajamento_idx'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_engagement_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingPublicacao',
+            fields=[
+                ('publicacao', models.OneToOneField(db_column='id_publicacao', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='core.publicacao')),
+                ('pontuacao', models.FloatField()),
+                ('data_publicacao', models.DateTimeField()),
+                ('data_calculo', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'ranking_publicacoes',
+                'indexes': [models.Index(fields=['-pontuacao', '-data_publicacao'], name='ranking_pontuacao_idx')],
+            },
+        ),
+    ]
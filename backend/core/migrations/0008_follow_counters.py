@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(model, fk, **filters):
+    return Coalesce(Subquery(
+        model.objects.filter(**{fk: OuterRef('pk')}, **filters)
+        .values(fk).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def populate_counters(apps, schema_editor):
+    Usuario = apps.get_model('core', 'Usuario')
+    Seguidor = apps.get_model('core', 'Seguidor')
+
+    Usuario.objects.update(
+        seguidores_count=_count(Seguidor, 'usuario_seguido', status=1),
+        seguindo_count=_count(Seguidor, 'usuario_seguidor', status=1),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_ranking_publicacoes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='seguidores_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='seguindo_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['-seguidores_count'], name='usuarios_seguidores_idx'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
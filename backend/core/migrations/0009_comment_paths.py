@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:39
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def populate_paths(apps, schema_editor):
+    """Walk the reply trees level by level, starting at the root comments"""
+    Comentario = apps.get_model('core', 'Comentario')
+
+    depth = 0
+    level = [
+        (pk, pk.hex + '/')
+        for pk in Comentario.objects.filter(comentario_pai__isnull=True).values_list('pk', flat=True)
+    ]
+    while level:
+        Comentario.objects.bulk_update(
+            [Comentario(pk=pk, caminho=path, profundidade=depth) for pk, path in level],
+            ['caminho', 'profundidade'],
+            batch_size=BATCH_SIZE,
+        )
+        paths = dict(level)
+        level = []
+        ids = list(paths)
+        for start in range(0, len(ids), BATCH_SIZE):
+            replies = Comentario.objects.filter(
+                comentario_pai__in=ids[start:start + BATCH_SIZE]
+            ).values_list('pk', 'comentario_pai')
+            level.extend((pk, paths[parent] + pk.hex + '/') for pk, parent in replies)
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_follow_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comentario',
+            name='caminho',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='comentario',
+            name='profundidade',
+            field=models.SmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='comentario',
+            index=models.Index(fields=['publicacao', 'caminho'], name='comentarios_caminho_idx'),
+        ),
+        migrations.RunPython(populate_paths, migrations.RunPython.noop),
+    ]
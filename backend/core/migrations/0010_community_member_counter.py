@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counter(apps, schema_editor):
+    Comunidade = apps.get_model('core', 'Comunidade')
+    MembroComunidade = apps.get_model('core', 'MembroComunidade')
+
+    Comunidade.objects.update(membros_count=Coalesce(Subquery(
+        MembroComunidade.objects.filter(comunidade=OuterRef('pk'))
+        .values('comunidade').annotate(total=Count('pk')).values('total')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_comment_paths'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comunidade',
+            name='membros_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counter, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:51
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _search_key(text):
+    # Copy of core.models.search_key as of this migration
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def populate_search_keys(apps, schema_editor):
+    Usuario = apps.get_model('core', 'Usuario')
+    Hashtag = apps.get_model('core', 'Hashtag')
+
+    users = []
+    for user in Usuario.objects.only('pk', 'nome_usuario', 'nome_completo').iterator():
+        user.nome_usuario_busca = _search_key(user.nome_usuario)
+        user.nome_completo_busca = _search_key(user.nome_completo)
+        users.append(user)
+    Usuario.objects.bulk_update(users, ['nome_usuario_busca', 'nome_completo_busca'], batch_size=500)
+
+    hashtags = []
+    for hashtag in Hashtag.objects.only('pk', 'texto_hashtag').iterator():
+        hashtag.texto_busca = _search_key(hashtag.texto_hashtag)
+        hashtags.append(hashtag)
+    Hashtag.objects.bulk_update(hashtags, ['texto_busca'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_community_member_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hashtag',
+            name='texto_busca',
+            field=models.CharField(default='', editable=False, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='nome_completo_busca',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='nome_usuario_busca',
+            field=models.CharField(default='', editable=False, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='hashtag',
+            index=models.Index(fields=['texto_busca', '-contagem_uso'], name='hashtags_texto_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['nome_usuario_busca'], name='usuarios_nome_busca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['nome_completo_busca'], name='usuarios_nome_compl_busca_idx'),
+        ),
+        migrations.RunPython(populate_search_keys, migrations.RunPython.noop),
+    ]
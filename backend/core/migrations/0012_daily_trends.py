@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:56
+
+import uuid6
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_search_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TendenciaDiaria',
+            fields=[
+                ('id_tendencia', models.UUIDField(default=uuid6.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('dia', models.DateField()),
+                ('categoria', models.SmallIntegerField(choices=[(1, 'Emoção'), (2, 'Tipo de sonho')])),
+                ('nome', models.CharField(max_length=50)),
+                ('contagem', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'tendencias_diarias',
+                'unique_together': {('categoria', 'dia', 'nome')},
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:00
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid6
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_daily_trends'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HashtagEmAlta',
+            fields=[
+                ('hashtag', models.OneToOneField(db_column='id_hashtag', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='em_alta', serialize=False, to='core.hashtag')),
+                ('pontuacao', models.FloatField()),
+                ('uso_recente', models.IntegerField()),
+                ('data_calculo', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'hashtags_em_alta',
+                'indexes': [models.Index(fields=['-pontuacao'], name='hashtags_em_alta_pont_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UsoHashtagHora',
+            fields=[
+                ('id_uso', models.UUIDField(default=uuid6.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('hora', models.DateTimeField()),
+                ('contagem', models.IntegerField(default=0)),
+                ('hashtag', models.ForeignKey(db_column='id_hashtag', on_delete=django.db.models.deletion.CASCADE, related_name='usos_por_hora', to='core.hashtag')),
+            ],
+            options={
+                'db_table': 'hashtags_uso_horario',
+                'unique_together': {('hora', 'hashtag')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_hashtag_velocity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='publicacaohashtag',
+            index=models.Index(fields=['hashtag', 'data_associacao'], name='publicacao_hashtags_data_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:11
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid6
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_hashtag_page_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificacaoPendente',
+            fields=[
+                ('id_notificacao', models.UUIDField(default=uuid6.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('tipo_notificacao', models.SmallIntegerField(choices=[(1, 'Nova Publicação'), (2, 'Comentário'), (3, 'Curtida'), (4, 'Seguidor Novo'), (5, 'Solicitação de Seguidor')])),
+                ('id_referencia', models.CharField(blank=True, max_length=36, null=True)),
+                ('conteudo', models.TextField(blank=True, null=True)),
+                ('data_criacao', models.DateTimeField(default=django.utils.timezone.now)),
+                ('usuario_destino', models.ForeignKey(db_column='id_usuario_destino', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('usuario_origem', models.ForeignKey(blank=True, db_column='id_usuario_origem', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'notificacoes_pendentes',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacao',
+            name='atores_recentes',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='notificacao',
+            name='chave_agrupamento',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificacao',
+            name='total_atores',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='notificacaopendente',
+            name='chave_agrupamento',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notificacao',
+            index=models.Index(fields=['usuario_destino', 'chave_agrupamento', 'data_criacao'], name='notificacoes_agrupamento_idx'),
+        ),
+    ]
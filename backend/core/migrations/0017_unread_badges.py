@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(model, fk, **filters):
+    return Coalesce(Subquery(
+        model.objects.filter(**{fk: OuterRef('pk')}, **filters)
+        .values(fk).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def populate_counters(apps, schema_editor):
+    Usuario = apps.get_model('core', 'Usuario')
+    Notificacao = apps.get_model('core', 'Notificacao')
+    MensagemDireta = apps.get_model('core', 'MensagemDireta')
+
+    Usuario.objects.update(
+        notificacoes_nao_lidas=_count(Notificacao, 'usuario_destino', lida=False),
+        mensagens_nao_lidas=_count(MensagemDireta, 'usuario_destinatario', lida=False),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_notification_coalescing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='notificacoes_nao_lidas',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='mensagens_nao_lidas',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
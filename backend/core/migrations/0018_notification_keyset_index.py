@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_unread_badges'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificacao',
+            index=models.Index(fields=['usuario_destino', 'data_criacao', 'id_notificacao'], name='notificacoes_destino_data_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_notification_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='entradatimeline',
+            name='timeline_usuario_data_idx',
+        ),
+        migrations.AddIndex(
+            model_name='entradatimeline',
+            index=models.Index(fields=['usuario', 'data_publicacao', 'id_entrada'], name='timeline_usuario_data_idx'),
+        ),
+    ]
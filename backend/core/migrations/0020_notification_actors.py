@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:19
+
+import django.db.models.deletion
+import uuid6
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_actors(apps, schema_editor):
+    # Only the recent actors were kept until now; they are the best record
+    Notificacao = apps.get_model('core', 'Notificacao')
+    AtorNotificacao = apps.get_model('core', 'AtorNotificacao')
+    Usuario = apps.get_model('core', 'Usuario')
+
+    rows = Notificacao.objects.filter(chave_agrupamento__isnull=False).values_list('pk', 'atores_recentes')
+    pairs = {(pk, actor) for pk, actors in rows.iterator() for actor in actors}
+    existing = {str(pk) for pk in Usuario.objects.filter(pk__in={actor for _, actor in pairs}).values_list('pk', flat=True)}
+    AtorNotificacao.objects.bulk_create([
+        AtorNotificacao(notificacao_id=pk, usuario_id=actor) for pk, actor in pairs if actor in existing
+    ], batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_timeline_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AtorNotificacao',
+            fields=[
+                ('id_ator_notificacao', models.UUIDField(default=uuid6.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('notificacao', models.ForeignKey(db_column='id_notificacao', on_delete=django.db.models.deletion.CASCADE, related_name='atores', to='core.notificacao')),
+                ('usuario', models.ForeignKey(db_column='id_usuario', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'notificacoes_atores',
+                'unique_together': {('notificacao', 'usuario')},
+            },
+        ),
+        migrations.RunPython(populate_actors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_user_notification_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='publicacao',
+            name='hashtags_removidas',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:04
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid6
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_post_removed_hashtags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoTempoReal',
+            fields=[
+                ('id_evento', models.UUIDField(default=uuid6.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('data_criacao', models.DateTimeField(default=django.utils.timezone.now)),
+                ('notificacao', models.ForeignKey(blank=True, db_column='id_notificacao', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.notificacao')),
+                ('usuario', models.ForeignKey(db_column='id_usuario', on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'eventos_tempo_real',
+                'indexes': [models.Index(fields=['data_criacao'], name='eventos_tempo_real_data_idx')],
+            },
+        ),
+    ]
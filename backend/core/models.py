@@ -2,10 +2,60 @@ from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
 from django.dispatch import receiver
+import unicodedata
+import uuid
 import uuid6
 
+
+def search_key(text):
+    """Case- and accent-folded form of ``text`` used by the prefix lookup columns"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def prefix_range(field, prefix):
+    """
+    ``field`` starts with ``prefix``, as a range an index can serve
+    (``startswith`` compiles to LIKE, which SQLite cannot index).
+    """
+    return models.Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'})
+
+
+class SearchKeyFieldsMixin:
+    """
+    Keeps ``search_key()`` copies of text fields up to date on save();
+    ``search_keys`` maps each copy to its source field.
+    """
+    search_keys = {}
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        for key_field, source in self.search_keys.items():
+            setattr(self, key_field, search_key(getattr(self, source)))
+            if update_fields is not None and source in update_fields and key_field not in update_fields:
+                kwargs['update_fields'] = update_fields = [*update_fields, key_field]
+        super().save(*args, **kwargs)
+
+
+class CounterFieldsMixin:
+    """
+    Denormalized counters are only ever changed with F() updates, so a plain
+    save() of an already-loaded instance must not write its (possibly stale)
+    copies back over them.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
 class UsuarioManager(BaseUserManager):
     def create_user(self, email, nome_usuario, nome_completo, password=None):
         if not email:
@@ -34,7 +84,7 @@ class UsuarioManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
-class Usuario(AbstractBaseUser):
+class Usuario(SearchKeyFieldsMixin, CounterFieldsMixin, AbstractBaseUser):
     id_usuario = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
     nome_usuario = models.CharField(max_length=50, unique=True)
     email = models.CharField(max_length=100, unique=True)
@@ -63,6 +113,22 @@ class Usuario(AbstractBaseUser):
     )
     privacidade_padrao = models.SmallIntegerField(choices=PRIVACIDADE_CHOICES, default=1)
 
+    # Active (status=1) follow counts, kept in sync with F() updates
+    # (repair drift with `manage.py recount`)
+    seguidores_count = models.IntegerField(default=0)
+    seguindo_count = models.IntegerField(default=0)
+    # Badge counters: unread notifications and unread direct messages (see core/badges.py)
+    notificacoes_nao_lidas = models.IntegerField(default=0)
+    mensagens_nao_lidas = models.IntegerField(default=0)
+    # Bumped whenever the notification list changes; the list's ETag (see core/notifications.py)
+    versao_notificacoes = models.IntegerField(default=0)
+    counter_fields = ('seguidores_count', 'seguindo_count', 'notificacoes_nao_lidas', 'mensagens_nao_lidas')
+
+    # Normalized copies for typeahead prefix lookups
+    nome_usuario_busca = models.CharField(max_length=50, default='', editable=False)
+    nome_completo_busca = models.CharField(max_length=100, default='', editable=False)
+    search_keys = {'nome_usuario_busca': 'nome_usuario', 'nome_completo_busca': 'nome_completo'}
+
     objects = UsuarioManager()
 
     USERNAME_FIELD = 'email'
@@ -70,6 +136,11 @@ class Usuario(AbstractBaseUser):
 
     class Meta:
         db_table = 'usuarios'
+        indexes = [
+            models.Index(fields=['-seguidores_count'], name='usuarios_seguidores_idx'),
+            models.Index(fields=['nome_usuario_busca'], name='usuarios_nome_busca_idx'),
+            models.Index(fields=['nome_completo_busca'], name='usuarios_nome_compl_busca_idx'),
+        ]
 
     def __str__(self):
         return self.nome_usuario
@@ -102,7 +173,7 @@ class Seguidor(models.Model):
         db_table = 'seguidores'
         unique_together = ('usuario_seguidor', 'usuario_seguido')
 
-class Publicacao(models.Model):
+class Publicacao(CounterFieldsMixin, models.Model):
     id_publicacao = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
     usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, db_column='id_usuario')
     conteudo_texto = models.TextField()
@@ -125,9 +196,24 @@ class Publicacao(models.Model):
     imagem = models.ImageField(upload_to='dream_images/', null=True, blank=True)
     video = models.FileField(upload_to='dream_videos/', null=True, blank=True)
     views_count = models.IntegerField(default=0)
+    # Hashtags an edit took off the post, with their association time (see core/hashtags.py)
+    hashtags_removidas = models.JSONField(default=dict, blank=True)
+
+    # Denormalized engagement counters, kept in sync with F() updates
+    # (repair drift with `manage.py recount`)
+    likes_count = models.IntegerField(default=0)
+    comentarios_count = models.IntegerField(default=0)
+    counter_fields = ('views_count', 'likes_count', 'comentarios_count')
 
     class Meta:
         db_table = 'publicacoes'
+        indexes = [
+            models.Index(
+                (models.F('likes_count') + models.F('comentarios_count')).desc(),
+                models.F('data_publicacao').desc(),
+                name='publicacoes_engajamento_idx',
+            ),
+        ]
 
 class MidiaPublicacao(models.Model):
     id_midia = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
@@ -152,15 +238,22 @@ class MidiaPublicacao(models.Model):
     class Meta:
         db_table = 'midia_publicacoes'
 
-class Hashtag(models.Model):
+class Hashtag(SearchKeyFieldsMixin, models.Model):
     id_hashtag = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
     texto_hashtag = models.CharField(max_length=50, unique=True)
     contagem_uso = models.IntegerField(default=1)
     primeira_utilizacao = models.DateTimeField(default=timezone.now)
     ultima_utilizacao = models.DateTimeField(default=timezone.now)
 
+    # Normalized copy for prefix lookups
+    texto_busca = models.CharField(max_length=50, default='', editable=False)
+    search_keys = {'texto_busca': 'texto_hashtag'}
+
     class Meta:
         db_table = 'hashtags'
+        indexes = [
+            models.Index(fields=['texto_busca', '-contagem_uso'], name='hashtags_texto_busca_idx'),
+        ]
 
 class PublicacaoHashtag(models.Model):
     publicacao = models.ForeignKey(Publicacao, on_delete=models.CASCADE, db_column='id_publicacao')
@@ -170,8 +263,12 @@ class PublicacaoHashtag(models.Model):
     class Meta:
         db_table = 'publicacao_hashtags'
         unique_together = ('publicacao', 'hashtag')
+        indexes = [
+            # Hashtag pages, newest first (read backwards, with the id as tie-breaker)
+            models.Index(fields=['hashtag', 'data_associacao'], name='publicacao_hashtags_data_idx'),
+        ]
 
-class Comentario(models.Model):
+class Comentario(CounterFieldsMixin, models.Model):
     id_comentario = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
     publicacao = models.ForeignKey(Publicacao, on_delete=models.CASCADE, db_column='id_publicacao')
     usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, db_column='id_usuario')
@@ -187,6 +284,9 @@ class Comentario(models.Model):
     
     # Engagement metrics
     views_count = models.IntegerField(default=0)
+    likes_count = models.IntegerField(default=0)
+    respostas_count = models.IntegerField(default=0)
+    counter_fields = ('views_count', 'likes_count', 'respostas_count')
     
     STATUS_CHOICES = (
         (1, _('Ativo')),
@@ -195,8 +295,39 @@ class Comentario(models.Model):
     )
     status = models.SmallIntegerField(choices=STATUS_CHOICES, default=1)
 
+    # Materialized path: hex ids of the thread from its root down to this
+    # comment, each followed by '/'. Set once on creation (see save()).
+    caminho = models.TextField(default='', editable=False)
+    profundidade = models.SmallIntegerField(default=0, editable=False)
+
+    # Sorts after every character a path can contain ([0-9a-f/])
+    PATH_END = '~'
+
     class Meta:
         db_table = 'comentarios'
+        indexes = [
+            models.Index(fields=['publicacao', 'caminho'], name='comentarios_caminho_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.caminho:
+            parent = self.comentario_pai
+            self.caminho = (parent.caminho if parent else '') + self.pk.hex + '/'
+            self.profundidade = parent.profundidade + 1 if parent else 0
+        super().save(*args, **kwargs)
+
+    def descendentes(self):
+        """Every reply below this comment, at any depth, as one range query"""
+        return Comentario.objects.filter(
+            publicacao_id=self.publicacao_id,
+            caminho__gt=self.caminho,
+            caminho__lt=self.caminho + self.PATH_END,
+        )
+
+    @property
+    def raiz_id(self):
+        """Id of the root comment of this thread, read from the path"""
+        return uuid.UUID(self.caminho[:32])
 
 
 class ReacaoPublicacao(models.Model):
@@ -276,8 +407,68 @@ class Notificacao(models.Model):
     data_criacao = models.DateTimeField(default=timezone.now)
     data_leitura = models.DateTimeField(null=True, blank=True)
 
+    # Coalesced notifications ("Ana e mais 14 curtiram"): every event with the
+    # same key within the window updates one row (see core/notifications.py)
+    chave_agrupamento = models.CharField(max_length=64, null=True, blank=True)
+    total_atores = models.IntegerField(default=1)
+    atores_recentes = models.JSONField(default=list, blank=True)
+
     class Meta:
         db_table = 'notificacoes'
+        indexes = [
+            models.Index(fields=['usuario_destino', 'chave_agrupamento', 'data_criacao'], name='notificacoes_agrupamento_idx'),
+            models.Index(fields=['usuario_destino', 'data_criacao', 'id_notificacao'], name='notificacoes_destino_data_idx'),
+        ]
+
+
+class AtorNotificacao(models.Model):
+    """
+    Every user folded into a coalesced notification, so an actor beyond the
+    recent ones shown is still never counted twice (see core/notifications.py)
+    """
+    id_ator_notificacao = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
+    notificacao = models.ForeignKey(Notificacao, on_delete=models.CASCADE, related_name='atores', db_column='id_notificacao')
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+', db_column='id_usuario')
+
+    class Meta:
+        db_table = 'notificacoes_atores'
+        unique_together = ('notificacao', 'usuario')
+
+class NotificacaoPendente(models.Model):
+    """
+    Outbox row of a notification not delivered yet; `manage.py
+    send_notifications` turns it into a Notificacao with the same id
+    (see core/notifications.py)
+    """
+    id_notificacao = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
+    usuario_destino = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+', db_column='id_usuario_destino')
+    usuario_origem = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', db_column='id_usuario_origem')
+    tipo_notificacao = models.SmallIntegerField(choices=Notificacao.TIPO_NOTIFICACAO_CHOICES)
+    id_referencia = models.CharField(max_length=36, null=True, blank=True)
+    conteudo = models.TextField(null=True, blank=True)
+    data_criacao = models.DateTimeField(default=timezone.now)
+    chave_agrupamento = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        db_table = 'notificacoes_pendentes'
+
+class EventoTempoReal(models.Model):
+    """
+    Realtime outbox row: a notification delivered or updated, or a badge
+    counter changed, for a user. Each web process reads the new rows once
+    per tick and pushes them to its open event streams; rows older than the
+    poll lookback are pruned (see core/realtime.py)
+    """
+    id_evento = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+', db_column='id_usuario')
+    notificacao = models.ForeignKey(Notificacao, on_delete=models.CASCADE, null=True, blank=True, related_name='+', db_column='id_notificacao')
+    data_criacao = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'eventos_tempo_real'
+        indexes = [
+            models.Index(fields=['data_criacao'], name='eventos_tempo_real_data_idx'),
+        ]
 
 class ElementoSonho(models.Model):
     id_elemento = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
@@ -387,7 +578,7 @@ class ConfiguracaoUsuario(models.Model):
         db_table = 'configuracoes_usuario'
 
 
-class Comunidade(models.Model):
+class Comunidade(CounterFieldsMixin, models.Model):
     id_comunidade = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
     nome = models.CharField(max_length=100, unique=True)
     descricao = models.TextField()
@@ -397,6 +588,10 @@ class Comunidade(models.Model):
     membros = models.ManyToManyField(Usuario, through='MembroComunidade', related_name='comunidades', blank=True)
     data_criacao = models.DateTimeField(default=timezone.now)
 
+    # Maintained by the MembroComunidade signals below; repaired by `recount`
+    membros_count = models.IntegerField(default=0)
+    counter_fields = ('membros_count',)
+
     class Meta:
         db_table = 'comunidades'
 
@@ -516,3 +711,164 @@ class PasswordResetCode(models.Model):
 
     def is_valid(self):
         return not self.is_used and timezone.now() < self.expires_at
+
+
+class EntradaTimeline(models.Model):
+    """Materialized home timeline: one row per post a user should see in the 'following' tab"""
+    id_entrada = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='timeline', db_column='id_usuario')
+    publicacao = models.ForeignKey(Publicacao, on_delete=models.CASCADE, related_name='entradas_timeline', db_column='id_publicacao')
+    autor = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='+', db_column='id_autor')
+    data_publicacao = models.DateTimeField()
+
+    class Meta:
+        db_table = 'timeline'
+        unique_together = ('usuario', 'publicacao')
+        indexes = [
+            models.Index(fields=['usuario', 'data_publicacao', 'id_entrada'], name='timeline_usuario_data_idx'),
+            models.Index(fields=['usuario', 'autor'], name='timeline_usuario_autor_idx'),
+        ]
+
+
+class RankingPublicacao(models.Model):
+    """Precomputed time-decayed "For You" score, rebuilt by `manage.py rank_posts`"""
+    publicacao = models.OneToOneField(Publicacao, on_delete=models.CASCADE, primary_key=True, related_name='ranking', db_column='id_publicacao')
+    pontuacao = models.FloatField()
+    data_publicacao = models.DateTimeField()
+    data_calculo = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'ranking_publicacoes'
+        indexes = [
+            models.Index(fields=['-pontuacao', '-data_publicacao'], name='ranking_pontuacao_idx'),
+        ]
+
+
+class TendenciaDiaria(models.Model):
+    """
+    Public posts per day for one emotion or dream type, kept up to date by
+    the Publicacao signals below (see core/trends.py)
+    """
+    CATEGORIA_CHOICES = (
+        (1, _('Emoção')),
+        (2, _('Tipo de sonho')),
+    )
+    id_tendencia = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
+    dia = models.DateField()
+    categoria = models.SmallIntegerField(choices=CATEGORIA_CHOICES)
+    nome = models.CharField(max_length=50)
+    contagem = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'tendencias_diarias'
+        # Category first: TrendView scans one category over a range of days
+        unique_together = ('categoria', 'dia', 'nome')
+
+
+class UsoHashtagHora(models.Model):
+    """Uses of a hashtag by new posts during one hour (see core/trends.py)"""
+    id_uso = models.UUIDField(primary_key=True, default=uuid6.uuid7, editable=False)
+    hashtag = models.ForeignKey(Hashtag, on_delete=models.CASCADE, related_name='usos_por_hora', db_column='id_hashtag')
+    hora = models.DateTimeField()
+    contagem = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'hashtags_uso_horario'
+        unique_together = ('hora', 'hashtag')
+
+
+class HashtagEmAlta(models.Model):
+    """Precomputed trending hashtags, rebuilt by `manage.py rank_hashtags`"""
+    hashtag = models.OneToOneField(Hashtag, on_delete=models.CASCADE, primary_key=True, related_name='em_alta', db_column='id_hashtag')
+    pontuacao = models.FloatField()
+    uso_recente = models.IntegerField()
+    data_calculo = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'hashtags_em_alta'
+        indexes = [
+            models.Index(fields=['-pontuacao'], name='hashtags_em_alta_pont_idx'),
+        ]
+
+
+# Relationship changes invalidate the cached viewer context of both users (see core/viewer.py)
+@receiver([post_save, post_delete], sender=Seguidor)
+def bump_follow_graph(sender, instance, **kwargs):
+    from .viewer import bump_graph_version
+    bump_graph_version(instance.usuario_seguidor_id, instance.usuario_seguido_id)
+
+
+@receiver([post_save, post_delete], sender=Bloqueio)
+def bump_block_graph(sender, instance, **kwargs):
+    from .viewer import bump_graph_version
+    bump_graph_version(instance.usuario_id, instance.usuario_bloqueado_id)
+
+
+@receiver([post_save, post_delete], sender=Silenciamento)
+def bump_mute_graph(sender, instance, **kwargs):
+    from .viewer import bump_graph_version
+    bump_graph_version(instance.usuario_id)
+
+
+@receiver(pre_delete, sender=Usuario)
+def release_follow_counters(sender, instance, **kwargs):
+    """The user's follows are cascade-deleted; take them off the other side's counters"""
+    Usuario.objects.filter(
+        seguindo__usuario_seguido=instance, seguindo__status=1
+    ).update(seguindo_count=models.F('seguindo_count') - 1)
+    Usuario.objects.filter(
+        seguidores__usuario_seguidor=instance, seguidores__status=1
+    ).update(seguidores_count=models.F('seguidores_count') - 1)
+
+
+@receiver(post_save, sender=MembroComunidade)
+def count_new_member(sender, instance, created, **kwargs):
+    if created:
+        Comunidade.objects.filter(pk=instance.comunidade_id).update(
+            membros_count=models.F('membros_count') + 1
+        )
+
+
+@receiver(post_delete, sender=MembroComunidade)
+def count_removed_member(sender, instance, **kwargs):
+    Comunidade.objects.filter(pk=instance.comunidade_id).update(
+        membros_count=models.F('membros_count') - 1
+    )
+
+
+# Daily emotion / dream type and hourly hashtag rollups (see core/trends.py)
+def _changes_trends(update_fields):
+    from .trends import TREND_FIELDS
+    return update_fields is None or not update_fields.isdisjoint(TREND_FIELDS)
+
+
+@receiver(pre_save, sender=Publicacao)
+def remember_trend_keys(sender, instance, raw=False, update_fields=None, **kwargs):
+    from .trends import stored_trend_keys
+    if not raw and _changes_trends(update_fields):
+        instance._trend_keys = stored_trend_keys(instance)
+
+
+@receiver(post_save, sender=Publicacao)
+def count_post_trends(sender, instance, raw=False, update_fields=None, **kwargs):
+    from .trends import apply_trend_delta, trend_keys
+    if not raw and _changes_trends(update_fields):
+        apply_trend_delta(trend_keys(instance), instance.__dict__.pop('_trend_keys', None))
+
+
+@receiver(pre_delete, sender=Publicacao)
+def release_hashtags(sender, instance, **kwargs):
+    from .hashtags import release_post_hashtags
+    release_post_hashtags(instance)
+
+
+@receiver(pre_delete, sender=Publicacao)
+def release_timeline_entries(sender, instance, **kwargs):
+    from .timeline import release_post
+    release_post(instance)
+
+
+@receiver(post_delete, sender=Publicacao)
+def uncount_post_trends(sender, instance, **kwargs):
+    from .trends import apply_trend_delta, trend_keys
+    apply_trend_delta(None, trend_keys(instance))
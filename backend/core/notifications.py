@@ -0,0 +1,229 @@
+"""
+Notification outbox.
+
+Requests never write notifications themselves: create_notification()
+(views.py) only appends a row to ``notificacoes_pendentes``, a single small
+insert with no settings lookup. ``manage.py send_notifications`` drains the
+outbox in batches; for each batch it loads the recipients' preferences with
+one query, bulk-inserts the notifications they allow and deletes the batch,
+all in one transaction.
+
+Likes and comment reactions are coalesced: they are queued with a
+``chave_agrupamento`` (e.g. ``like:<post id>``) and the worker folds every
+event with the same recipient and key into the recipient's notification
+for that key from the last NOTIFICATIONS_COALESCE_HOURS, bumping its actor
+count and recent actors, instead of inserting a row per event. Every actor
+of a coalesced notification is recorded in ``notificacoes_atores``, so an
+actor already folded in (unlike, then like again) is not counted twice and
+does not bring the notification back as unread, however many others acted
+in between.
+
+Every notification that is inserted, or that a coalesced event brings back
+as unread, is added to its recipient's unread badge counter in the same
+transaction (see core/badges.py), and bumps the recipient's
+``versao_notificacoes``, the version the notification list's ETag is
+built from (so is marking notifications read).
+
+The worker runs in its own process, so it does not push anything itself:
+it records each delivered or updated notification in the realtime outbox
+(``eventos_tempo_real``), which every web process reads once per tick for
+its open event streams (core/realtime.py).
+
+Delivery is exactly once. A worker that dies partway through a batch rolls
+the whole batch back, so it is retried as a unit. Each notification reuses
+the id of its outbox row and is inserted with ``ignore_conflicts``, so a
+batch read by two workers at once is still only delivered once.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .badges import NOTIFICATIONS, adjust_unread
+from .models import AtorNotificacao, ConfiguracaoUsuario, EventoTempoReal, Notificacao, NotificacaoPendente, Usuario
+
+# ConfiguracaoUsuario flag that enables each notification type; types not
+# listed here (follow requests) are always delivered
+PREFERENCE_FIELDS = {
+    1: 'notificacoes_novas_publicacoes',
+    2: 'notificacoes_comentarios',
+    3: 'notificacoes_reacoes',
+    4: 'notificacoes_seguidor_novo',
+}
+
+
+# Actor ids kept on a coalesced notification, newest first
+MAX_RECENT_ACTORS = 10
+
+# Fields a coalesced notification changes when another actor is folded in
+COALESCED_FIELDS = (
+    'usuario_origem', 'conteudo', 'data_criacao', 'lida', 'data_leitura', 'total_atores', 'atores_recentes'
+)
+
+
+def coalesce_window():
+    return timedelta(hours=getattr(settings, 'NOTIFICATIONS_COALESCE_HOURS', 24))
+
+
+def batch_size():
+    return getattr(settings, 'NOTIFICATIONS_BATCH_SIZE', 500)
+
+
+def enqueue(usuario_destino, usuario_origem, tipo, id_referencia=None, conteudo=None, agrupamento=None):
+    """
+    Queue a notification, unless the user would be notifying themselves.
+    Notifications queued with the same ``agrupamento`` key are coalesced.
+    """
+    if usuario_destino.pk == usuario_origem.pk:
+        return None
+    return NotificacaoPendente.objects.create(
+        usuario_destino=usuario_destino,
+        usuario_origem=usuario_origem,
+        tipo_notificacao=tipo,
+        id_referencia=str(id_referencia) if id_referencia else None,
+        conteudo=conteudo,
+        chave_agrupamento=agrupamento
+    )
+
+
+def as_notification(pending):
+    return Notificacao(
+        id_notificacao=pending.pk,
+        usuario_destino_id=pending.usuario_destino_id,
+        usuario_origem_id=pending.usuario_origem_id,
+        tipo_notificacao=pending.tipo_notificacao,
+        id_referencia=pending.id_referencia,
+        conteudo=pending.conteudo,
+        data_criacao=pending.data_criacao,
+        chave_agrupamento=pending.chave_agrupamento,
+        atores_recentes=[str(pending.usuario_origem_id)] if pending.chave_agrupamento and pending.usuario_origem_id else [],
+    )
+
+
+def coalesce(pending):
+    """
+    Fold outbox rows that have a grouping key into the recipients' open
+    notifications for that key. Returns ``(new, updated, reopened)``
+    notifications, ``reopened`` being the updated ones that had been read.
+    """
+    if not pending:
+        return [], [], []
+
+    open_notifications = {}
+    for notification in Notificacao.objects.select_for_update().filter(
+        usuario_destino__in={p.usuario_destino_id for p in pending},
+        chave_agrupamento__in={p.chave_agrupamento for p in pending},
+        data_criacao__gte=timezone.now() - coalesce_window()
+    ).order_by('data_criacao'):
+        # The most recent one per key wins
+        open_notifications[(notification.usuario_destino_id, notification.chave_agrupamento)] = notification
+
+    # (notification, actor) pairs already counted
+    seen = set()
+    if open_notifications:
+        seen.update(AtorNotificacao.objects.filter(
+            notificacao__in=[n.pk for n in open_notifications.values()],
+            usuario__in={p.usuario_origem_id for p in pending}
+        ).values_list('notificacao_id', 'usuario_id'))
+
+    new, updated, reopened, actors = {}, {}, {}, []
+    for p in pending:
+        key = (p.usuario_destino_id, p.chave_agrupamento)
+        notification = open_notifications.get(key)
+        if notification is None:
+            open_notifications[key] = new[p.pk] = as_notification(p)
+            if p.usuario_origem_id is not None:
+                seen.add((p.pk, p.usuario_origem_id))
+                actors.append(AtorNotificacao(notificacao_id=p.pk, usuario_id=p.usuario_origem_id))
+            continue
+
+        if p.usuario_origem_id is None or (notification.pk, p.usuario_origem_id) in seen:
+            continue
+        seen.add((notification.pk, p.usuario_origem_id))
+        actors.append(AtorNotificacao(notificacao_id=notification.pk, usuario_id=p.usuario_origem_id))
+        actor = str(p.usuario_origem_id)
+        notification.atores_recentes = [actor, *notification.atores_recentes][:MAX_RECENT_ACTORS]
+        notification.total_atores += 1
+        notification.usuario_origem_id = p.usuario_origem_id
+        notification.conteudo = p.conteudo
+        notification.data_criacao = p.data_criacao
+        if notification.lida:
+            reopened[notification.pk] = notification
+        notification.lida = False
+        notification.data_leitura = None
+        if notification.pk not in new:
+            updated[notification.pk] = notification
+
+    # Conflicts: a batch another worker delivered first
+    AtorNotificacao.objects.bulk_create(actors, ignore_conflicts=True)
+    return list(new.values()), list(updated.values()), list(reopened.values())
+
+
+def bump_list_version(user_ids):
+    """Mark the users' notification lists as changed (see NotificacaoViewSet.get_list_version)"""
+    if user_ids:
+        Usuario.objects.filter(pk__in=user_ids).update(versao_notificacoes=F('versao_notificacoes') + 1)
+
+
+def disabled_types(user_ids):
+    """Notification types each of the users has turned off"""
+    rows = ConfiguracaoUsuario.objects.filter(
+        usuario__in=user_ids
+    ).values_list('usuario_id', *PREFERENCE_FIELDS.values())
+    return {
+        row[0]: {tipo for tipo, enabled in zip(PREFERENCE_FIELDS, row[1:]) if not enabled}
+        for row in rows
+    }
+
+
+def dispatch_pending(limit=None):
+    """Deliver the oldest batch of the outbox; returns (dequeued, delivered)"""
+    with transaction.atomic():
+        batch = list(
+            NotificacaoPendente.objects.select_for_update(skip_locked=True).order_by('pk')[:limit or batch_size()]
+        )
+        if not batch:
+            return 0, 0
+
+        # No settings row means every type is enabled
+        disabled = disabled_types({pending.usuario_destino_id for pending in batch})
+        allowed = [
+            pending for pending in batch
+            if pending.tipo_notificacao not in disabled.get(pending.usuario_destino_id, ())
+        ]
+        notifications, updated, reopened = coalesce([pending for pending in allowed if pending.chave_agrupamento])
+        notifications += [as_notification(pending) for pending in allowed if not pending.chave_agrupamento]
+
+        # Only rows that are really new count towards the badges
+        delivered = set(
+            Notificacao.objects.filter(pk__in=[n.pk for n in notifications]).values_list('pk', flat=True)
+        )
+        fresh = [n for n in notifications if n.pk not in delivered]
+        unread = Counter(n.usuario_destino_id for n in fresh)
+        unread.update(n.usuario_destino_id for n in reopened)
+
+        Notificacao.objects.bulk_create(notifications, ignore_conflicts=True)
+        if updated:
+            Notificacao.objects.bulk_update(updated, COALESCED_FIELDS)
+        # Every user whose badge changes gets a notification event, which refreshes the badges too
+        adjust_unread(NOTIFICATIONS, unread, record=False)
+        bump_list_version({n.usuario_destino_id for n in fresh + updated})
+        EventoTempoReal.objects.bulk_create([
+            EventoTempoReal(usuario_id=n.usuario_destino_id, notificacao_id=n.pk) for n in fresh + updated
+        ])
+        NotificacaoPendente.objects.filter(pk__in=[pending.pk for pending in batch]).delete()
+    return len(batch), len(notifications) + len(updated)
+
+
+def drain(limit=None):
+    """Deliver everything queued so far; returns the number of notifications delivered"""
+    limit = limit or batch_size()
+    total = 0
+    while True:
+        dequeued, delivered = dispatch_pending(limit)
+        total += delivered
+        if dequeued < limit:
+            return total
@@ -0,0 +1,293 @@
+"""
+Keyset (cursor) pagination for feed-like endpoints.
+
+Pages are selected with a WHERE clause on the queryset's ordering columns
+instead of OFFSET, so fetching page 1000 costs the same as fetching page 1.
+The primary key is always appended as the final tie-breaker; since every
+table uses UUIDv7 keys, (timestamp, pk) is a stable, time-ordered position.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_position(values, reverse=False):
+    """Opaque cursor for the row at ``values`` of a KeysetPagination ordering"""
+    encoded = []
+    for value in values:
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, (UUID, Decimal)):
+            value = str(value)
+        encoded.append(value)
+    payload = {'p': encoded}
+    if reverse:
+        payload['r'] = 1
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque-cursor pagination over the ordering already applied by the view.
+
+    The view's ``order_by()`` must only use plain field or annotation names
+    (annotate first if you need to order by an expression or related field).
+    The response has the same shape as DRF's CursorPagination:
+    ``{"next": url, "previous": url, "results": [...]}``.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 20
+    max_page_size = 50
+    invalid_cursor_message = _('Cursor inválido')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        ordering = self.get_ordering(queryset)
+        fields = [o.lstrip('-') for o in ordering]
+        position, reverse = self.decode_cursor(request, queryset, fields)
+
+        if reverse:
+            ordering = [o[1:] if o.startswith('-') else '-' + o for o in ordering]
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.build_keyset_filter(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.fields = fields
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """Ordering of the queryset, always ending with the primary key."""
+        pk_name = queryset.model._meta.pk.name
+        ordering = [o for o in queryset.query.order_by if isinstance(o, str)]
+        if not ordering:
+            ordering = ['-' + pk_name]
+        if ordering[-1].lstrip('-') not in (pk_name, 'pk'):
+            direction = '-' if ordering[0].startswith('-') else ''
+            ordering.append(direction + pk_name)
+        return ordering
+
+    def build_keyset_filter(self, ordering, position):
+        """
+        Expand ``(a, b, c) > (x, y, z)`` into the equivalent OR of ANDs, so it
+        works on every backend and honours mixed ASC/DESC columns. The
+        redundant ``a >= x`` in front lets the database start an index range
+        scan at the cursor instead of filtering every row before it.
+        """
+        keyset = Q()
+        for i, order in enumerate(ordering):
+            field = order.lstrip('-')
+            lookup = 'lt' if order.startswith('-') else 'gt'
+            clause = Q(**{f'{field}__{lookup}': position[i]})
+            for prev_order, prev_value in zip(ordering[:i], position[:i]):
+                clause &= Q(**{prev_order.lstrip('-'): prev_value})
+            keyset |= clause
+        if len(ordering) > 1 and position[0] is not None:
+            first = ordering[0]
+            lookup = 'lte' if first.startswith('-') else 'gte'
+            keyset = Q(**{f'{first.lstrip("-")}__{lookup}': position[0]}) & keyset
+        return keyset
+
+    def decode_cursor(self, request, queryset, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            return self.parse_cursor(encoded, queryset, fields)
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_cursor(self, encoded, queryset, fields):
+        """``(position, reverse)`` of a cursor; raises on malformed ones"""
+        payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        values = payload['p']
+        if len(values) != len(fields):
+            raise ValueError
+        return [self.to_python(queryset, f, v) for f, v in zip(fields, values)], bool(payload.get('r'))
+
+    def to_python(self, queryset, field_name, value):
+        if value is None:
+            return None
+        if field_name in queryset.query.annotations:
+            output_field = queryset.query.annotations[field_name].output_field
+        else:
+            try:
+                if field_name == 'pk':
+                    output_field = queryset.model._meta.pk
+                else:
+                    output_field = queryset.model._meta.get_field(field_name)
+            except FieldDoesNotExist:
+                raise ValueError(field_name)
+        return output_field.to_python(value)
+
+    def position_of(self, instance):
+        values = []
+        for field in self.fields:
+            value = getattr(instance, field)
+            if hasattr(value, 'pk'):
+                value = value.pk
+            values.append(value)
+        return values
+
+    def encode_cursor(self, instance, reverse):
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encode_position(self.position_of(instance), reverse)
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(_('Cursor de paginação')),
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': str(_('Itens por página (máx. %(max)s)') % {'max': self.max_page_size}),
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class RankedListPagination(KeysetPagination):
+    """
+    Cursor pagination over a ranked list of ids computed outside the database
+    (e.g. recommendations). The cursor carries the token the list was cached
+    under and the offset into it, so later pages are plain slices.
+    """
+
+    def paginate_ranking(self, request, load_ranking):
+        """
+        ``load_ranking(token)`` must return ``(token, ids)``, recomputing the
+        list when the token is unknown or expired.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        token, offset = self.decode_ranking_cursor(request)
+        self.token, ids = load_ranking(token)
+        if self.token != token:
+            offset = 0
+
+        self.offset = offset
+        self.has_next = offset + self.page_size < len(ids)
+        self.has_previous = offset > 0
+        self.page = ids[offset:offset + self.page_size]
+        return self.page
+
+    def decode_ranking_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, 0
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            token, offset = str(payload['t']), int(payload['o'])
+            if offset < 0:
+                raise ValueError
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return token, offset
+
+    def encode_ranking_cursor(self, offset):
+        payload = {'t': self.token, 'o': offset}
+        encoded = base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_ranking_cursor(self.offset + self.page_size)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_ranking_cursor(max(self.offset - self.page_size, 0))
+
+
+class NotificationPagination(KeysetPagination):
+    """
+    KeysetPagination whose pages also carry ``read_cursor``, the position of
+    their newest notification, to hand back to the ``read_up_to`` action.
+    """
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['read_cursor'] = encode_position(self.position_of(self.page[0])) if self.page else None
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['read_cursor'] = {'type': 'string', 'nullable': True}
+        return response_schema
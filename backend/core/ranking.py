@@ -0,0 +1,119 @@
+"""
+Time-decayed ranking for the "For You" feed.
+
+Scores are computed in a batch job (``manage.py rank_posts``) and stored in
+``ranking_publicacoes``, so feed requests read an indexed table page by page
+instead of re-ranking every public post. The score is the classic gravity
+formula::
+
+    (likes + 2 * comments + 3 * saves + 1) / (age_in_hours + 2) ** gravity
+
+so a post has to keep earning engagement to stay near the top. Posts
+published since the last run have no row yet; fresh_scores() scores them
+per request so they reach the feed without waiting for the next rebuild.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Publicacao, PublicacaoSalva, RankingPublicacao
+
+# Unranked posts scored per request, newest first
+FRESH_LIMIT = 200
+
+LIKE_WEIGHT = 1
+COMMENT_WEIGHT = 2
+SAVE_WEIGHT = 3
+
+
+def ranking_window():
+    return timedelta(days=getattr(settings, 'RANKING_WINDOW_DAYS', 7))
+
+
+def ranking_gravity():
+    return getattr(settings, 'RANKING_GRAVITY', 1.8)
+
+
+def score(likes, comments, saves, age_hours, gravity=None):
+    """Gravity score: engagement points divided by a power of the post's age"""
+    if gravity is None:
+        gravity = ranking_gravity()
+    points = LIKE_WEIGHT * likes + COMMENT_WEIGHT * comments + SAVE_WEIGHT * saves + 1
+    return points / (max(age_hours, 0) + 2) ** gravity
+
+
+def rebuild_seconds():
+    return getattr(settings, 'RANKING_REBUILD_SECONDS', 300)
+
+
+def _saves_by_post(post_ids):
+    return dict(
+        PublicacaoSalva.objects.filter(
+            publicacao__in=post_ids
+        ).values('publicacao').annotate(total=Count('pk')).values_list('publicacao', 'total')
+    )
+
+
+def rebuild_ranking(now=None):
+    """Score every public post inside the window and replace the ranking table"""
+    now = now or timezone.now()
+    since = now - ranking_window()
+
+    posts = list(
+        Publicacao.objects.filter(
+            visibilidade=1,
+            usuario__status=1,
+            data_publicacao__gte=since
+        ).values_list('id_publicacao', 'likes_count', 'comentarios_count', 'data_publicacao')
+    )
+    saves = _saves_by_post([p[0] for p in posts])
+
+    gravity = ranking_gravity()
+    rows = [
+        RankingPublicacao(
+            publicacao_id=post_id,
+            pontuacao=score(likes, comments, saves.get(post_id, 0),
+                            (now - published).total_seconds() / 3600, gravity),
+            data_publicacao=published,
+            data_calculo=now,
+        )
+        for post_id, likes, comments, published in posts
+    ]
+
+    with transaction.atomic():
+        RankingPublicacao.objects.all().delete()
+        RankingPublicacao.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def is_ranked():
+    """Whether the ranking job has produced any rows yet"""
+    return RankingPublicacao.objects.exists()
+
+
+def fresh_scores(queryset, now=None):
+    """
+    ``{post_id: score}`` for the posts in ``queryset`` inside the window that
+    have no ranking row yet, i.e. published since the last rebuild
+    """
+    now = now or timezone.now()
+    posts = list(
+        queryset.filter(
+            ranking__isnull=True,
+            data_publicacao__gte=now - ranking_window()
+        ).order_by('-data_publicacao').values_list(
+            'id_publicacao', 'likes_count', 'comentarios_count', 'data_publicacao'
+        )[:FRESH_LIMIT]
+    )
+    if not posts:
+        return {}
+    saves = _saves_by_post([p[0] for p in posts])
+    gravity = ranking_gravity()
+    return {
+        post_id: score(likes, comments, saves.get(post_id, 0),
+                       (now - published).total_seconds() / 3600, gravity)
+        for post_id, likes, comments, published in posts
+    }
@@ -0,0 +1,264 @@
+"""
+Server-Sent Events push channel for notifications and direct messages.
+
+``GET /api/events/`` (EventStreamView) keeps a ``text/event-stream``
+response open for the authenticated user and writes an event whenever
+something is published for them:
+
+    event: message        a direct message was sent to the user
+    event: read           the partner read messages the user sent
+    event: typing         the partner is typing in the conversation
+    event: notification   a notification was delivered or updated
+    event: badges         the unread counters changed (core/badges.py)
+
+Views call publish(), which hands the event to the broker once the current
+transaction commits. The default InProcessBroker fans events out to the
+streams open in this process only; set REALTIME_BROKER to the dotted path
+of a class with the same publish/subscribe/unsubscribe methods to share
+events between processes through an external broker.
+
+Notifications are written by the outbox worker, a separate process that no
+in-process broker can reach, and badge counters change in any process. Both
+record a row in the realtime outbox (``eventos_tempo_real``). Each web
+process reads it on one shared timer, NotificationFeed: every
+REALTIME_POLL_SECONDS, while streams are open here, a single query loads the
+rows recorded for their users since the last tick and a second one their
+badge counters, and the events go out through the process's own
+InProcessBroker. The cost of waiting for notifications is therefore per
+process, not per open stream. After REALTIME_HEARTBEAT_SECONDS without any
+event a stream writes a keep-alive comment.
+
+EventSource cannot send an Authorization header, and a JWT in the query
+string would end up in proxy and access logs, so browsers first POST to
+``/api/events/ticket/`` for a short-lived single-use ticket and open the
+stream with ``?ticket=``.
+
+The stream needs an ASGI server (see the Dockerfile): under WSGI, such as
+``manage.py runserver``, Django reads a streaming response's async iterator
+to the end before sending anything, so EventStreamView answers 501 there
+and clients poll ``/api/badges/`` instead.
+"""
+import asyncio
+import json
+import logging
+import secrets
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .badges import badges
+from .models import EventoTempoReal, Usuario
+
+logger = logging.getLogger(__name__)
+
+# Events held for a slow client before newer ones are dropped
+QUEUE_SIZE = 100
+
+# How far back each poll looks, so a row whose transaction committed late
+# (after newer ones) is still pushed; older rows are pruned
+POLL_LOOKBACK = timedelta(seconds=60)
+
+# Lifetime of a stream ticket between its POST and the GET that opens the stream
+TICKET_TIMEOUT = 30  # seconds
+
+
+class InProcessBroker:
+    """Thread-safe fan-out of events to the streams open in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id, queue=None):
+        """Queue receiving ``(event, data)`` for the user; call from the stream's event loop"""
+        queue = queue or asyncio.Queue(QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[str(user_id)].add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(str(user_id), set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(str(user_id), None)
+
+    def subscribed(self):
+        """IDs of the users with a stream open in this process"""
+        with self._lock:
+            return list(self._subscribers)
+
+    def publish(self, user_id, event, data):
+        """Deliver to every stream of the user; safe to call from any thread"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(str(user_id), ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(_offer, queue, (event, data))
+
+
+def _offer(queue, item):
+    if not queue.full():
+        queue.put_nowait(item)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, 'REALTIME_BROKER', 'core.realtime.InProcessBroker'))()
+
+
+def heartbeat_seconds():
+    return getattr(settings, 'REALTIME_HEARTBEAT_SECONDS', 15)
+
+
+def poll_seconds():
+    return getattr(settings, 'REALTIME_POLL_SECONDS', 1)
+
+
+def publish(user_id, event, data):
+    """Push an event to the user's open streams once the current transaction commits"""
+    transaction.on_commit(lambda: get_broker().publish(user_id, event, data))
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n'
+
+
+def notification_event(notification):
+    """Stream payload of a delivered notification; clients fetch the list for the rest"""
+    return {
+        'id_notificacao': notification.pk,
+        'tipo_notificacao': notification.tipo_notificacao,
+        'id_referencia': notification.id_referencia,
+        'conteudo': notification.conteudo,
+        'data_criacao': notification.data_criacao,
+        'total_atores': notification.total_atores,
+        'id_usuario_origem': notification.usuario_origem_id,
+    }
+
+
+class NotificationFeed:
+    """
+    The realtime outbox read once per tick for every stream open in this
+    process, on a timer that runs while there are any
+    """
+
+    def __init__(self):
+        self.local = InProcessBroker()
+        self.since = timezone.now()
+        self.sent = {}  # id_evento -> data_criacao already pushed
+        self.last_prune = self.since
+        self._loop = self._task = None
+
+    def subscribe(self, user_id, queue):
+        """Also deliver the user's outbox events to ``queue``; call from the stream's event loop"""
+        self.local.subscribe(user_id, queue)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task.done():
+            self._loop, self._task = loop, loop.create_task(self.run())
+
+    def unsubscribe(self, user_id, queue):
+        self.local.unsubscribe(user_id, queue)
+
+    async def run(self):
+        while self.local.subscribed():
+            await asyncio.sleep(poll_seconds())
+            try:
+                events = await sync_to_async(self.poll)(self.local.subscribed())
+            except DatabaseError:
+                logger.exception('Reading the realtime outbox failed; retrying next tick')
+                continue
+            for user_id, event, data in events:
+                self.local.publish(user_id, event, data)
+
+    def poll(self, user_ids):
+        """``(user_id, event, data)`` recorded for the users since the last tick"""
+        now = timezone.now()
+        floor = max(self.since, now - POLL_LOOKBACK)
+        self.sent = {pk: created for pk, created in self.sent.items() if created > floor}
+        rows = [
+            row for row in EventoTempoReal.objects.filter(
+                data_criacao__gt=floor, usuario__in=user_ids
+            ).select_related('notificacao').order_by('pk')
+            if row.pk not in self.sent
+        ]
+        for row in rows:
+            self.sent[row.pk] = row.data_criacao
+
+        events = [
+            (row.usuario_id, 'notification', notification_event(row.notificacao))
+            for row in rows if row.notificacao is not None
+        ]
+        changed = {row.usuario_id for row in rows}
+        if changed:
+            users = Usuario.objects.only('notificacoes_nao_lidas', 'mensagens_nao_lidas').filter(pk__in=changed)
+            events += [(user.pk, 'badges', badges(user)) for user in users]
+
+        if now - self.last_prune >= POLL_LOOKBACK:
+            self.last_prune = now
+            prune_events(now)
+            # Close the streams of accounts deleted meanwhile
+            existing = {str(pk) for pk in Usuario.objects.filter(pk__in=user_ids).values_list('pk', flat=True)}
+            events += [(user_id, None, None) for user_id in user_ids if str(user_id) not in existing]
+        return events
+
+
+@lru_cache(maxsize=None)
+def get_feed():
+    return NotificationFeed()
+
+
+def prune_events(now=None):
+    """Drop outbox rows older than any poll still looks at"""
+    EventoTempoReal.objects.filter(data_criacao__lt=(now or timezone.now()) - POLL_LOOKBACK).delete()
+
+
+def issue_ticket(user):
+    """Short-lived, single-use ticket that opens the user's event stream"""
+    ticket = secrets.token_urlsafe(32)
+    cache.set(f'events:ticket:{ticket}', user.pk, TICKET_TIMEOUT)
+    return ticket
+
+
+def redeem_ticket(ticket):
+    """ID of the user a ticket was issued to, or ``None``; a ticket works once"""
+    key = f'events:ticket:{ticket}'
+    user_id = cache.get(key)
+    # Only the request whose delete succeeds gets the user
+    if user_id is None or not cache.delete(key):
+        return None
+    return user_id
+
+
+async def stream_events(user):
+    """Async iterator of the user's SSE frames; runs until the client disconnects"""
+    broker, feed = get_broker(), get_feed()
+    queue = broker.subscribe(user.pk)
+    feed.subscribe(user.pk, queue)
+    last_badges = badges(user)
+    try:
+        yield format_event('badges', last_badges)
+        while True:
+            try:
+                event, data = await asyncio.wait_for(queue.get(), heartbeat_seconds())
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            if event is None:  # account deleted
+                return
+            if event == 'badges':
+                if data == last_badges:
+                    continue
+                last_badges = data
+            yield format_event(event, data)
+    finally:
+        feed.unsubscribe(user.pk, queue)
+        broker.unsubscribe(user.pk, queue)
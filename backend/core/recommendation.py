@@ -0,0 +1,200 @@
+"""
+Personalised recommendation pipeline behind /api/dreams/algorithm/.
+
+A request runs four stages, each timed separately:
+
+1. candidates: bounded batches of post ids pulled from independent sources
+   (followed authors, joined communities, trending hashtags, recent public
+   posts). Sources are skipped once the latency budget is spent.
+2. features: one query loads the columns needed for scoring.
+3. scoring: columnar; every feature is a list aligned by candidate index.
+4. rerank: greedy author-diversity re-ranking of the scored candidates.
+
+The ranked id list is cached per viewer for a few minutes so later pages are
+plain slices. Each stage is a method, so a slow one can be measured through
+the Server-Timing header (DEBUG only) and replaced in a subclass.
+"""
+import heapq
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import MembroComunidade, Publicacao, PublicacaoHashtag
+from .ranking import ranking_gravity, score
+
+RESULTS_CACHE_TIMEOUT = 300  # 5 minutes
+
+# Score multiplier added for each source that produced a candidate
+SOURCE_WEIGHTS = {
+    'following': 1.0,
+    'communities': 0.6,
+    'hashtags': 0.4,
+    'recent': 0.0,
+}
+
+# Each further post by the same author is worth this fraction of the previous one
+AUTHOR_DECAY = 0.5
+
+TRENDING_HASHTAGS = 10
+
+
+class RecommendationPipeline:
+    """Candidate generation, feature extraction, scoring and re-ranking for one viewer"""
+
+    sources = ('following', 'communities', 'hashtags', 'recent')
+
+    def __init__(self, user, viewer):
+        self.user = user
+        self.viewer = viewer
+        self.batch_size = getattr(settings, 'RECOMMENDATION_CANDIDATE_BATCH', 200)
+        self.budget = getattr(settings, 'RECOMMENDATION_BUDGET_MS', 150) / 1000
+        self.max_results = getattr(settings, 'RECOMMENDATION_MAX_RESULTS', 200)
+        self.timings = []
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((name, (time.perf_counter() - start) * 1000))
+
+    def server_timing(self):
+        """Stage durations formatted for the Server-Timing header"""
+        return ', '.join(f'{name};dur={duration:.1f}' for name, duration in self.timings)
+
+    def run(self):
+        """Ranked list of recommended post ids"""
+        started = time.perf_counter()
+        with self.stage('candidates'):
+            candidates = self.generate_candidates(started)
+        with self.stage('features'):
+            features = self.extract_features(candidates)
+        with self.stage('scoring'):
+            scores = self.score(features, candidates)
+        with self.stage('rerank'):
+            return self.rerank(features, scores)
+
+    def cached_ranking(self, token=None):
+        """
+        ``(token, ids)`` for a ranking computed earlier under ``token``, or for
+        a freshly computed one when the token is missing or expired.
+        """
+        if token:
+            ids = cache.get(self.cache_key(token))
+            if ids is not None:
+                return token, ids
+        ids = self.run()
+        token = uuid.uuid4().hex[:12]
+        cache.set(self.cache_key(token), ids, RESULTS_CACHE_TIMEOUT)
+        return token, ids
+
+    def cache_key(self, token):
+        return f'recommendations:{self.user.pk}:{token}'
+
+    # Stage 1: candidates
+
+    def visible_posts(self):
+        return Publicacao.objects.filter(
+            self.viewer.author_filter(),
+            self.viewer.visibility_filter()
+        ).exclude(usuario__in=self.viewer.muted).exclude(usuario=self.user)
+
+    def generate_candidates(self, started):
+        """Map of post id -> names of the sources that produced it"""
+        candidates = {}
+        posts = self.visible_posts()
+        for i, name in enumerate(self.sources):
+            # The first source always runs so the feed is never empty
+            if i and time.perf_counter() - started > self.budget:
+                break
+            with self.stage(f'source-{name}'):
+                ids = getattr(self, f'source_{name}')(posts).order_by(
+                    '-data_publicacao'
+                ).values_list('id_publicacao', flat=True)[:self.batch_size]
+                for post_id in ids:
+                    candidates.setdefault(post_id, set()).add(name)
+        return candidates
+
+    def source_following(self, posts):
+        return posts.filter(usuario__in=self.viewer.following)
+
+    def source_communities(self, posts):
+        return posts.filter(comunidade__in=MembroComunidade.objects.filter(
+            usuario=self.user
+        ).values('comunidade'))
+
+    def source_hashtags(self, posts):
+        since = timezone.now() - timedelta(hours=getattr(settings, 'RECOMMENDATION_TRENDING_HOURS', 24))
+        trending = PublicacaoHashtag.objects.filter(
+            data_associacao__gte=since
+        ).values('hashtag').annotate(total=Count('pk')).order_by('-total').values('hashtag')[:TRENDING_HASHTAGS]
+        return posts.filter(id_publicacao__in=PublicacaoHashtag.objects.filter(
+            hashtag__in=trending
+        ).values('publicacao'))
+
+    def source_recent(self, posts):
+        return posts.filter(visibilidade=1)
+
+    # Stage 2: features
+
+    def extract_features(self, candidates):
+        """Feature columns aligned by index, loaded with a single query"""
+        rows = Publicacao.objects.filter(
+            id_publicacao__in=list(candidates)
+        ).annotate(
+            pontuacao=F('ranking__pontuacao')
+        ).values_list('id_publicacao', 'usuario', 'likes_count', 'comentarios_count', 'data_publicacao', 'pontuacao')
+
+        columns = {'ids': [], 'authors': [], 'likes': [], 'comments': [], 'published': [], 'ranking': []}
+        for column, values in zip(columns.values(), zip(*rows)):
+            column.extend(values)
+        return columns
+
+    # Stage 3: scoring
+
+    def score(self, features, candidates):
+        """Freshness-decayed engagement times the viewer's affinity with the candidate's sources"""
+        now = timezone.now()
+        gravity = ranking_gravity()
+        base = [
+            ranked if ranked is not None else score(likes, comments, 0, (now - published).total_seconds() / 3600, gravity)
+            for ranked, likes, comments, published in zip(
+                features['ranking'], features['likes'], features['comments'], features['published']
+            )
+        ]
+        affinity = [
+            1 + sum(SOURCE_WEIGHTS.get(name, 0) for name in candidates[post_id])
+            for post_id in features['ids']
+        ]
+        return [b * a for b, a in zip(base, affinity)]
+
+    # Stage 4: re-ranking
+
+    def rerank(self, features, scores):
+        """
+        Greedy diversity: each pick discounts the author's remaining posts by
+        AUTHOR_DECAY. A lazy max-heap keeps this O(n log n).
+        """
+        authors = features['authors']
+        picked_per_author = {}
+        heap = [(-s, 0, i) for i, s in enumerate(scores)]
+        heapq.heapify(heap)
+
+        ranked = []
+        while heap and len(ranked) < self.max_results:
+            neg_score, seen, i = heapq.heappop(heap)
+            picked = picked_per_author.get(authors[i], 0)
+            if picked != seen:
+                # Author got another pick since this entry was scored; re-queue it discounted
+                heapq.heappush(heap, (-scores[i] * AUTHOR_DECAY ** picked, picked, i))
+                continue
+            ranked.append(features['ids'][i])
+            picked_per_author[authors[i]] = picked + 1
+        return ranked
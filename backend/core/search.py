@@ -0,0 +1,178 @@
+"""
+Full-text search over dream posts.
+
+On SQLite, posts are indexed in an FTS5 table over ``titulo``,
+``conteudo_texto`` and ``emocoes_sentidas``:
+
+* external content: the index stores no copy of the text, it points at
+  ``publicacoes`` rows by rowid;
+* the ``unicode61 remove_diacritics 2`` tokenizer folds case and accents, so
+  "aviao" matches "avião". FTS5 has no Portuguese stemmer; every search term
+  is matched as a prefix instead ("sonh" finds "sonho" and "sonhei");
+* triggers keep the index in sync with every INSERT, UPDATE and DELETE,
+  including bulk and raw SQL writes;
+* results are ranked by BM25 (title weighted highest) plus a bounded
+  engagement bonus.
+
+The table and triggers are created on post_migrate (see apps.py), which
+also rebuilds the index when the triggers were missing: a migration that
+remakes ``publicacoes`` (SQLite AlterField, AddField with a default...)
+drops them and renumbers the rowids. ``manage.py rebuild_search_index``
+rebuilds the index from scratch, e.g. after a VACUUM, which may renumber
+rowids too. Other databases fall back to
+``icontains`` matching ordered by engagement.
+"""
+import hashlib
+import re
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q
+
+from .models import Publicacao
+
+FTS_TABLE = 'publicacoes_fts'
+INDEXED_COLUMNS = ('titulo', 'conteudo_texto', 'emocoes_sentidas')
+
+# bm25() weight of each indexed column, in INDEXED_COLUMNS order
+BM25_WEIGHTS = (10.0, 1.0, 2.0)
+
+# Engagement adds up to ENGAGEMENT_WEIGHT to the text score; half of it at
+# ENGAGEMENT_HALF likes + comments
+ENGAGEMENT_WEIGHT = 2.0
+ENGAGEMENT_HALF = 10
+
+RESULTS_CACHE_TIMEOUT = 300  # 5 minutes
+
+_columns = ', '.join(INDEXED_COLUMNS)
+_new_values = ', '.join(f'new.{c}' for c in INDEXED_COLUMNS)
+_old_values = ', '.join(f'old.{c}' for c in INDEXED_COLUMNS)
+
+SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_columns},
+        content='publicacoes', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON publicacoes BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.rowid, {_new_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON publicacoes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.rowid, {_old_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_columns} ON publicacoes BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.rowid, {_old_values});
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.rowid, {_new_values});
+    END
+    """,
+]
+
+SEARCH_SQL = f"""
+    SELECT p.id_publicacao,
+           -bm25({FTS_TABLE}, {', '.join(str(w) for w in BM25_WEIGHTS)})
+           + %s * (p.likes_count + p.comentarios_count) / (p.likes_count + p.comentarios_count + %s) AS relevancia
+    FROM {FTS_TABLE}
+    JOIN publicacoes p ON p.rowid = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH %s AND p.visibilidade = 1
+    ORDER BY relevancia DESC
+    LIMIT %s
+"""
+
+
+def fts_enabled(conn=connection):
+    return conn.vendor == 'sqlite'
+
+
+def install(conn=connection):
+    """
+    Create the index and its triggers; returns True if the index needs a
+    rebuild, i.e. it is new or the triggers were gone (publicacoes remade)
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [FTS_TABLE, f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au']
+        )
+        complete = cursor.fetchone()[0] == len(SCHEMA)
+        for statement in SCHEMA:
+            cursor.execute(statement)
+    return not complete
+
+
+def rebuild(conn=connection):
+    """Re-index every post from the publicacoes table"""
+    with conn.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def match_expression(query):
+    """
+    FTS5 query for free text: every word must match, as a prefix. Words are
+    quoted so user input can never be read as FTS5 syntax.
+    """
+    words = re.findall(r'\w+', query.lower())
+    return ' '.join(f'"{word}"*' for word in words) or None
+
+
+def max_results():
+    return getattr(settings, 'SEARCH_MAX_RESULTS', 500)
+
+
+def ranked_post_ids(query):
+    """Ids of public posts matching ``query``, best first"""
+    if fts_enabled():
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(SEARCH_SQL, [ENGAGEMENT_WEIGHT, float(ENGAGEMENT_HALF), expression, max_results()])
+            return [uuid.UUID(hex=str(row[0])) for row in cursor.fetchall()]
+
+    return list(Publicacao.objects.filter(
+        Q(conteudo_texto__icontains=query) | Q(titulo__icontains=query),
+        visibilidade=1
+    ).annotate(
+        engagement=F('likes_count') + F('comentarios_count')
+    ).order_by('-engagement', '-data_publicacao').values_list('id_publicacao', flat=True)[:max_results()])
+
+
+class PostSearch:
+    """Ranked post ids for one viewer and query, cached for cursor pagination"""
+
+    def __init__(self, user, viewer, query):
+        self.user = user
+        self.viewer = viewer
+        self.query = query
+
+    def run(self):
+        ids = ranked_post_ids(self.query)
+        # Drop authors the viewer may not see (blocked, private and not followed)
+        visible = set(Publicacao.objects.filter(
+            self.viewer.author_filter(), pk__in=ids
+        ).values_list('pk', flat=True))
+        return [pk for pk in ids if pk in visible]
+
+    def cached_ranking(self, token=None):
+        """``(token, ids)``, see RecommendationPipeline.cached_ranking"""
+        if token:
+            ids = cache.get(self.cache_key(token))
+            if ids is not None:
+                return token, ids
+        ids = self.run()
+        token = uuid.uuid4().hex[:12]
+        cache.set(self.cache_key(token), ids, RESULTS_CACHE_TIMEOUT)
+        return token, ids
+
+    def cache_key(self, token):
+        # A cursor from another query must not replay that query's results
+        digest = hashlib.sha1(self.query.lower().encode('utf-8')).hexdigest()[:16]
+        return f'search:{self.user.pk}:{digest}:{token}'
@@ -3,14 +3,31 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password, check_password
+from django.urls import reverse
 from django.utils.translation import gettext as _
+from rest_framework.utils.urls import replace_query_param
 
 User = get_user_model()
 
+
+def _viewer(context):
+    request = context.get('request')
+    if request and request.user.is_authenticated:
+        return request.user
+    return None
+
+
+def _viewer_context(context):
+    """Relationship sets of the requesting user (see core/viewer.py)"""
+    request = context.get('request')
+    if request and request.user.is_authenticated:
+        from .viewer import ViewerContext
+        return ViewerContext.for_request(request)
+    return None
+
+
 class UserSerializer(serializers.ModelSerializer):
     avatar_url = serializers.SerializerMethodField()
-    seguidores_count = serializers.SerializerMethodField()
-    seguindo_count = serializers.SerializerMethodField()
     is_following = serializers.SerializerMethodField()
     is_blocked = serializers.SerializerMethodField()
     is_muted = serializers.SerializerMethodField()
@@ -20,6 +37,7 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('id_usuario', 'nome_usuario', 'email', 'nome_completo', 'bio', 'avatar_url', 
                   'data_nascimento', 'data_criacao', 'seguidores_count', 'seguindo_count', 
                   'is_following', 'is_blocked', 'is_muted', 'is_admin', 'privacidade_padrao')
+        read_only_fields = ('seguidores_count', 'seguindo_count')
 
     def get_avatar_url(self, obj):
         if obj.avatar_url:
@@ -29,46 +47,21 @@ class UserSerializer(serializers.ModelSerializer):
            return obj.avatar_url
         return None
 
-    def get_seguidores_count(self, obj):
-        from .models import Seguidor
-        return Seguidor.objects.filter(usuario_seguido=obj, status=1).count()
-
-    def get_seguindo_count(self, obj):
-        from .models import Seguidor
-        return Seguidor.objects.filter(usuario_seguidor=obj, status=1).count()
-
     def get_is_following(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            if request.user.id_usuario == obj.id_usuario:
-                return None  # Não mostra para o próprio usuário
-            from .models import Seguidor
-            return Seguidor.objects.filter(
-                usuario_seguidor=request.user,
-                usuario_seguido=obj,
-                status=1
-            ).exists()
-        return False
+        viewer = _viewer_context(self.context)
+        if viewer is None:
+            return False
+        if viewer.is_self(obj.pk):
+            return None  # Não mostra para o próprio usuário
+        return obj.pk in viewer.following
 
     def get_is_blocked(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            from .models import Bloqueio
-            return Bloqueio.objects.filter(
-                usuario=request.user,
-                usuario_bloqueado=obj
-            ).exists()
-        return False
+        viewer = _viewer_context(self.context)
+        return viewer is not None and obj.pk in viewer.blocked
 
     def get_is_muted(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            from .models import Silenciamento
-            return Silenciamento.objects.filter(
-                usuario=request.user,
-                usuario_silenciado=obj
-            ).exists()
-        return False
+        viewer = _viewer_context(self.context)
+        return viewer is not None and obj.pk in viewer.muted
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -179,11 +172,39 @@ class VerifyAndResetPasswordSerializer(serializers.Serializer):
 # Dream (Publicacao) Serializers
 from .models import Publicacao
 
+
+class PublicacaoListSerializer(serializers.ListSerializer):
+    """
+    Renders a page of posts with a fixed number of queries: authors and
+    communities are fetched in bulk, and the viewer's likes and saves are
+    resolved with one IN query each.
+    """
+
+    def to_representation(self, data):
+        from django.db.models import prefetch_related_objects
+        from .models import ReacaoPublicacao, PublicacaoSalva
+
+        posts = list(data.all() if hasattr(data, 'all') else data)
+        # No-op for querysets that already select_related() them
+        prefetch_related_objects(posts, 'usuario', 'comunidade')
+
+        viewer = _viewer(self.context)
+        post_ids = [p.pk for p in posts]
+        liked, saved = set(), set()
+        if viewer is not None and post_ids:
+            liked = set(ReacaoPublicacao.objects.filter(
+                usuario=viewer, publicacao__in=post_ids
+            ).values_list('publicacao_id', flat=True))
+            saved = set(PublicacaoSalva.objects.filter(
+                usuario=viewer, publicacao__in=post_ids
+            ).values_list('publicacao_id', flat=True))
+        self.context['post_state'] = {'ids': set(post_ids), 'liked': liked, 'saved': saved}
+        return super().to_representation(posts)
+
+
 class PublicacaoSerializer(serializers.ModelSerializer):
     """Serializer for reading dream posts"""
     usuario = UserSerializer(read_only=True)
-    likes_count = serializers.SerializerMethodField()
-    comentarios_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     is_saved = serializers.SerializerMethodField()
     comunidade_id = serializers.UUIDField(source='comunidade.id_comunidade', read_only=True, default=None)
@@ -198,19 +219,22 @@ class PublicacaoSerializer(serializers.ModelSerializer):
             'likes_count', 'comentarios_count', 'is_liked', 'is_saved',
             'comunidade_id', 'comunidade_nome'
         )
-        read_only_fields = ('id_publicacao', 'usuario', 'data_publicacao', 'editado', 'data_edicao', 'views_count')
-
-    def get_likes_count(self, obj):
-        from .models import ReacaoPublicacao
-        return ReacaoPublicacao.objects.filter(publicacao=obj).count()
-
-    def get_comentarios_count(self, obj):
-        from .models import Comentario
-        return Comentario.objects.filter(publicacao=obj, status=1).count()
+        read_only_fields = ('id_publicacao', 'usuario', 'data_publicacao', 'editado', 'data_edicao', 'views_count',
+                            'likes_count', 'comentarios_count')
+        list_serializer_class = PublicacaoListSerializer
+
+    def _batched(self, obj):
+        state = self.context.get('post_state')
+        if state is not None and obj.pk in state['ids']:
+            return state
+        return None
 
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            state = self._batched(obj)
+            if state is not None:
+                return obj.pk in state['liked']
             from .models import ReacaoPublicacao
             return ReacaoPublicacao.objects.filter(
                 publicacao=obj,
@@ -221,6 +245,9 @@ class PublicacaoSerializer(serializers.ModelSerializer):
     def get_is_saved(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
+            state = self._batched(obj)
+            if state is not None:
+                return obj.pk in state['saved']
             from .models import PublicacaoSalva
             return PublicacaoSalva.objects.filter(
                 publicacao=obj,
@@ -266,13 +293,92 @@ class SeguidorSerializer(serializers.ModelSerializer):
 
 # Comentario Serializers
 from .models import Comentario
+from .pagination import encode_position
+
+# Replies rendered inline under each comment, and how many levels deep
+REPLIES_PREVIEW = 3
+MAX_REPLY_DEPTH = 3
+
+
+def load_comment_tree(comments, context):
+    """
+    Bounded reply tree under ``comments``: one query per level loads the
+    first REPLIES_PREVIEW active replies of every comment on that level
+    (window function, so the cost does not depend on thread size). Parents,
+    posts with their owners and the viewer's likes are fetched in bulk.
+    ``more`` maps a comment to its last inlined reply when it has others.
+    """
+    from django.db.models import F, Window, prefetch_related_objects
+    from django.db.models.functions import RowNumber
+    from .models import ReacaoComentario
+
+    prefetch_related_objects(comments, 'usuario')
+    nodes = {c.pk: c for c in comments}
+    replies, more = {}, {}
+    level = list(nodes)
+    for _ in range(context.get('depth', 0), MAX_REPLY_DEPTH):
+        if not level:
+            break
+        rows = Comentario.objects.filter(
+            comentario_pai__in=level, status=1
+        ).annotate(posicao=Window(
+            RowNumber(),
+            partition_by=F('comentario_pai'),
+            order_by=(F('data_comentario').asc(), F('id_comentario').asc())
+        )).filter(posicao__lte=REPLIES_PREVIEW + 1).select_related('usuario').order_by('comentario_pai', 'posicao')
+        level = []
+        for reply in rows:
+            shown = replies.setdefault(reply.comentario_pai_id, [])
+            if reply.posicao > REPLIES_PREVIEW:
+                more[reply.comentario_pai_id] = shown[-1]
+                continue
+            shown.append(reply)
+            nodes[reply.pk] = reply
+            level.append(reply.pk)
+
+    # Parents outside the tree (a page of replies) are still needed for replying_to
+    missing = {c.comentario_pai_id for c in nodes.values()} - set(nodes) - {None}
+    parents = {p.pk: p for p in Comentario.objects.filter(pk__in=missing).select_related('usuario')} if missing else {}
+    parents.update(nodes)
+    posts = {
+        p.pk: p for p in Publicacao.objects.filter(
+            pk__in={c.publicacao_id for c in nodes.values()}
+        ).select_related('usuario')
+    }
+    for c in nodes.values():
+        if c.publicacao_id in posts:
+            c.publicacao = posts[c.publicacao_id]
+        if c.comentario_pai_id in parents:
+            c.comentario_pai = parents[c.comentario_pai_id]
+
+    viewer = _viewer(context)
+    liked = set()
+    if viewer is not None and nodes:
+        liked = set(ReacaoComentario.objects.filter(
+            usuario=viewer, comentario__in=list(nodes)
+        ).values_list('comentario_id', flat=True))
+    return {'ids': set(nodes), 'replies': replies, 'more': more, 'liked': liked}
+
+
+class ComentarioListSerializer(serializers.ListSerializer):
+    """
+    Renders a page of comments with a fixed number of queries: the bounded
+    reply tree is loaded up front and nested reply lists reuse it.
+    """
+
+    def to_representation(self, data):
+        comments = list(data.all() if hasattr(data, 'all') else data)
+        tree = self.context.get('comment_tree')
+        if tree is None or any(c.pk not in tree['ids'] for c in comments):
+            self.context['comment_tree'] = load_comment_tree(comments, self.context)
+        return super().to_representation(comments)
+
 
 class ComentarioSerializer(serializers.ModelSerializer):
     """Serializer for reading comments - Twitter-like structure"""
     usuario = UserSerializer(read_only=True)
     respostas = serializers.SerializerMethodField()
-    respostas_count = serializers.SerializerMethodField()
-    likes_count = serializers.SerializerMethodField()
+    respostas_next = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     can_delete = serializers.SerializerMethodField()
     can_edit = serializers.SerializerMethodField()
@@ -285,39 +391,48 @@ class ComentarioSerializer(serializers.ModelSerializer):
         model = Comentario
         fields = (
             'id_comentario', 'usuario', 'conteudo_texto', 'data_comentario', 
-            'editado', 'respostas', 'respostas_count', 'likes_count', 'is_liked', 
+            'editado', 'respostas', 'respostas_next', 'respostas_count', 'likes_count', 'is_liked', 
             'can_delete', 'can_edit', 'replying_to', 'post_owner',
             'imagem_url', 'video_url', 'views_count'
         )
         read_only_fields = fields
+        list_serializer_class = ComentarioListSerializer
+
+    def _tree(self, obj):
+        tree = self.context.get('comment_tree')
+        if tree is None or obj.pk not in tree['ids']:
+            tree = self.context['comment_tree'] = load_comment_tree([obj], self.context)
+        return tree
 
     def get_respostas(self, obj):
         # Recursive serialization - limit depth to avoid infinite loops
         depth = self.context.get('depth', 0)
-        if depth < 3 and obj.respostas.exists():
-            context = {**self.context, 'depth': depth + 1}
-            return ComentarioSerializer(
-                obj.respostas.filter(status=1).order_by('data_comentario'), 
-                many=True, 
-                context=context
-            ).data
-        return []
-
-    def get_respostas_count(self, obj):
-        return obj.respostas.filter(status=1).count()
-
-    def get_likes_count(self, obj):
-        from .models import ReacaoComentario
-        return ReacaoComentario.objects.filter(comentario=obj).count()
+        if depth >= MAX_REPLY_DEPTH:
+            return []
+        replies = self._tree(obj)['replies'].get(obj.pk)
+        if not replies:
+            return []
+        context = {**self.context, 'depth': depth + 1}
+        return ComentarioSerializer(replies, many=True, context=context).data
+
+    def get_respostas_next(self, obj):
+        """URL of the replies not inlined under this comment, if any"""
+        last = self._tree(obj)['more'].get(obj.pk)
+        truncated = self.context.get('depth', 0) >= MAX_REPLY_DEPTH and obj.respostas_count > 0
+        if last is None and not truncated:
+            return None
+        url = reverse('dream-comments-replies', args=[obj.publicacao_id, obj.pk])
+        request = self.context.get('request')
+        if request:
+            url = request.build_absolute_uri(url)
+        if last is not None:
+            url = replace_query_param(url, 'cursor', encode_position([last.data_comentario, last.pk]))
+        return url
 
     def get_is_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            from .models import ReacaoComentario
-            return ReacaoComentario.objects.filter(
-                comentario=obj,
-                usuario=request.user
-            ).exists()
+            return obj.pk in self._tree(obj)['liked']
         return False
 
     def get_can_delete(self, obj):
@@ -335,7 +450,8 @@ class ComentarioSerializer(serializers.ModelSerializer):
 
     def get_replying_to(self, obj):
         """Returns info about who this comment is replying to (for 'Em resposta a' display)"""
-        if obj.comentario_pai:
+        if obj.comentario_pai_id:
+            self._tree(obj)
             parent = obj.comentario_pai
             result = {
                 'comment_author': {
@@ -345,7 +461,7 @@ class ComentarioSerializer(serializers.ModelSerializer):
                 }
             }
             # If replying to a reply, also include the post owner
-            if parent.comentario_pai:
+            if parent.comentario_pai_id:
                 post_owner = obj.publicacao.usuario
                 if post_owner.id_usuario != parent.usuario.id_usuario:
                     result['post_owner'] = {
@@ -357,6 +473,7 @@ class ComentarioSerializer(serializers.ModelSerializer):
 
     def get_post_owner(self, obj):
         """Returns the post owner info for context"""
+        self._tree(obj)
         owner = obj.publicacao.usuario
         return {
             'id': owner.id_usuario,
@@ -402,17 +519,50 @@ class ComentarioCreateSerializer(serializers.ModelSerializer):
 # Notificacao Serializers
 from .models import Notificacao
 
+RECENT_ACTORS_SHOWN = 3
+
+
+def load_notification_actors(notifications):
+    """Profiles of the recent actors of every coalesced notification, with one query"""
+    ids = {actor for n in notifications for actor in n.atores_recentes[:RECENT_ACTORS_SHOWN]}
+    if not ids:
+        return {}
+    return {
+        str(actor['id_usuario']): actor
+        for actor in User.objects.filter(pk__in=ids).values('id_usuario', 'nome_usuario', 'nome_completo', 'avatar_url')
+    }
+
+
+class NotificacaoListSerializer(serializers.ListSerializer):
+    """Renders a page of notifications with one query for all recent actors"""
+
+    def to_representation(self, data):
+        notifications = list(data.all() if hasattr(data, 'all') else data)
+        self.context['notification_actors'] = load_notification_actors(notifications)
+        return super().to_representation(notifications)
+
+
 class NotificacaoSerializer(serializers.ModelSerializer):
     """Serializer for reading notifications"""
     usuario_origem = UserSerializer(read_only=True)
     tipo_notificacao_display = serializers.SerializerMethodField()
+    atores_recentes = serializers.SerializerMethodField()
     
     class Meta:
         model = Notificacao
         fields = ('id_notificacao', 'usuario_origem', 'tipo_notificacao', 'tipo_notificacao_display', 
-                  'id_referencia', 'conteudo', 'lida', 'data_criacao')
+                  'id_referencia', 'conteudo', 'lida', 'data_criacao', 'total_atores', 'atores_recentes')
+        # lida only changes through the read actions, which keep the unread badge in step
         read_only_fields = ('id_notificacao', 'usuario_origem', 'tipo_notificacao', 'id_referencia', 
-                           'conteudo', 'data_criacao')
+                           'conteudo', 'lida', 'data_criacao', 'total_atores')
+        list_serializer_class = NotificacaoListSerializer
+
+    def get_atores_recentes(self, obj):
+        """Latest actors of a coalesced notification, newest first"""
+        actors = self.context.get('notification_actors')
+        if actors is None:
+            actors = self.context['notification_actors'] = load_notification_actors([obj])
+        return [actors[actor] for actor in obj.atores_recentes[:RECENT_ACTORS_SHOWN] if actor in actors]
 
     def get_tipo_notificacao_display(self, obj):
         tipos = {1: 'post', 2: 'comment', 3: 'like', 4: 'follower'}
@@ -433,6 +583,15 @@ class SearchSerializer(serializers.Serializer):
     """Serializer for search results"""
     results = serializers.DictField()
     counts = serializers.DictField()
+    next = serializers.DictField(required=False)
+
+
+class ImpressionsSerializer(serializers.Serializer):
+    """Batch of post and comment ids the client has displayed"""
+    MAX_IDS = 200
+
+    posts = serializers.ListField(child=serializers.UUIDField(), required=False, default=list, max_length=MAX_IDS)
+    comments = serializers.ListField(child=serializers.UUIDField(), required=False, default=list, max_length=MAX_IDS)
 
 
 # User Settings Serializers
@@ -480,9 +639,52 @@ class CloseFriendSerializer(serializers.ModelSerializer):
 # Comunidade Serializers
 from .models import Comunidade
 
+MODERATOR_ROLES = ('moderator', 'admin')
+
+
+def load_community_state(communities, context):
+    """
+    Viewer roles, the ``user_id`` query param user's roles and the moderators
+    of every community in ``communities``, with one query each.
+    """
+    from .models import MembroComunidade
+    from .viewer import community_roles
+
+    ids = [c.pk for c in communities]
+    request = context.get('request')
+    roles, target_roles = {}, None
+    if request and request.user.is_authenticated:
+        roles = community_roles(request, ids)
+        target_user_id = request.query_params.get('user_id')
+        if target_user_id:
+            target_roles = dict(MembroComunidade.objects.filter(
+                comunidade__in=ids, usuario_id=target_user_id
+            ).values_list('comunidade_id', 'role'))
+
+    moderators = {}
+    for mod in MembroComunidade.objects.filter(
+        comunidade__in=ids, role__in=MODERATOR_ROLES
+    ).select_related('usuario'):
+        moderators.setdefault(mod.comunidade_id, []).append({
+            'id': mod.usuario.id_usuario,
+            'username': mod.usuario.nome_usuario,
+            'role': mod.role,
+            'avatar': mod.usuario.avatar_url if mod.usuario.avatar_url else None
+        })
+    return {'ids': set(ids), 'roles': roles, 'target_roles': target_roles, 'moderators': moderators}
+
+
+class ComunidadeListSerializer(serializers.ListSerializer):
+    """Renders a page of communities with a constant number of queries"""
+
+    def to_representation(self, data):
+        communities = list(data.all() if hasattr(data, 'all') else data)
+        self.context['community_state'] = load_community_state(communities, self.context)
+        return super().to_representation(communities)
+
+
 class ComunidadeSerializer(serializers.ModelSerializer):
     """Serializer for communities"""
-    membros_count = serializers.SerializerMethodField()
     is_member = serializers.SerializerMethodField()
     is_moderator = serializers.SerializerMethodField()
     is_admin = serializers.SerializerMethodField()
@@ -493,75 +695,35 @@ class ComunidadeSerializer(serializers.ModelSerializer):
         model = Comunidade
         fields = ('id_comunidade', 'nome', 'descricao', 'imagem', 'banner', 'regras', 'data_criacao', 'membros_count', 'is_member', 'is_moderator', 'is_admin', 'user_role', 'moderators')
         read_only_fields = ('id_comunidade', 'data_criacao', 'membros_count', 'is_member', 'is_moderator', 'is_admin', 'user_role', 'moderators')
+        list_serializer_class = ComunidadeListSerializer
 
-    def get_membros_count(self, obj):
-        return obj.membros.count()
+    def _state(self, obj):
+        state = self.context.get('community_state')
+        if state is None or obj.pk not in state['ids']:
+            state = self.context['community_state'] = load_community_state([obj], self.context)
+        return state
+
+    def _role(self, obj):
+        return self._state(obj)['roles'].get(obj.pk)
 
     def get_is_member(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.membros.filter(id_usuario=request.user.id_usuario).exists()
-        return False
+        return self._role(obj) is not None
 
     def get_is_moderator(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            from .models import MembroComunidade
-            return MembroComunidade.objects.filter(
-                comunidade=obj, 
-                usuario=request.user, 
-                role__in=['moderator', 'admin']
-            ).exists()
-        return False
+        return self._role(obj) in MODERATOR_ROLES
 
     def get_is_admin(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            from .models import MembroComunidade
-            return MembroComunidade.objects.filter(
-                comunidade=obj, 
-                usuario=request.user, 
-                role='admin'
-            ).exists()
-        return False
+        return self._role(obj) == 'admin'
 
     def get_user_role(self, obj):
         """Returns the user's role in this community. Uses user_id query param if present, otherwise current user."""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            from .models import MembroComunidade
-            # If user_id query param exists, show that user's role
-            target_user_id = request.query_params.get('user_id')
-            if target_user_id:
-                membership = MembroComunidade.objects.filter(
-                    comunidade=obj,
-                    usuario_id=target_user_id
-                ).first()
-            else:
-                membership = MembroComunidade.objects.filter(
-                    comunidade=obj, 
-                    usuario=request.user
-                ).first()
-            if membership:
-                return membership.role
-        return None
+        state = self._state(obj)
+        if state['target_roles'] is not None:
+            return state['target_roles'].get(obj.pk)
+        return state['roles'].get(obj.pk)
 
     def get_moderators(self, obj):
-        from .models import MembroComunidade
-        mods = MembroComunidade.objects.filter(
-            comunidade=obj,
-            role__in=['moderator', 'admin']
-        ).select_related('usuario')
-        
-        return [
-            {
-                'id': mod.usuario.id_usuario,
-                'username': mod.usuario.nome_usuario,
-                'role': mod.role,
-                'avatar': mod.usuario.avatar_url if mod.usuario.avatar_url else None
-            }
-            for mod in mods
-        ]
+        return self._state(obj)['moderators'].get(obj.pk, [])
 
 class CommunityStatsSerializer(serializers.Serializer):
     """Serializer for community moderator insights"""
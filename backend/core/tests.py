@@ -1,9 +1,22 @@
+import uuid
 import pytest
+from io import StringIO
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.urls import reverse
-from .factories import UsuarioFactory, PublicacaoFactory, ComentarioFactory
-from .models import Usuario, Publicacao, Seguidor, Notificacao
+from django.core.cache import cache
+from django.utils import timezone
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .factories import UsuarioFactory, PublicacaoFactory, ComentarioFactory, HashtagFactory
+from .models import Usuario, Publicacao, Comentario, Seguidor, Bloqueio, Notificacao, EntradaTimeline, ReacaoComentario
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
 
 @pytest.fixture
 def api_client():
@@ -110,6 +123,665 @@ class TestDreams:
         assert response.status_code == status.HTTP_200_OK
         assert response.data['is_liked'] is False
 
+@pytest.mark.django_db
+class TestPostHashtags:
+    def post(self, client, text):
+        return client.post(reverse('dreams-list'), {'titulo': 'x', 'conteudo_texto': text, 'visibilidade': 1})
+
+    def counts(self):
+        from .models import Hashtag
+        return dict(Hashtag.objects.values_list('texto_hashtag', 'contagem_uso'))
+
+    def test_linking_cost_does_not_grow_with_tag_count(self, auth_client):
+        with CaptureQueriesContext(connection) as one:
+            self.post(auth_client, '#a1')
+        with CaptureQueriesContext(connection) as many:
+            self.post(auth_client, '#b1 #b2 #b3 #b4 #b5 #a1')
+        assert len(many) == len(one)
+        assert self.counts() == {'a1': 2, 'b1': 1, 'b2': 1, 'b3': 1, 'b4': 1, 'b5': 1}
+
+    def test_edit_resyncs_and_delete_releases_tags(self, auth_client):
+        from .models import PublicacaoHashtag
+
+        HashtagFactory(texto_hashtag='mar', contagem_uso=3)
+        self.post(auth_client, '#mar #voar')
+        post_id = Publicacao.objects.get().pk
+        assert self.counts() == {'mar': 4, 'voar': 1}
+
+        auth_client.patch(reverse('dreams-detail', args=[post_id]), {'conteudo_texto': '#mar #lua'})
+        assert self.counts() == {'mar': 4, 'voar': 0, 'lua': 1}
+        assert set(PublicacaoHashtag.objects.values_list('hashtag__texto_hashtag', flat=True)) == {'mar', 'lua'}
+
+        auth_client.delete(reverse('dreams-detail', args=[post_id]))
+        assert self.counts() == {'mar': 3, 'voar': 0, 'lua': 0}
+
+    def test_retagging_keeps_original_association(self, auth_client):
+        from .models import PublicacaoHashtag, UsoHashtagHora
+        from .trends import hour_of
+
+        self.post(auth_client, '#mar')
+        post_id = Publicacao.objects.get().pk
+        earlier = timezone.now() - timezone.timedelta(hours=3)
+        PublicacaoHashtag.objects.update(data_associacao=earlier)
+        UsoHashtagHora.objects.update(hora=hour_of(earlier))
+
+        url = reverse('dreams-detail', args=[post_id])
+        auth_client.patch(url, {'conteudo_texto': 'sem tags'})
+        auth_client.patch(url, {'conteudo_texto': '#mar #lua'})
+        links = dict(PublicacaoHashtag.objects.values_list('hashtag__texto_hashtag', 'data_associacao'))
+        assert links['mar'] == earlier
+        assert links['lua'] > earlier
+        uses = set(UsoHashtagHora.objects.filter(contagem__gt=0).values_list('hashtag__texto_hashtag', 'hora'))
+        assert uses == {('mar', hour_of(earlier)), ('lua', hour_of(links['lua']))}
+        assert self.counts() == {'mar': 1, 'lua': 1}
+
+    def test_recount_repairs_hashtag_uses(self, auth_client):
+        from .models import Hashtag
+
+        self.post(auth_client, '#sol')
+        Hashtag.objects.update(contagem_uso=7)
+        call_command('recount', stdout=StringIO())
+        assert self.counts() == {'sol': 1}
+
+    def test_hashtag_page_is_cursor_paginated_newest_first(self, auth_client):
+        for i in range(5):
+            self.post(auth_client, f'sonho {i} #mar')
+        self.post(auth_client, '#outro')
+
+        url = reverse('hashtag-dreams', args=['mar'])
+        first = auth_client.get(url, {'page_size': 3})
+        second = auth_client.get(first.data['next'])
+        assert [p['conteudo_texto'] for p in first.data['results'] + second.data['results']] == [
+            f'sonho {i} #mar' for i in reversed(range(5))
+        ]
+        assert second.data['next'] is None
+        assert auth_client.get(reverse('hashtag-dreams', args=['nada'])).status_code == status.HTTP_404_NOT_FOUND
+
+    def test_hashtag_page_applies_feed_privacy(self, auth_client, user):
+        from .models import PublicacaoHashtag
+
+        tag = HashtagFactory(texto_hashtag='segredo')
+        public = PublicacaoFactory(conteudo_texto='#segredo')
+        followers_only = PublicacaoFactory(conteudo_texto='#segredo', visibilidade=2)
+        blocked = PublicacaoFactory(conteudo_texto='#segredo')
+        private_account = PublicacaoFactory(conteudo_texto='#segredo')
+        private_account.usuario.privacidade_padrao = 2
+        private_account.usuario.save()
+        Bloqueio.objects.create(usuario=user, usuario_bloqueado=blocked.usuario)
+        for post in (public, followers_only, blocked, private_account):
+            PublicacaoHashtag.objects.create(publicacao=post, hashtag=tag)
+
+        response = auth_client.get(reverse('hashtag-dreams', args=['segredo']))
+        assert [p['id_publicacao'] for p in response.data['results']] == [str(public.pk)]
+
+        Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=followers_only.usuario)
+        response = auth_client.get(reverse('hashtag-dreams', args=['#segredo']))
+        assert {p['id_publicacao'] for p in response.data['results']} == {str(public.pk), str(followers_only.pk)}
+
+
+@pytest.mark.django_db
+class TestFeedPagination:
+    def test_mine_tab_cursor_walks_all_posts(self, auth_client, user):
+        posts = PublicacaoFactory.create_batch(5, usuario=user)
+        expected = [str(p.id_publicacao) for p in sorted(posts, key=lambda p: (p.data_publicacao, p.id_publicacao), reverse=True)]
+
+        url = reverse('dreams-list') + '?tab=mine&page_size=2'
+        seen = []
+        pages = 0
+        while url:
+            response = auth_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.data['results']) <= 2
+            seen += [p['id_publicacao'] for p in response.data['results']]
+            url = response.data['next']
+            pages += 1
+
+        assert pages == 3
+        assert seen == expected
+
+    def test_previous_cursor_returns_prior_page(self, auth_client, user):
+        PublicacaoFactory.create_batch(4, usuario=user)
+        first = auth_client.get(reverse('dreams-list') + '?tab=mine&page_size=2')
+        assert first.data['previous'] is None
+
+        second = auth_client.get(first.data['next'])
+        back = auth_client.get(second.data['previous'])
+        assert [p['id_publicacao'] for p in back.data['results']] == \
+            [p['id_publicacao'] for p in first.data['results']]
+
+    def test_page_size_is_capped(self, auth_client, user):
+        PublicacaoFactory.create_batch(3, usuario=user)
+        response = auth_client.get(reverse('dreams-list') + '?tab=mine&page_size=1000')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 3
+
+    def test_saved_tab_is_paginated_by_save_date(self, auth_client, user):
+        posts = PublicacaoFactory.create_batch(3)
+        for post in posts:
+            auth_client.post(reverse('dreams-save-post', args=[post.id_publicacao]))
+
+        response = auth_client.get(reverse('dreams-list') + '?tab=saved&page_size=2')
+        assert len(response.data['results']) == 2
+        assert response.data['results'][0]['id_publicacao'] == str(posts[-1].id_publicacao)
+        response = auth_client.get(response.data['next'])
+        assert [p['id_publicacao'] for p in response.data['results']] == [str(posts[0].id_publicacao)]
+        assert response.data['next'] is None
+
+    def test_invalid_cursor_returns_404(self, auth_client):
+        response = auth_client.get(reverse('dreams-list') + '?tab=mine&cursor=not-a-cursor')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+@pytest.mark.django_db
+class TestHomeTimeline:
+    def following_ids(self, client):
+        response = client.get(reverse('dreams-list') + '?tab=following')
+        assert response.status_code == status.HTTP_200_OK
+        return [p['id_publicacao'] for p in response.data['results']]
+
+    def test_new_post_is_fanned_out_to_followers(self, auth_client, user):
+        author = UsuarioFactory()
+        auth_client.post(reverse('follow', args=[author.id_usuario]))
+
+        author_client = APIClient()
+        author_client.force_authenticate(user=author)
+        author_client.post(reverse('dreams-list'), {'conteudo_texto': 'Sonhei com o mar'})
+        post = Publicacao.objects.get(usuario=author)
+
+        assert EntradaTimeline.objects.filter(usuario=user, publicacao=post).exists()
+        assert str(post.id_publicacao) in self.following_ids(auth_client)
+
+    def test_private_post_is_not_fanned_out(self, auth_client, user):
+        author = UsuarioFactory()
+        Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=author, status=1)
+        author_client = APIClient()
+        author_client.force_authenticate(user=author)
+        author_client.post(reverse('dreams-list'), {'conteudo_texto': 'Só meu', 'visibilidade': 3})
+
+        assert self.following_ids(auth_client) == []
+        assert EntradaTimeline.objects.filter(usuario=author).count() == 1
+
+    def test_follow_backfills_and_unfollow_removes(self, auth_client, user):
+        author = UsuarioFactory()
+        old_post = PublicacaoFactory(usuario=author)
+
+        auth_client.post(reverse('follow', args=[author.id_usuario]))
+        assert self.following_ids(auth_client) == [str(old_post.id_publicacao)]
+
+        auth_client.delete(reverse('follow', args=[author.id_usuario]))
+        assert self.following_ids(auth_client) == []
+
+    def test_block_removes_entries_both_ways(self, auth_client, user):
+        other = UsuarioFactory()
+        PublicacaoFactory(usuario=other)
+        auth_client.post(reverse('follow', args=[other.id_usuario]))
+        assert len(self.following_ids(auth_client)) == 1
+
+        auth_client.post(reverse('block', args=[other.id_usuario]))
+        assert self.following_ids(auth_client) == []
+
+    def test_celebrity_posts_are_merged_at_read_time(self, auth_client, user, settings):
+        settings.TIMELINE_CELEBRITY_THRESHOLD = 1
+        celebrity = UsuarioFactory()
+        Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=celebrity, status=1)
+        Seguidor.objects.create(usuario_seguidor=UsuarioFactory(), usuario_seguido=celebrity, status=1)
+        call_command('recount', stdout=StringIO())
+
+        celebrity_client = APIClient()
+        celebrity_client.force_authenticate(user=celebrity)
+        celebrity_client.post(reverse('dreams-list'), {'conteudo_texto': 'Post famoso'})
+        post = Publicacao.objects.get(usuario=celebrity)
+
+        assert not EntradaTimeline.objects.filter(usuario=user).exists()
+        assert self.following_ids(auth_client) == [str(post.id_publicacao)]
+
+    def test_backfill_command(self, auth_client, user):
+        author = UsuarioFactory()
+        Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=author, status=1)
+        posts = PublicacaoFactory.create_batch(2, usuario=author)
+        PublicacaoFactory(usuario=author, visibilidade=3)
+
+        call_command('backfill_timeline', stdout=StringIO())
+        assert set(self.following_ids(auth_client)) == {str(p.id_publicacao) for p in posts}
+
+    def test_pages_are_range_scans_of_the_timeline(self, auth_client, user):
+        author = UsuarioFactory()
+        Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=author, status=1)
+        now = timezone.now()
+        posts = [PublicacaoFactory(usuario=author, data_publicacao=now - timezone.timedelta(minutes=i)) for i in range(5)]
+        call_command('backfill_timeline', stdout=StringIO())
+
+        seen, url = [], reverse('dreams-list') + '?tab=following&page_size=2'
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                data = auth_client.get(url).data
+                seen += [p['id_publicacao'] for p in data['results']]
+                url = data['next']
+        assert seen == [str(p.id_publicacao) for p in posts]
+
+        page_sql = next(q['sql'] for q in queries.captured_queries if q['sql'].startswith('SELECT "timeline"'))
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + page_sql)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        assert 'timeline_usuario_data_idx' in plan and 'TEMP B-TREE' not in plan
+
+@pytest.mark.django_db
+class TestEngagementCounters:
+    def test_like_toggle_updates_counter(self, auth_client):
+        dream = PublicacaoFactory()
+        url = reverse('dreams-like', args=[dream.id_publicacao])
+
+        assert auth_client.post(url).data['likes_count'] == 1
+        dream.refresh_from_db()
+        assert dream.likes_count == 1
+
+        assert auth_client.post(url).data['likes_count'] == 0
+        dream.refresh_from_db()
+        assert dream.likes_count == 0
+
+    def test_racing_like_toggles_keep_counter_exact(self, auth_client, monkeypatch):
+        from django.db.models import QuerySet
+        from .models import NotificacaoPendente, ReacaoPublicacao
+        dream = PublicacaoFactory()
+        url = reverse('dreams-like', args=[dream.id_publicacao])
+        auth_client.post(url)
+        stale = ReacaoPublicacao.objects.get()
+
+        # Second of two concurrent likes: read no like, then the insert conflicts
+        with monkeypatch.context() as m:
+            m.setattr(QuerySet, 'first', lambda self: None)
+            response = auth_client.post(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'is_liked': True, 'likes_count': 1}
+
+        # Second of two concurrent unlikes: read the like the first one deleted
+        auth_client.post(url)
+        with monkeypatch.context() as m:
+            m.setattr(QuerySet, 'first', lambda self: stale)
+            assert auth_client.post(url).data == {'is_liked': False, 'likes_count': 0}
+        # Only the like that was really inserted notified the author
+        assert NotificacaoPendente.objects.count() == 1
+
+    def test_comment_create_and_delete_update_counters(self, auth_client, user):
+        dream = PublicacaoFactory(usuario=user)
+        url = reverse('dream-comments-list', args=[dream.id_publicacao])
+        parent_id = auth_client.post(url, {'conteudo_texto': 'Raiz'}).data['id_comentario']
+        reply_id = auth_client.post(url, {'conteudo_texto': 'Resposta', 'comentario_pai': parent_id}).data['id_comentario']
+
+        dream.refresh_from_db()
+        assert dream.comentarios_count == 2
+        parent = dream.comentario_set.get(id_comentario=parent_id)
+        assert parent.respostas_count == 1
+
+        auth_client.delete(reverse('dream-comments-detail', args=[dream.id_publicacao, reply_id]))
+        dream.refresh_from_db()
+        parent.refresh_from_db()
+        assert dream.comentarios_count == 1
+        assert parent.respostas_count == 0
+
+    def test_serializer_reads_counter_columns(self, auth_client, user):
+        dream = PublicacaoFactory(usuario=user)
+        auth_client.post(reverse('dreams-like', args=[dream.id_publicacao]))
+        response = auth_client.get(reverse('dreams-detail', args=[dream.id_publicacao]))
+        assert response.data['likes_count'] == 1
+        assert response.data['comentarios_count'] == 0
+
+    def test_recount_repairs_drift(self, user):
+        dream = PublicacaoFactory()
+        ComentarioFactory.create_batch(2, publicacao=dream)
+        Publicacao.objects.filter(pk=dream.pk).update(likes_count=7)
+
+        call_command('recount', stdout=StringIO())
+        dream.refresh_from_db()
+        assert dream.likes_count == 0
+        assert dream.comentarios_count == 2
+
+@pytest.mark.django_db
+class TestBatchedViewerState:
+    def feed_queries(self, client):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse('dreams-list'), {'tab': 'foryou'})
+        assert response.status_code == status.HTTP_200_OK
+        return len(ctx.captured_queries), response.data
+
+    def test_feed_page_uses_constant_queries(self, auth_client, user):
+        PublicacaoFactory.create_batch(2)
+        small, data = self.feed_queries(auth_client)
+        assert len(data) == 2
+
+        for dream in PublicacaoFactory.create_batch(8):
+            auth_client.post(reverse('dreams-like', args=[dream.id_publicacao]))
+            Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=dream.usuario, status=1)
+        large, data = self.feed_queries(auth_client)
+        assert len(data) == 10
+        assert large == small
+
+    def test_batched_flags_match_viewer(self, auth_client, user):
+        liked, other = PublicacaoFactory.create_batch(2)
+        auth_client.post(reverse('dreams-like', args=[liked.id_publicacao]))
+        auth_client.post(reverse('follow', args=[liked.usuario.id_usuario]))
+
+        _, data = self.feed_queries(auth_client)
+        by_id = {d['id_publicacao']: d for d in data}
+        assert by_id[str(liked.id_publicacao)]['is_liked'] is True
+        assert by_id[str(liked.id_publicacao)]['usuario']['is_following'] is True
+        assert by_id[str(liked.id_publicacao)]['usuario']['seguidores_count'] == 1
+        assert by_id[str(other.id_publicacao)]['is_liked'] is False
+        assert by_id[str(other.id_publicacao)]['usuario']['is_following'] is False
+
+@pytest.mark.django_db
+class TestForYouRanking:
+    def test_score_decays_with_age(self):
+        from .ranking import score
+        assert score(10, 0, 0, age_hours=1) > score(10, 0, 0, age_hours=48)
+        assert score(0, 0, 1, age_hours=5) > score(1, 0, 0, age_hours=5)
+
+    def test_rank_posts_skips_posts_outside_window(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import RankingPublicacao
+        fresh = PublicacaoFactory()
+        PublicacaoFactory(data_publicacao=timezone.now() - timedelta(days=30))
+        PublicacaoFactory(visibilidade=3)
+
+        call_command('rank_posts', stdout=StringIO())
+        assert list(RankingPublicacao.objects.values_list('publicacao_id', flat=True)) == [fresh.id_publicacao]
+
+    def test_posts_after_the_last_rebuild_still_reach_foryou(self, auth_client):
+        from datetime import timedelta
+        from django.utils import timezone
+        ranked = PublicacaoFactory(data_publicacao=timezone.now() - timedelta(days=2))
+        call_command('rank_posts', stdout=StringIO())
+        new = PublicacaoFactory()
+
+        response = auth_client.get(reverse('dreams-list'), {'tab': 'foryou'})
+        assert [d['id_publicacao'] for d in response.data] == [str(new.id_publicacao), str(ranked.id_publicacao)]
+
+    def test_algorithm_pages_through_ranking(self, auth_client):
+        from datetime import timedelta
+        from django.utils import timezone
+        old_viral = PublicacaoFactory(likes_count=30, data_publicacao=timezone.now() - timedelta(days=5))
+        recent = PublicacaoFactory(likes_count=5)
+        quiet = PublicacaoFactory(data_publicacao=timezone.now() - timedelta(days=1))
+        call_command('rank_posts', stdout=StringIO())
+
+        url = reverse('dreams-algorithm')
+        first = auth_client.get(url, {'page_size': 2}).data
+        assert [d['id_publicacao'] for d in first['results']] == [str(recent.id_publicacao), str(old_viral.id_publicacao)]
+        second = auth_client.get(first['next']).data
+        assert [d['id_publicacao'] for d in second['results']] == [str(quiet.id_publicacao)]
+        assert second['next'] is None
+
+@pytest.mark.django_db
+class TestRecommendationPipeline:
+    @pytest.fixture(autouse=True)
+    def generous_budget(self, settings):
+        settings.RECOMMENDATION_BUDGET_MS = 60_000
+
+    def algorithm_ids(self, client, **params):
+        response = client.get(reverse('dreams-algorithm'), params)
+        assert response.status_code == status.HTTP_200_OK
+        return [d['id_publicacao'] for d in response.data['results']], response
+
+    def test_followed_authors_rank_first_and_own_posts_are_skipped(self, auth_client, user):
+        followed = UsuarioFactory()
+        Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=followed, status=1)
+        stranger_post = PublicacaoFactory()
+        followed_post = PublicacaoFactory(usuario=followed)
+        PublicacaoFactory(usuario=user)
+
+        ids, _ = self.algorithm_ids(auth_client)
+        assert ids == [str(followed_post.id_publicacao), str(stranger_post.id_publicacao)]
+
+    def test_rerank_spreads_out_a_single_author(self, auth_client):
+        prolific = UsuarioFactory()
+        prolific_posts = PublicacaoFactory.create_batch(3, usuario=prolific, likes_count=10)
+        other = PublicacaoFactory(likes_count=6)
+
+        ids, _ = self.algorithm_ids(auth_client)
+        assert ids[1] == str(other.id_publicacao)
+        assert set(ids) == {str(p.id_publicacao) for p in prolific_posts + [other]}
+
+    def test_pages_are_sliced_from_cached_ranking(self, auth_client):
+        posts = PublicacaoFactory.create_batch(3)
+        first_ids, first = self.algorithm_ids(auth_client, page_size=2)
+        PublicacaoFactory()  # Not in the cached ranking
+
+        second = auth_client.get(first.data['next']).data
+        second_ids = [d['id_publicacao'] for d in second['results']]
+        assert len(first_ids) == 2 and len(second_ids) == 1
+        assert set(first_ids + second_ids) == {str(p.id_publicacao) for p in posts}
+        assert second['next'] is None
+
+    def test_exhausted_budget_keeps_only_first_source(self, auth_client, user, settings):
+        followed = UsuarioFactory()
+        Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=followed, status=1)
+        followed_post = PublicacaoFactory(usuario=followed)
+        PublicacaoFactory()
+        settings.RECOMMENDATION_BUDGET_MS = 0
+
+        ids, _ = self.algorithm_ids(auth_client)
+        assert ids == [str(followed_post.id_publicacao)]
+
+    def test_stage_timings_header_in_debug(self, auth_client, settings):
+        PublicacaoFactory()
+        settings.DEBUG = True
+        _, response = self.algorithm_ids(auth_client)
+        for stage in ('candidates', 'features', 'scoring', 'rerank'):
+            assert f'{stage};dur=' in response['Server-Timing']
+
+@pytest.mark.django_db
+class TestImpressions:
+    @pytest.fixture(autouse=True)
+    def empty_buffer(self):
+        from .impressions import buffer
+        buffer.flush()
+        yield buffer
+        buffer.flush()
+
+    def test_impressions_are_buffered_until_flush(self, auth_client, settings, empty_buffer):
+        settings.IMPRESSIONS_FLUSH_SECONDS = 3600
+        dream = PublicacaoFactory()
+        comment = ComentarioFactory(publicacao=dream)
+        url = reverse('impressions')
+
+        for _ in range(3):
+            response = auth_client.post(url, {'posts': [str(dream.id_publicacao)], 'comments': [str(comment.id_comentario)]}, format='json')
+            assert response.status_code == status.HTTP_202_ACCEPTED
+        dream.refresh_from_db()
+        assert dream.views_count == 0
+        assert empty_buffer.pending('posts') == {dream.id_publicacao: 3}
+
+        assert empty_buffer.flush() == 2
+        dream.refresh_from_db()
+        comment.refresh_from_db()
+        assert dream.views_count == 3
+        assert comment.views_count == 3
+
+    def test_flush_groups_rows_by_increment(self, empty_buffer):
+        once, twice = PublicacaoFactory.create_batch(2)
+        empty_buffer.add('posts', [once.pk, twice.pk, twice.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            empty_buffer.flush()
+        assert len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]) == 2
+        twice.refresh_from_db()
+        assert twice.views_count == 2
+
+    def test_size_threshold_triggers_flush(self, auth_client, settings):
+        settings.IMPRESSIONS_FLUSH_SECONDS = 3600
+        settings.IMPRESSIONS_FLUSH_SIZE = 2
+        dreams = PublicacaoFactory.create_batch(2)
+        auth_client.post(reverse('impressions'), {'posts': [str(d.id_publicacao) for d in dreams]}, format='json')
+        assert Publicacao.objects.filter(views_count=1).count() == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_timer_flushes_without_further_requests(self, settings):
+        import time
+        from .impressions import ImpressionBuffer
+        settings.IMPRESSIONS_FLUSH_SECONDS = 0.01
+        dream = PublicacaoFactory()
+        ImpressionBuffer().add('posts', [dream.pk])
+
+        deadline = time.monotonic() + 5
+        while Publicacao.objects.get(pk=dream.pk).views_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert Publicacao.objects.get(pk=dream.pk).views_count == 1
+
+    def test_rejects_oversized_batch(self, auth_client):
+        ids = [str(uuid.uuid4()) for _ in range(201)]
+        response = auth_client.post(reverse('impressions'), {'posts': ids}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.django_db
+class TestFeedETag:
+    def test_unchanged_following_feed_returns_304(self, auth_client, user):
+        PublicacaoFactory(usuario=user).entradas_timeline.create(usuario=user, autor=user, data_publicacao=timezone.now())
+        url = reverse('dreams-list')
+        first = auth_client.get(url)
+        etag = first['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not any('reacoes_publicacoes' in q['sql'] for q in ctx.captured_queries)
+
+    def test_new_post_and_own_like_change_etag(self, auth_client, user):
+        url = reverse('dreams-list')
+        etag = auth_client.get(url)['ETag']
+
+        auth_client.post(url, {'conteudo_texto': 'Novo sonho'})
+        dream_id = Publicacao.objects.get(usuario=user).id_publicacao
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response['ETag']
+
+        auth_client.post(reverse('dreams-like', args=[dream_id]))
+        response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'][0]['is_liked'] is True
+
+    def test_notifications_etag_changes_when_read(self, auth_client, user):
+        Notificacao.objects.create(usuario_destino=user, usuario_origem=UsuarioFactory(), tipo_notificacao=4)
+        url = reverse('notifications-list')
+        etag = auth_client.get(url)['ETag']
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+        auth_client.patch(reverse('notifications-read-all'))
+        assert auth_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+
+    def test_not_modified_skips_list_queries(self, auth_client, user):
+        for url, table in ((reverse('dreams-list'), 'timeline'), (reverse('notifications-list'), 'notificacoes')):
+            etag = auth_client.get(url)['ETag']
+            with CaptureQueriesContext(connection) as ctx:
+                response = auth_client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == status.HTTP_304_NOT_MODIFIED
+            assert not any(f'"{table}"' in q['sql'] for q in ctx.captured_queries)
+
+    def test_fan_out_and_delivery_change_etag(self, auth_client, user):
+        from .notifications import drain
+        from .timeline import fan_out_post
+        from .views import create_notification
+        author = UsuarioFactory()
+        Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=author, status=1)
+        feed, notifications = reverse('dreams-list'), reverse('notifications-list')
+        feed_etag = auth_client.get(feed)['ETag']
+        notifications_etag = auth_client.get(notifications)['ETag']
+
+        fan_out_post(PublicacaoFactory(usuario=author))
+        assert auth_client.get(feed, HTTP_IF_NONE_MATCH=feed_etag).status_code == status.HTTP_200_OK
+
+        create_notification(user, author, 4)
+        assert auth_client.get(notifications, HTTP_IF_NONE_MATCH=notifications_etag).status_code == status.HTTP_304_NOT_MODIFIED
+        drain()
+        user.refresh_from_db()  # force_authenticate reuses this instance; JWT auth loads the row per request
+        assert auth_client.get(notifications, HTTP_IF_NONE_MATCH=notifications_etag).status_code == status.HTTP_200_OK
+
+@pytest.mark.django_db
+class TestViewerContext:
+    def test_context_is_cached_until_graph_changes(self, user):
+        from .models import Bloqueio
+        from .viewer import ViewerContext
+        other = UsuarioFactory()
+        assert ViewerContext.for_user(user).following == frozenset()
+
+        with CaptureQueriesContext(connection) as ctx:
+            ViewerContext.for_user(user)
+        assert len(ctx.captured_queries) == 0
+
+        Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=other, status=1)
+        assert ViewerContext.for_user(user).following == {other.pk}
+
+        Bloqueio.objects.create(usuario=other, usuario_bloqueado=user)
+        assert ViewerContext.for_user(user).blocked_by == {other.pk}
+
+    def test_context_cached_before_commit_is_dropped(self, user, django_capture_on_commit_callbacks):
+        from django.db import transaction
+        from .models import Bloqueio
+        from .viewer import VIEWER_CACHE_TIMEOUT, ViewerContext, graph_version
+        other = UsuarioFactory()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                Bloqueio.objects.create(usuario=user, usuario_bloqueado=other)
+                # What a concurrent request loads before the block commits
+                stale = ViewerContext(user.pk)
+                cache.set(f'viewer:{user.pk}:{graph_version(user.pk)}', stale, VIEWER_CACHE_TIMEOUT)
+        assert ViewerContext.for_user(user).blocked == {other.pk}
+
+    def test_follow_status_reflects_pending_request(self, auth_client):
+        private = UsuarioFactory(privacidade_padrao=2)
+        url = reverse('user_detail', args=[private.id_usuario])
+        assert auth_client.get(url).data['follow_status'] == 'none'
+
+        auth_client.post(reverse('follow', args=[private.id_usuario]))
+        assert auth_client.get(url).data['follow_status'] == 'pending'
+
+@pytest.mark.django_db
+class TestFollowCounters:
+    def counts(self, *users):
+        return [tuple(Usuario.objects.filter(pk=u.pk).values_list('seguidores_count', 'seguindo_count').get()) for u in users]
+
+    def test_follow_unfollow_and_block_update_counters(self, auth_client, user):
+        other = UsuarioFactory()
+        auth_client.post(reverse('follow', args=[other.id_usuario]))
+        assert self.counts(user, other) == [(0, 1), (1, 0)]
+
+        auth_client.delete(reverse('follow', args=[other.id_usuario]))
+        assert self.counts(user, other) == [(0, 0), (0, 0)]
+
+        auth_client.post(reverse('follow', args=[other.id_usuario]))
+        Seguidor.objects.create(usuario_seguidor=other, usuario_seguido=user, status=1)
+        Usuario.objects.filter(pk=user.pk).update(seguidores_count=1)
+        Usuario.objects.filter(pk=other.pk).update(seguindo_count=1)
+        auth_client.post(reverse('block', args=[other.id_usuario]))
+        assert self.counts(user, other) == [(0, 0), (0, 0)]
+
+    def test_accepted_request_counts_and_pending_does_not(self, auth_client, user):
+        private = UsuarioFactory(privacidade_padrao=2)
+        auth_client.post(reverse('follow', args=[private.id_usuario]))
+        assert self.counts(private) == [(0, 0)]
+
+        private_client = APIClient()
+        private_client.force_authenticate(user=private)
+        private_client.post(reverse('follow-request-action', args=[user.id_usuario]), {'action': 'accept'})
+        assert self.counts(user, private) == [(0, 1), (1, 0)]
+
+    def test_deleting_user_releases_counters(self, auth_client, user):
+        other = UsuarioFactory()
+        auth_client.post(reverse('follow', args=[other.id_usuario]))
+        user.delete()
+        assert self.counts(other) == [(0, 0)]
+
+    def test_profile_save_does_not_clobber_counters(self, user):
+        Usuario.objects.filter(pk=user.pk).update(seguidores_count=5)
+        user.bio = 'Nova bio'
+        user.save()
+        assert self.counts(user) == [(5, 0)]
+
+    def test_serializing_users_runs_no_aggregates(self, auth_client, user):
+        with CaptureQueriesContext(connection) as ctx:
+            auth_client.get(reverse('profile'))
+        assert not any('COUNT(' in q['sql'] for q in ctx.captured_queries)
+
 @pytest.mark.django_db
 class TestComments:
     def test_create_comment(self, auth_client):
@@ -167,6 +839,124 @@ class TestComments:
         assert not dream.comentario_set.filter(id_comentario=parent_comment.id_comentario).exists()
         assert not dream.comentario_set.filter(id_comentario=reply.id_comentario).exists()
 
+    def test_replies_store_materialized_path(self):
+        root = ComentarioFactory()
+        reply = ComentarioFactory(publicacao=root.publicacao, comentario_pai=root)
+        nested = ComentarioFactory(publicacao=root.publicacao, comentario_pai=reply)
+        ComentarioFactory(publicacao=root.publicacao)  # unrelated thread
+
+        assert nested.caminho == f'{root.pk.hex}/{reply.pk.hex}/{nested.pk.hex}/'
+        assert nested.profundidade == 2
+        assert nested.raiz_id == root.pk
+        assert set(root.descendentes()) == {reply, nested}
+        assert list(reply.descendentes()) == [nested]
+
+    def test_backfill_rebuilds_paths(self):
+        import importlib
+        from django.apps import apps
+        migration = importlib.import_module('core.migrations.0009_comment_paths')
+
+        root = ComentarioFactory()
+        reply = ComentarioFactory(publicacao=root.publicacao, comentario_pai=root)
+        nested = ComentarioFactory(publicacao=root.publicacao, comentario_pai=reply)
+        expected = set(Comentario.objects.values_list('pk', 'caminho', 'profundidade'))
+        Comentario.objects.update(caminho='', profundidade=0)
+
+        migration.populate_paths(apps, None)
+        assert set(Comentario.objects.values_list('pk', 'caminho', 'profundidade')) == expected
+
+    def test_cannot_delete_comment_with_active_descendants(self, auth_client, user):
+        dream = PublicacaoFactory(usuario=user)
+        root = ComentarioFactory(publicacao=dream, usuario=user)
+        reply = ComentarioFactory(publicacao=dream, comentario_pai=root, status=2)
+        ComentarioFactory(publicacao=dream, comentario_pai=reply)
+
+        url = reverse('dream-comments-detail', args=[dream.id_publicacao, root.id_comentario])
+        assert auth_client.delete(url).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_reply_must_belong_to_same_dream(self, auth_client):
+        other = ComentarioFactory()
+        dream = PublicacaoFactory()
+        url = reverse('dream-comments-list', args=[dream.id_publicacao])
+
+        response = auth_client.post(url, {'conteudo_texto': 'oi', 'comentario_pai': other.id_comentario})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not dream.comentario_set.exists()
+
+    def test_thread_query_count_is_constant(self, auth_client, user):
+        """The list endpoint loads the whole reply tree with a fixed number of queries"""
+        dream = PublicacaoFactory(usuario=user)
+        url = reverse('dream-comments-list', args=[dream.id_publicacao])
+
+        def build_threads(n):
+            for _ in range(n):
+                root = ComentarioFactory(publicacao=dream)
+                reply = ComentarioFactory(publicacao=dream, comentario_pai=root)
+                ComentarioFactory(publicacao=dream, comentario_pai=reply, usuario=user)
+
+        build_threads(1)
+        auth_client.get(url)  # warm the viewer context cache
+        with CaptureQueriesContext(connection) as small:
+            auth_client.get(url)
+        build_threads(4)
+        with CaptureQueriesContext(connection) as large:
+            response = auth_client.get(url)
+
+        assert len(large.captured_queries) == len(small.captured_queries)
+        roots = response.data['results']
+        assert len(roots) == 5
+        leaf = roots[0]['respostas'][0]['respostas'][0]
+        assert leaf['usuario']['id_usuario'] == str(user.id_usuario)
+        assert str(leaf['replying_to']['comment_author']['id']) == roots[0]['respostas'][0]['usuario']['id_usuario']
+
+    def test_thread_marks_viewer_likes(self, auth_client, user):
+        dream = PublicacaoFactory()
+        root = ComentarioFactory(publicacao=dream)
+        reply = ComentarioFactory(publicacao=dream, comentario_pai=root)
+        ReacaoComentario.objects.create(comentario=reply, usuario=user, tipo_reacao=1)
+
+        response = auth_client.get(reverse('dream-comments-list', args=[dream.id_publicacao]))
+        root_data = response.data['results'][0]
+        assert root_data['is_liked'] is False
+        assert root_data['respostas'][0]['is_liked'] is True
+
+    def test_roots_are_cursor_paginated(self, auth_client):
+        dream = PublicacaoFactory()
+        for likes in range(5):
+            ComentarioFactory(publicacao=dream, likes_count=likes)
+        url = reverse('dream-comments-list', args=[dream.id_publicacao])
+
+        first = auth_client.get(url, {'ordering': 'likes', 'page_size': 3})
+        assert [c['likes_count'] for c in first.data['results']] == [4, 3, 2]
+        second = auth_client.get(first.data['next'])
+        assert [c['likes_count'] for c in second.data['results']] == [1, 0]
+        assert second.data['next'] is None
+
+    def test_replies_are_previewed_and_continued(self, auth_client):
+        from datetime import timedelta
+        from .serializers import REPLIES_PREVIEW
+
+        dream = PublicacaoFactory()
+        root = ComentarioFactory(publicacao=dream)
+        start = timezone.now()
+        replies = [
+            ComentarioFactory(publicacao=dream, comentario_pai=root, data_comentario=start + timedelta(seconds=i))
+            for i in range(REPLIES_PREVIEW + 2)
+        ]
+
+        response = auth_client.get(reverse('dream-comments-list', args=[dream.id_publicacao]))
+        root_data = response.data['results'][0]
+        shown = [r['id_comentario'] for r in root_data['respostas']]
+        assert shown == [str(r.id_comentario) for r in replies[:REPLIES_PREVIEW]]
+        assert root_data['respostas_next']
+
+        rest = auth_client.get(root_data['respostas_next'])
+        assert rest.status_code == status.HTTP_200_OK
+        assert [r['id_comentario'] for r in rest.data['results']] == [
+            str(r.id_comentario) for r in replies[REPLIES_PREVIEW:]
+        ]
+        assert rest.data['results'][0]['replying_to']['comment_author']['id'] == root.usuario.id_usuario
+
 @pytest.mark.django_db
 class TestFollow:
     def test_follow_user(self, auth_client, user):
@@ -177,7 +967,9 @@ class TestFollow:
         assert response.status_code == status.HTTP_200_OK
         assert Seguidor.objects.filter(usuario_seguidor=user, usuario_seguido=other_user).exists()
         
-        # Check notification
+        # Check notification (queued, then delivered by the outbox worker)
+        assert not Notificacao.objects.exists()
+        call_command('send_notifications', '--once', stdout=StringIO())
         assert Notificacao.objects.filter(usuario_destino=other_user, tipo_notificacao=4).exists()
 
     def test_cannot_follow_self(self, auth_client, user):
@@ -185,6 +977,423 @@ class TestFollow:
         response = auth_client.post(url)
         assert response.status_code == status.HTTP_400_BAD_REQUEST
 
+@pytest.mark.django_db
+class TestNotificationOutbox:
+    def test_worker_batches_preference_checks(self, user):
+        from .models import ConfiguracaoUsuario
+        from .notifications import dispatch_pending, enqueue
+
+        recipients = UsuarioFactory.create_batch(5)
+        ConfiguracaoUsuario.objects.filter(usuario=recipients[0]).update(notificacoes_reacoes=False)
+        for recipient in recipients:
+            enqueue(recipient, user, 3, conteudo='curtiu')
+            enqueue(recipient, user, 4)
+        enqueue(user, user, 3)  # never notify yourself
+
+        with CaptureQueriesContext(connection) as queries:
+            assert dispatch_pending() == (10, 9)
+        # outbox read, settings, existing ids, insert, badge and list version updates,
+        # realtime events, delete (+ savepoint)
+        assert len(queries) <= 11
+        assert not Notificacao.objects.filter(usuario_destino=recipients[0], tipo_notificacao=3).exists()
+        assert Notificacao.objects.filter(usuario_destino=recipients[0], tipo_notificacao=4).exists()
+
+    def test_crashed_batch_is_redelivered_exactly_once(self, user, monkeypatch):
+        from .models import NotificacaoPendente
+        from .notifications import dispatch_pending, enqueue
+
+        recipient = UsuarioFactory()
+        pending = enqueue(recipient, user, 4)
+
+        def crash(*args, **kwargs):
+            raise RuntimeError('worker died')
+        # Dies after inserting the notifications, before deleting the batch
+        monkeypatch.setattr(NotificacaoPendente.objects, 'filter', crash)
+        with pytest.raises(RuntimeError):
+            dispatch_pending()
+        monkeypatch.undo()
+        assert not Notificacao.objects.exists()
+
+        # A second worker that read the same row after the first one delivered it
+        Notificacao.objects.create(
+            id_notificacao=pending.pk, usuario_destino=recipient, usuario_origem=user, tipo_notificacao=4
+        )
+        assert dispatch_pending() == (1, 1)
+        assert Notificacao.objects.count() == 1
+        assert not NotificacaoPendente.objects.exists()
+
+    def test_worker_survives_database_errors(self, monkeypatch):
+        from types import SimpleNamespace
+        from django.db import OperationalError
+        from .management.commands import send_notifications
+
+        results = [OperationalError('database is locked'), (1, 1), KeyboardInterrupt()]
+        def dispatch(limit):
+            result = results.pop(0)
+            if isinstance(result, BaseException):
+                raise result
+            return result
+        monkeypatch.setattr(send_notifications, 'dispatch_pending', dispatch)
+        monkeypatch.setattr(send_notifications, 'close_old_connections', lambda: None)
+        monkeypatch.setattr(send_notifications, 'time', SimpleNamespace(sleep=lambda seconds: None))
+
+        out, err = StringIO(), StringIO()
+        call_command('send_notifications', stdout=out, stderr=err)
+        assert results == []
+        assert 'database is locked' in err.getvalue()
+        assert '1 notifications delivered' in out.getvalue()
+
+    def test_likes_coalesce_into_one_notification(self, user):
+        post = PublicacaoFactory(usuario=user)
+        likers = UsuarioFactory.create_batch(4)
+        for liker in likers:
+            client = APIClient()
+            client.force_authenticate(user=liker)
+            client.post(reverse('dreams-like', args=[post.pk]))
+            if liker == likers[0]:
+                # Unlike and like again: counted once
+                client.post(reverse('dreams-like', args=[post.pk]))
+                client.post(reverse('dreams-like', args=[post.pk]))
+        call_command('send_notifications', '--once', stdout=StringIO())
+
+        notification = Notificacao.objects.get()
+        assert notification.total_atores == 4
+        assert notification.usuario_origem == likers[-1]
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        client.patch(reverse('notifications-read-all'))
+
+        # A toggle by a recent actor later on neither counts nor re-opens it
+        toggler = APIClient()
+        toggler.force_authenticate(user=likers[1])
+        toggler.post(reverse('dreams-like', args=[post.pk]))
+        toggler.post(reverse('dreams-like', args=[post.pk]))
+        late = UsuarioFactory()
+        call_command('send_notifications', '--once', stdout=StringIO())
+        notification.refresh_from_db()
+        assert (notification.total_atores, notification.lida) == (4, True)
+
+        toggler.force_authenticate(user=late)
+        toggler.post(reverse('dreams-like', args=[post.pk]))
+        call_command('send_notifications', '--once', stdout=StringIO())
+
+        data = client.get(reverse('notifications-list')).data['results']
+        assert len(data) == 1
+        assert (data[0]['total_atores'], data[0]['lida']) == (5, False)
+        assert [a['nome_usuario'] for a in data[0]['atores_recentes']] == [
+            late.nome_usuario, likers[3].nome_usuario, likers[2].nome_usuario
+        ]
+
+    def test_actor_beyond_the_recent_ones_is_not_counted_twice(self, user):
+        from .notifications import MAX_RECENT_ACTORS, dispatch_pending, enqueue
+
+        post = PublicacaoFactory(usuario=user)
+        key = f'like:{post.pk}'
+        first, *others = UsuarioFactory.create_batch(MAX_RECENT_ACTORS + 1)
+        for actor in [first, *others]:
+            enqueue(user, actor, 3, post.pk, agrupamento=key)
+        dispatch_pending()
+        Notificacao.objects.update(lida=True)
+
+        enqueue(user, first, 3, post.pk, agrupamento=key)
+        dispatch_pending()
+        notification = Notificacao.objects.get()
+        assert str(first.pk) not in notification.atores_recentes
+        assert (notification.total_atores, notification.lida) == (MAX_RECENT_ACTORS + 1, True)
+
+    def test_coalescing_is_limited_to_the_window(self, user):
+        from .notifications import dispatch_pending, enqueue
+
+        post = PublicacaoFactory(usuario=user)
+        enqueue(user, UsuarioFactory(), 3, post.pk, agrupamento=f'like:{post.pk}')
+        dispatch_pending()
+        Notificacao.objects.update(data_criacao=timezone.now() - timezone.timedelta(days=2))
+        enqueue(user, UsuarioFactory(), 3, post.pk, agrupamento=f'like:{post.pk}')
+        enqueue(user, UsuarioFactory(), 2, post.pk)  # comments are never coalesced
+        dispatch_pending()
+        assert Notificacao.objects.count() == 3
+
+
+@pytest.mark.django_db
+class TestNotificationPages:
+    @pytest.fixture
+    def notifications(self, user):
+        actor = UsuarioFactory()
+        now = timezone.now()
+        rows = Notificacao.objects.bulk_create([
+            Notificacao(usuario_destino=user, usuario_origem=actor, tipo_notificacao=4,
+                        data_criacao=now - timezone.timedelta(minutes=i // 2))  # pairs share a timestamp
+            for i in range(60)
+        ])
+        Usuario.objects.filter(pk=user.pk).update(notificacoes_nao_lidas=60)
+        return rows
+
+    def test_pages_past_the_newest_fifty(self, auth_client, notifications):
+        seen, url = [], reverse('notifications-list')
+        while url:
+            data = auth_client.get(url).data
+            seen += [(n['data_criacao'], n['id_notificacao']) for n in data['results']]
+            url = data['next']
+        assert len(seen) == 60 and len(set(seen)) == 60
+        assert seen == sorted(seen, reverse=True)
+
+    def test_read_up_to_marks_the_cursor_and_older(self, auth_client, user, notifications):
+        page = auth_client.get(reverse('notifications-list')).data
+        newer = Notificacao.objects.create(usuario_destino=user, usuario_origem=UsuarioFactory(), tipo_notificacao=4)
+        Usuario.objects.filter(pk=user.pk).update(notificacoes_nao_lidas=61)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = auth_client.patch(reverse('notifications-read-up-to'), {'cursor': page['read_cursor']})
+        assert response.data == {'marked_read': 60}
+        assert len([q for q in queries.captured_queries if q['sql'].startswith('UPDATE "notificacoes"')]) == 1
+        assert list(Notificacao.objects.filter(lida=False)) == [newer]
+        user.refresh_from_db()
+        assert user.notificacoes_nao_lidas == 1
+
+        # Within a shared timestamp, only ids up to the cursor's
+        Notificacao.objects.update(lida=False)
+        pair = sorted(Notificacao.objects.filter(data_criacao=notifications[2].data_criacao), key=lambda n: n.pk)
+        from .pagination import encode_position
+        cursor = encode_position([pair[0].data_criacao, pair[0].pk])
+        assert auth_client.patch(reverse('notifications-read-up-to'), {'cursor': cursor}).data == {'marked_read': 57}
+
+    def test_read_up_to_rejects_bad_cursors(self, auth_client):
+        url = reverse('notifications-read-up-to')
+        assert auth_client.patch(url, {}).status_code == status.HTTP_400_BAD_REQUEST
+        assert auth_client.patch(url, {'cursor': 'not-a-cursor'}).status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_single_read_and_plain_patch(self, auth_client, notifications):
+        target = notifications[-1]
+        assert auth_client.patch(reverse('notifications-read', args=[target.pk])).status_code == status.HTTP_200_OK
+        # lida only changes through the read actions
+        other = notifications[0]
+        auth_client.patch(reverse('notifications-detail', args=[other.pk]), {'lida': True})
+        assert list(Notificacao.objects.filter(lida=True)) == [target]
+
+
+@pytest.mark.django_db
+class TestBadges:
+    def badges(self, client):
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get(reverse('badges')).data
+        assert not any('notificacoes' in q['sql'] or 'mensagens' in q['sql'] for q in queries.captured_queries)
+        return data
+
+    def test_notification_badge_follows_delivery_and_reads(self, user):
+        from .notifications import dispatch_pending, enqueue
+
+        post = PublicacaoFactory(usuario=user)
+        enqueue(user, UsuarioFactory(), 4)
+        enqueue(user, UsuarioFactory(), 3, post.pk, agrupamento=f'like:{post.pk}')
+        enqueue(user, UsuarioFactory(), 3, post.pk, agrupamento=f'like:{post.pk}')
+        dispatch_pending()
+
+        client = APIClient()
+        client.force_authenticate(user=Usuario.objects.get(pk=user.pk))
+        assert self.badges(client) == {'notificacoes': 2, 'mensagens': 0}
+
+        follow = Notificacao.objects.get(tipo_notificacao=4)
+        client.patch(reverse('notifications-read', args=[follow.pk]))
+        client.patch(reverse('notifications-read', args=[follow.pk]))  # already read
+        user.refresh_from_db()
+        assert user.notificacoes_nao_lidas == 1
+
+        client.patch(reverse('notifications-read-all'))
+        # Another like re-opens the coalesced notification
+        enqueue(user, UsuarioFactory(), 3, post.pk, agrupamento=f'like:{post.pk}')
+        dispatch_pending()
+        user.refresh_from_db()
+        assert user.notificacoes_nao_lidas == 1
+
+    def test_message_badge_follows_chat(self, user):
+        from .models import MensagemDireta
+
+        partner = UsuarioFactory()
+        sender = APIClient()
+        sender.force_authenticate(user=partner)
+        for text in ('oi', 'tudo bem?', 'sonhei com você'):
+            sender.post(reverse('chat-messages', args=[user.pk]), {'conteudo': text})
+
+        client = APIClient()
+        client.force_authenticate(user=Usuario.objects.get(pk=user.pk))
+        assert self.badges(client) == {'notificacoes': 0, 'mensagens': 3}
+
+        first = MensagemDireta.objects.order_by('data_envio').first()
+        client.patch(reverse('chat-message-read', args=[first.pk]))
+        client.patch(reverse('chat-message-read', args=[first.pk]))
+        user.refresh_from_db()
+        assert user.mensagens_nao_lidas == 2
+
+        client.get(reverse('chat-messages', args=[partner.pk]))
+        user.refresh_from_db()
+        assert user.mensagens_nao_lidas == 0
+
+    def test_recount_repairs_badges(self, user):
+        Notificacao.objects.create(usuario_destino=user, usuario_origem=UsuarioFactory(), tipo_notificacao=4)
+        call_command('recount', stdout=StringIO())
+        user.refresh_from_db()
+        assert (user.notificacoes_nao_lidas, user.mensagens_nao_lidas) == (1, 0)
+
+
+@pytest.mark.django_db
+class TestEventStream:
+    def open_stream(self, user, scenario):
+        """Run ``scenario(frames)`` against the user's open SSE stream"""
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+
+        client = APIClient()
+        client.force_authenticate(user=user)
+        ticket = client.post(reverse('events-ticket')).data['ticket']
+
+        async def run():
+            response = await AsyncClient().get(reverse('events'), {'ticket': ticket})
+            assert response['Content-Type'] == 'text/event-stream'
+            frames = aiter(response.streaming_content)
+            try:
+                return await scenario(frames)
+            finally:
+                await frames.aclose()
+        return async_to_sync(run)()
+
+    @staticmethod
+    async def next_frame(frames, *events):
+        """The next frame of one of ``events``, skipping the others"""
+        while True:
+            frame = await anext(frames)
+            if frame.split(b'\n', 1)[0] in [f'event: {event}'.encode() for event in events]:
+                return frame
+
+    def test_stream_requires_a_valid_ticket(self, user, auth_client):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+        from rest_framework_simplejwt.tokens import RefreshToken
+        from .realtime import redeem_ticket
+
+        get = async_to_sync(AsyncClient().get)
+        assert get(reverse('events')).status_code == status.HTTP_401_UNAUTHORIZED
+        assert get(reverse('events'), {'ticket': 'invalid'}).status_code == status.HTTP_401_UNAUTHORIZED
+        # Access tokens are not accepted in the URL
+        token = str(RefreshToken.for_user(user).access_token)
+        assert get(reverse('events'), {'token': token}).status_code == status.HTTP_401_UNAUTHORIZED
+
+        ticket = auth_client.post(reverse('events-ticket')).data['ticket']
+        assert redeem_ticket(ticket) == user.pk
+        assert redeem_ticket(ticket) is None  # single use
+
+    def test_stream_is_refused_under_wsgi(self, auth_client):
+        response = auth_client.get(reverse('events'))
+        assert response.status_code == status.HTTP_501_NOT_IMPLEMENTED
+
+    def test_stream_pushes_messages_and_typing(self, user, django_capture_on_commit_callbacks):
+        from asgiref.sync import sync_to_async
+
+        partner = UsuarioFactory()
+        client = APIClient()
+        client.force_authenticate(user=partner)
+
+        def chat():
+            with django_capture_on_commit_callbacks(execute=True):
+                client.post(reverse('chat-typing', args=[user.pk]))
+                client.post(reverse('chat-messages', args=[user.pk]), {'conteudo': 'sonhei com você'})
+
+        async def scenario(frames):
+            received = [await anext(frames)]
+            await sync_to_async(chat)()
+            received += [
+                await self.next_frame(frames, 'typing', 'message'),
+                await self.next_frame(frames, 'typing', 'message'),
+            ]
+            return received
+
+        badges, typing, message = (frame.decode() for frame in self.open_stream(user, scenario))
+        assert badges.startswith('event: badges\n')
+        assert typing.startswith('event: typing\n') and str(partner.pk) in typing
+        assert message.startswith('event: message\n') and 'sonhei com você' in message
+
+    def test_sender_gets_read_receipts(self, user, django_capture_on_commit_callbacks):
+        from asgiref.sync import sync_to_async
+        from .models import MensagemDireta
+
+        partner = UsuarioFactory()
+        MensagemDireta.objects.create(usuario_remetente=user, usuario_destinatario=partner, conteudo='oi')
+        client = APIClient()
+        client.force_authenticate(user=partner)
+
+        def read():
+            with django_capture_on_commit_callbacks(execute=True):
+                client.get(reverse('chat-messages', args=[user.pk]))
+
+        async def scenario(frames):
+            await anext(frames)
+            await sync_to_async(read)()
+            return await self.next_frame(frames, 'read')
+
+        frame = self.open_stream(user, scenario).decode()
+        assert frame.startswith('event: read\n') and str(partner.pk) in frame
+
+    def test_stream_pushes_notifications_delivered_by_the_worker(self, user, settings):
+        from asgiref.sync import sync_to_async
+        from .notifications import dispatch_pending, enqueue
+        settings.REALTIME_POLL_SECONDS = 0.01
+        post = PublicacaoFactory(usuario=user)
+
+        def like():
+            # The worker runs in its own process: nothing is published to the broker
+            enqueue(user, UsuarioFactory(), 3, post.pk, agrupamento=f'like:{post.pk}')
+            dispatch_pending()
+
+        async def scenario(frames):
+            await anext(frames)
+            await sync_to_async(like)()
+            received = [await self.next_frame(frames, 'notification'), await self.next_frame(frames, 'badges')]
+            await sync_to_async(like)()  # coalesced into the same notification
+            return received + [await self.next_frame(frames, 'notification')]
+
+        delivered, badges, updated = (frame.decode() for frame in self.open_stream(user, scenario))
+        notification = Notificacao.objects.get()
+        assert delivered.startswith('event: notification\n') and str(notification.pk) in delivered
+        assert badges.startswith('event: badges\n') and '"notificacoes": 1' in badges
+        assert updated.startswith('event: notification\n') and '"total_atores": 2' in updated
+
+    def test_idle_stream_reports_badge_changes(self, user, settings):
+        from asgiref.sync import sync_to_async
+        from .badges import NOTIFICATIONS, adjust_unread
+        settings.REALTIME_POLL_SECONDS = 0.01
+        settings.REALTIME_HEARTBEAT_SECONDS = 0.01
+
+        async def scenario(frames):
+            received = [await anext(frames), await anext(frames)]
+            # e.g. notifications arriving or read on another process
+            await sync_to_async(adjust_unread)(NOTIFICATIONS, {user.pk: 3})
+            while not received[-1].startswith(b'event: badges'):
+                received.append(await anext(frames))
+            return received
+
+        frames = self.open_stream(user, scenario)
+        assert frames[1] == b': keep-alive\n\n'
+        assert b'"notificacoes": 3' in frames[-1]
+
+    def test_one_outbox_read_serves_every_stream(self, user):
+        from .notifications import dispatch_pending, enqueue
+        from .realtime import NotificationFeed
+
+        recipients = UsuarioFactory.create_batch(3)
+        for recipient in recipients:
+            enqueue(recipient, user, 4)
+        dispatch_pending()
+
+        feed = NotificationFeed()
+        feed.since -= timezone.timedelta(seconds=1)
+        with CaptureQueriesContext(connection) as queries:
+            events = feed.poll([str(recipient.pk) for recipient in recipients])
+        # the outbox rows with their notifications, then the badge counters
+        assert len(queries) == 2
+        assert sorted(event for _, event, _ in events) == ['badges'] * 3 + ['notification'] * 3
+        assert feed.poll([str(recipient.pk) for recipient in recipients]) == []
+
+
 @pytest.mark.django_db
 class TestSearch:
     def test_search_posts(self, auth_client):
@@ -197,6 +1406,217 @@ class TestSearch:
         assert len(response.data['results']['posts']) == 1
         assert response.data['results']['posts'][0]['titulo'] == "Flying Dream"
 
+    def test_search_ignores_accents_and_matches_prefixes(self, auth_client):
+        PublicacaoFactory(titulo="Avião", conteudo_texto="Eu sonhei que voava")
+        PublicacaoFactory(titulo="Mar", conteudo_texto="Nadando", emocoes_sentidas="ansiedade")
+
+        def titles(q):
+            response = auth_client.get(reverse('search'), {'q': q, 'type': 'posts'})
+            return [p['titulo'] for p in response.data['results']['posts']]
+
+        assert titles('aviao') == ['Avião']
+        assert titles('sonh') == ['Avião']
+        assert titles('ANSIEDADE') == ['Mar']
+        assert titles('aviao"*)(:^') == ['Avião']  # FTS syntax in user input is inert
+
+    def test_search_index_follows_edits_and_deletes(self, auth_client):
+        post = PublicacaoFactory(titulo="Castelo", conteudo_texto="pedra")
+
+        def found(q):
+            return len(auth_client.get(reverse('search'), {'q': q}).data['results']['posts'])
+
+        post.titulo = "Floresta"
+        post.save()
+        assert found('castelo') == 0
+        assert found('floresta') == 1
+        post.delete()
+        assert found('floresta') == 0
+
+    def test_search_ranks_title_and_engagement(self, auth_client):
+        body = PublicacaoFactory(titulo="Outro", conteudo_texto="um gato preto")
+        title = PublicacaoFactory(titulo="Gato", conteudo_texto="sonho")
+        response = auth_client.get(reverse('search'), {'q': 'gato'})
+        assert [p['id_publicacao'] for p in response.data['results']['posts']] == [
+            str(title.id_publicacao), str(body.id_publicacao)
+        ]
+
+    def test_search_posts_are_cursor_paginated(self, auth_client):
+        for i in range(5):
+            PublicacaoFactory(titulo=f"Lua {i}", likes_count=i)
+
+        first = auth_client.get(reverse('search'), {'q': 'lua', 'type': 'posts', 'limit': 3})
+        assert first.data['counts']['posts'] == 3
+        second = auth_client.get(first.data['next']['posts'])
+        assert second.data['counts']['posts'] == 2
+        assert second.data['next']['posts'] is None
+        seen = [p['titulo'] for p in first.data['results']['posts'] + second.data['results']['posts']]
+        assert sorted(seen) == [f"Lua {i}" for i in range(5)]
+
+    def test_search_hides_blocked_authors(self, auth_client, user):
+        post = PublicacaoFactory(titulo="Segredo")
+        Bloqueio.objects.create(usuario=user, usuario_bloqueado=post.usuario)
+        response = auth_client.get(reverse('search'), {'q': 'segredo'})
+        assert response.data['results']['posts'] == []
+
+    def test_rebuild_search_index(self):
+        from .search import ranked_post_ids
+
+        PublicacaoFactory(titulo="Reconstruir")
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO publicacoes_fts(publicacoes_fts) VALUES ('delete-all')")
+        call_command('rebuild_search_index', stdout=StringIO())
+        assert ranked_post_ids('reconstruir')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_index_is_rebuilt_after_table_remake(self):
+        from .apps import install_search_index
+        from .search import ranked_post_ids
+
+        first = PublicacaoFactory(titulo="Primeiro")
+        survivor = PublicacaoFactory(titulo="Sobrevivente")
+        first.delete()
+        # What an AlterField on SQLite does: copy into a new table, renumbering rowids
+        with connection.schema_editor() as editor:
+            editor._remake_table(Publicacao)
+        assert ranked_post_ids('sobrevivente') == []
+
+        install_search_index(sender=None, using='default')
+        assert ranked_post_ids('sobrevivente') == [survivor.pk]
+
+    def test_typeahead_matches_normalized_prefixes(self, auth_client):
+        UsuarioFactory(nome_usuario='joao_sonhador', nome_completo='João Silva')
+        UsuarioFactory(nome_usuario='maria', nome_completo='Joana Élida')
+        HashtagFactory(texto_hashtag='JornadaOnírica')
+
+        response = auth_client.get(reverse('search-typeahead'), {'q': 'JO'})
+        assert {u['nome_usuario'] for u in response.data['users']} == {'joao_sonhador', 'maria'}
+        assert [h['texto_hashtag'] for h in response.data['hashtags']] == ['JornadaOnírica']
+
+        response = auth_client.get(reverse('search-typeahead'), {'q': 'joana eli'})
+        assert [u['nome_usuario'] for u in response.data['users']] == ['maria']
+
+        response = auth_client.get(reverse('search-typeahead'), {'q': '#jorn'})
+        assert response.data['users'] == []
+        assert len(response.data['hashtags']) == 1
+
+    def test_typeahead_ranks_by_popularity_and_hides_blocked(self, auth_client, user):
+        quiet = UsuarioFactory(nome_usuario='luna_a')
+        popular = UsuarioFactory(nome_usuario='luna_b', seguidores_count=50)
+        blocker = UsuarioFactory(nome_usuario='luna_c', seguidores_count=99)
+        Bloqueio.objects.create(usuario=blocker, usuario_bloqueado=user)
+        Seguidor.objects.create(usuario_seguidor=user, usuario_seguido=popular)
+        HashtagFactory(texto_hashtag='lunar', contagem_uso=1)
+        HashtagFactory(texto_hashtag='lua', contagem_uso=10)
+
+        response = auth_client.get(reverse('search-typeahead'), {'q': 'lu'})
+        assert [u['nome_usuario'] for u in response.data['users']] == ['luna_b', 'luna_a']
+        assert [u['is_following'] for u in response.data['users']] == [True, False]
+        assert [h['texto_hashtag'] for h in response.data['hashtags']] == ['lua', 'lunar']
+        assert quiet.nome_usuario_busca == 'luna_a'
+
+    def test_search_keys_follow_partial_saves(self, user):
+        user.nome_completo = 'Ângela Ávila'
+        user.save(update_fields=['nome_completo'])
+        user.refresh_from_db()
+        assert user.nome_completo_busca == 'angela avila'
+
+
+@pytest.mark.django_db
+class TestTrends:
+    def trends(self, client):
+        data = client.get(reverse('trends')).data
+        return ({e['nome']: e['contagem'] for e in data['emocoes']},
+                {t['nome']: t['contagem'] for t in data['tipos_sonho']})
+
+    def test_rollups_follow_creates_edits_and_deletes(self, auth_client):
+        post = PublicacaoFactory(emocoes_sentidas='😊 Feliz, 😨 Medo', tipo_sonho='Pesadelo')
+        PublicacaoFactory(emocoes_sentidas='😊 Feliz', tipo_sonho='Normal')
+        PublicacaoFactory(emocoes_sentidas='😊 Feliz', visibilidade=3)
+        assert self.trends(auth_client) == ({'Feliz': 2, 'Medo': 1}, {'Pesadelo': 1, 'Normal': 1})
+
+        post.emocoes_sentidas = '☮️ Paz'
+        post.tipo_sonho = 'Lúcido'
+        post.save()
+        assert self.trends(auth_client) == ({'Feliz': 1, 'Paz': 1}, {'Lúcido': 1, 'Normal': 1})
+
+        post.visibilidade = 2
+        post.save()
+        assert self.trends(auth_client) == ({'Feliz': 1}, {'Normal': 1})
+
+        post.visibilidade = 1
+        post.save()
+        post.delete()
+        assert self.trends(auth_client) == ({'Feliz': 1}, {'Normal': 1})
+
+    def test_trends_only_cover_the_last_30_days(self, auth_client):
+        PublicacaoFactory(tipo_sonho='Recorrente', data_publicacao=timezone.now() - timezone.timedelta(days=31))
+        PublicacaoFactory(tipo_sonho='Normal', data_publicacao=timezone.now() - timezone.timedelta(days=20))
+        assert self.trends(auth_client)[1] == {'Normal': 1}
+
+    def test_trends_read_without_scanning_posts(self, auth_client):
+        PublicacaoFactory(emocoes_sentidas='😊 Feliz')
+        with CaptureQueriesContext(connection) as queries:
+            auth_client.get(reverse('trends'))
+        assert not any('publicacoes' in q['sql'] for q in queries.captured_queries)
+
+    def test_rebuild_trends(self, auth_client):
+        from .models import TendenciaDiaria
+
+        PublicacaoFactory(emocoes_sentidas='😊 Feliz', tipo_sonho='Normal')
+        Publicacao.objects.update(tipo_sonho='Pesadelo')  # bypasses the signals
+        TendenciaDiaria.objects.filter(nome='Feliz').delete()
+        call_command('rebuild_trends', stdout=StringIO())
+        assert self.trends(auth_client) == ({'Feliz': 1}, {'Pesadelo': 1})
+
+    def hashtags(self, client):
+        return [(h['texto_hashtag'], h['uso_recente']) for h in client.get(reverse('trends')).data['hashtags']]
+
+    def test_hashtag_uses_follow_creates_and_deletes(self, auth_client):
+        for text in ('#voar #mar', '#voar'):
+            auth_client.post(reverse('dreams-list'), {'titulo': 'x', 'conteudo_texto': text, 'visibilidade': 1})
+        assert self.hashtags(auth_client) == [('voar', 2), ('mar', 1)]
+
+        Publicacao.objects.filter(conteudo_texto='#voar #mar').delete()
+        assert self.hashtags(auth_client) == [('voar', 1)]
+
+    def test_hashtags_trend_by_velocity_not_all_time_use(self, auth_client):
+        from .factories import HashtagFactory
+        from .models import UsoHashtagHora
+        from .trends import hour_of
+
+        now = hour_of(timezone.now())
+        old = HashtagFactory(texto_hashtag='sonho', contagem_uso=500)
+        rising = HashtagFactory(texto_hashtag='eclipse', contagem_uso=4)
+        for hours_ago in range(6, 150, 6):
+            UsoHashtagHora.objects.create(hashtag=old, hora=now - timezone.timedelta(hours=hours_ago), contagem=5)
+        UsoHashtagHora.objects.create(hashtag=old, hora=now, contagem=3)  # used, but below its usual rate
+        UsoHashtagHora.objects.create(hashtag=rising, hora=now, contagem=4)
+        UsoHashtagHora.objects.create(
+            hashtag=rising, hora=now - timezone.timedelta(days=8), contagem=50
+        )  # past the retention period
+
+        call_command('rank_hashtags', stdout=StringIO())
+        assert self.hashtags(auth_client) == [('eclipse', 4)]
+        assert not UsoHashtagHora.objects.filter(hora__lt=now - timezone.timedelta(days=7)).exists()
+
+    def test_rank_hashtags_backfill(self, auth_client):
+        auth_client.post(reverse('dreams-list'), {'titulo': 'x', 'conteudo_texto': '#lua', 'visibilidade': 1})
+        from .models import UsoHashtagHora
+        UsoHashtagHora.objects.all().delete()
+
+        call_command('rank_hashtags', '--backfill', stdout=StringIO())
+        assert self.hashtags(auth_client) == [('lua', 1)]
+
+    def test_stale_trending_list_is_ignored(self, auth_client):
+        from .models import HashtagEmAlta
+        auth_client.post(reverse('dreams-list'), {'titulo': 'x', 'conteudo_texto': '#lua', 'visibilidade': 1})
+        call_command('rank_hashtags', stdout=StringIO())
+        HashtagEmAlta.objects.update(data_calculo=timezone.now() - timezone.timedelta(days=1))
+        auth_client.post(reverse('dreams-list'), {'titulo': 'x', 'conteudo_texto': '#sol #sol', 'visibilidade': 1})
+        auth_client.post(reverse('dreams-list'), {'titulo': 'x', 'conteudo_texto': '#sol', 'visibilidade': 1})
+
+        assert self.hashtags(auth_client) == [('sol', 2), ('lua', 1)]
+
 
 @pytest.mark.django_db
 class TestSettings:
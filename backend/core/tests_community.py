@@ -99,3 +99,52 @@ class TestCommunityFeatures:
         
         assert response.data['total_members'] == 2
         assert response.data['new_members_last_7_days'] == 2
+
+    def test_member_counter_follows_memberships(self, auth_client):
+        from io import StringIO
+        from django.core.management import call_command
+
+        client, user = auth_client
+        community = Comunidade.objects.create(nome='Counter Community', descricao='Counting')
+        response = client.post(reverse('communities-join', args=[community.id_comunidade]))
+        assert response.data['membros_count'] == 1
+
+        other = UsuarioFactory(nome_usuario='other', email='other@test.com')
+        MembroComunidade.objects.create(comunidade=community, usuario=other)
+        other.delete()
+        community.refresh_from_db()
+        assert community.membros_count == 1
+
+        Comunidade.objects.filter(pk=community.pk).update(membros_count=42)
+        call_command('recount', stdout=StringIO())
+        community.refresh_from_db()
+        assert community.membros_count == 1
+
+        response = client.post(reverse('communities-leave', args=[community.id_comunidade]))
+        assert response.data['membros_count'] == 0
+
+    def test_list_query_count_is_constant(self, auth_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        client, user = auth_client
+        url = reverse('communities-list')
+
+        def add_communities(n):
+            for _ in range(n):
+                community = Comunidade.objects.create(nome=f'Community {Comunidade.objects.count()}', descricao='x')
+                MembroComunidade.objects.create(comunidade=community, usuario=UsuarioFactory(), role='admin')
+                MembroComunidade.objects.create(comunidade=community, usuario=user, role='moderator')
+
+        add_communities(1)
+        with CaptureQueriesContext(connection) as small:
+            client.get(url)
+        add_communities(5)
+        with CaptureQueriesContext(connection) as large:
+            response = client.get(url)
+
+        assert len(large.captured_queries) == len(small.captured_queries)
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        assert len(results) == 6
+        assert all(c['is_moderator'] and not c['is_admin'] and c['membros_count'] == 2 for c in results)
+        assert all(len(c['moderators']) == 2 for c in results)
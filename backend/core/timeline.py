@@ -0,0 +1,194 @@
+"""
+Fan-out-on-write home timeline for the 'following' tab.
+
+When a dream is published its id is pushed into the timeline of the author
+and of every active follower, so reading the feed is an indexed range scan
+over ``timeline`` instead of rebuilding it from the follow graph on every
+request. Authors with more followers than TIMELINE_CELEBRITY_THRESHOLD are
+not fanned out; their posts are merged in at read time instead.
+
+Each timeline carries a version token in the cache, changed wherever its
+rows change (fan-out, resync, backfill, removal, post deletion), so the
+feed's ETag (see core/feed_cache.py) is a key lookup rather than an
+aggregate over the timeline. A celebrity's own token doubles as the token
+of the posts their followers merge in. Authors deactivating and in-place
+edits are not tracked; the ETag's FEED_CACHE_TTL bucket bounds those.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from .models import EntradaTimeline, Publicacao, Seguidor, Usuario
+
+CELEBRITY_CACHE_KEY = 'timeline:celebrities'
+CELEBRITY_CACHE_TIMEOUT = 600  # 10 minutes
+
+# Public and followers-only posts reach followers; private posts stay with the author
+FANOUT_VISIBILITIES = (1, 2)
+
+
+def celebrity_threshold():
+    return getattr(settings, 'TIMELINE_CELEBRITY_THRESHOLD', 5000)
+
+
+def celebrity_ids():
+    """IDs of authors above the follower threshold (cached)"""
+    ids = cache.get(CELEBRITY_CACHE_KEY)
+    if ids is None:
+        ids = set(
+            Usuario.objects.filter(
+                seguidores_count__gt=celebrity_threshold()
+            ).values_list('id_usuario', flat=True)
+        )
+        cache.set(CELEBRITY_CACHE_KEY, ids, CELEBRITY_CACHE_TIMEOUT)
+    return ids
+
+
+def _version_key(user_id):
+    return f'timeline:{user_id}:version'
+
+
+def timeline_versions(user_ids):
+    """Current version token of each user's timeline, in order"""
+    keys = [_version_key(user_id) for user_id in user_ids]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        found.update(cache.get_many(missing))
+    return [found.get(key) for key in keys]
+
+
+def _bump(user_ids):
+    cache.set_many({_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+
+
+def bump_timeline_versions(user_ids):
+    """
+    Change the version of the users' timelines, right away and again once
+    the write commits, like viewer.bump_graph_version
+    """
+    user_ids = set(user_ids)
+    if user_ids:
+        _bump(user_ids)
+        transaction.on_commit(lambda: _bump(user_ids))
+
+
+def _entry(usuario_id, post):
+    return EntradaTimeline(
+        usuario_id=usuario_id,
+        publicacao=post,
+        autor_id=post.usuario_id,
+        data_publicacao=post.data_publicacao,
+    )
+
+
+def fan_out_post(post):
+    """Push a new post into its author's timeline and its followers' timelines"""
+    entries = [_entry(post.usuario_id, post)]
+
+    if post.visibilidade in FANOUT_VISIBILITIES:
+        follower_count = Usuario.objects.filter(pk=post.usuario_id).values_list('seguidores_count', flat=True).get()
+        if follower_count > celebrity_threshold():
+            # Read-time path; make sure readers see this author as a celebrity now
+            if post.usuario_id not in celebrity_ids():
+                cache.delete(CELEBRITY_CACHE_KEY)
+        else:
+            follower_ids = Seguidor.objects.filter(
+                usuario_seguido_id=post.usuario_id, status=1
+            ).values_list('usuario_seguidor_id', flat=True)
+            entries += [_entry(follower_id, post) for follower_id in follower_ids]
+
+    EntradaTimeline.objects.bulk_create(entries, batch_size=500, ignore_conflicts=True)
+    bump_timeline_versions(entry.usuario_id for entry in entries)
+
+
+def resync_post(post):
+    """Re-apply fan-out after an edit that may have changed the post's visibility"""
+    if post.visibilidade in FANOUT_VISIBILITIES:
+        fan_out_post(post)
+    else:
+        entries = EntradaTimeline.objects.filter(publicacao=post).exclude(usuario_id=post.usuario_id)
+        bump_timeline_versions([post.usuario_id, *entries.values_list('usuario_id', flat=True)])
+        entries.delete()
+
+
+def release_post(post):
+    """A post is being deleted: its entries cascade, so change those timelines' versions"""
+    bump_timeline_versions([
+        post.usuario_id,
+        *EntradaTimeline.objects.filter(publicacao=post).values_list('usuario_id', flat=True)
+    ])
+
+
+def backfill_author(follower, author, limit=None):
+    """Copy an author's recent posts into a new follower's timeline"""
+    if author.pk in celebrity_ids():
+        return
+    if limit is None:
+        limit = getattr(settings, 'TIMELINE_BACKFILL_LIMIT', 200)
+
+    posts = Publicacao.objects.filter(
+        usuario=author,
+        visibilidade__in=FANOUT_VISIBILITIES
+    ).only('id_publicacao', 'usuario', 'data_publicacao').order_by('-data_publicacao')[:limit]
+
+    EntradaTimeline.objects.bulk_create(
+        [_entry(follower.pk, post) for post in posts],
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    bump_timeline_versions([follower.pk])
+
+
+def remove_author(follower, author):
+    """Drop an author's posts from a follower's timeline (unfollow, block)"""
+    EntradaTimeline.objects.filter(usuario=follower, autor=author).delete()
+    bump_timeline_versions([follower.pk])
+
+
+def followed_celebrities(user):
+    """IDs of the celebrities the user follows; no query while there are none"""
+    celebrities = celebrity_ids()
+    if not celebrities:
+        return []
+    return list(
+        Seguidor.objects.filter(
+            usuario_seguidor=user,
+            usuario_seguido__in=celebrities,
+            status=1
+        ).values_list('usuario_seguido_id', flat=True)
+    )
+
+
+def following_version(user):
+    """Version of the user's 'following' tab: their timeline and the celebrities they merge in"""
+    return tuple(timeline_versions([user.pk, *followed_celebrities(user)]))
+
+
+def following_feed(user):
+    """
+    Queryset for the 'following' tab.
+
+    Normally the user's timeline rows themselves, ordered by their own
+    data_publicacao so each keyset page is one range scan of
+    timeline_usuario_data_idx; the posts are joined in per row. Posts from
+    followed celebrities were never fanned out, so then the feed is read
+    from publicacoes with those authors OR-ed in.
+    """
+    celebrities = followed_celebrities(user)
+    if not celebrities:
+        return EntradaTimeline.objects.filter(
+            usuario=user,
+            autor__status=1
+        ).select_related('publicacao__usuario', 'publicacao__comunidade').order_by('-data_publicacao')
+
+    return Publicacao.objects.filter(
+        Q(id_publicacao__in=EntradaTimeline.objects.filter(usuario=user).values('publicacao_id')) |
+        Q(usuario__in=celebrities, visibilidade__in=FANOUT_VISIBILITIES),
+        usuario__status=1
+    ).order_by('-data_publicacao')
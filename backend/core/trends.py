@@ -0,0 +1,279 @@
+"""
+Rollups behind the Explore page trends.
+
+Emotions and dream types: every public post counts once per day bucket
+(``tendencias_diarias``) for each emotion it lists and for its dream type.
+Publicacao signals (see the end of models.py) apply the difference between a
+post's old and new buckets whenever it is created, edited or deleted, so
+TrendView only sums the last TREND_DAYS rows per name instead of parsing
+every recent post. ``manage.py rebuild_trends`` recomputes the buckets from
+the posts table, for the initial backfill or to repair drift after bulk
+``update()`` calls, which bypass the signals.
+
+Hashtags: uses are counted per hour (``hashtags_uso_horario``) when a post
+is created and taken back when it is deleted; buckets older than the
+retention period are pruned. A tag an edit removes and a later edit puts
+back goes back into the hour it was first counted in, so editing posts
+cannot push a tag up the list. ``manage.py rank_hashtags --loop`` (the
+``trending`` service in docker-compose) scores each hashtag's recent window
+against its own baseline every few minutes and stores the top ones in
+``hashtags_em_alta``, so a tag trends while it is gaining uses, not forever
+because of its all-time count. A stored list older than the recent window is
+ignored and the hashtags are scored on the fly instead.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from .models import Hashtag, HashtagEmAlta, Publicacao, PublicacaoHashtag, TendenciaDiaria, UsoHashtagHora
+
+TREND_DAYS = 30
+TRENDING_HASHTAGS = 15
+
+EMOCAO = 1
+TIPO_SONHO = 2
+
+# Valid options must match CreateDreamModal.jsx exactly
+VALID_DREAM_TYPES = {'Lúcido', 'Normal', 'Pesadelo', 'Recorrente'}
+VALID_EMOTIONS = {'Feliz', 'Medo', 'Surpresa', 'Triste', 'Raiva', 'Confuso', 'Paz', 'Êxtase'}
+
+# Publicacao fields the buckets depend on, in post_trend_keys() argument order
+TREND_FIELDS = ('visibilidade', 'data_publicacao', 'emocoes_sentidas', 'tipo_sonho')
+
+
+def post_trend_keys(visibilidade, data_publicacao, emocoes, tipo):
+    """Counter of the (dia, categoria, nome) buckets one post counts towards"""
+    keys = Counter()
+    if visibilidade != 1:  # Only public posts
+        return keys
+
+    dia = timezone.localdate(data_publicacao)
+    # emocoes_sentidas is comma-separated, each value stored as "😊 Feliz"
+    for emo in (emocoes or '').split(','):
+        parts = emo.strip().split(' ', 1)
+        keyword = parts[-1]
+        if keyword in VALID_EMOTIONS:
+            keys[(dia, EMOCAO, keyword)] += 1
+    if tipo and tipo.strip() in VALID_DREAM_TYPES:
+        keys[(dia, TIPO_SONHO, tipo.strip())] += 1
+    return keys
+
+
+def trend_keys(post):
+    return post_trend_keys(*(getattr(post, field) for field in TREND_FIELDS))
+
+
+def stored_trend_keys(post):
+    """Buckets of the post as currently saved, before an edit is written"""
+    if post._state.adding:
+        return Counter()
+    row = Publicacao.objects.filter(pk=post.pk).values_list(*TREND_FIELDS).first()
+    return post_trend_keys(*row) if row else Counter()
+
+
+def apply_trend_delta(new, old):
+    """Move a post's counts from its ``old`` buckets to its ``new`` ones"""
+    delta = Counter(new)
+    delta.subtract(old or Counter())
+    for (dia, categoria, nome), change in delta.items():
+        if change:
+            _increment(TendenciaDiaria, change, dia=dia, categoria=categoria, nome=nome)
+
+
+def _increment(model, change, **bucket):
+    """Add ``change`` to the ``contagem`` of a bucket row, creating it if needed"""
+    rows = model.objects.filter(**bucket)
+    if rows.update(contagem=F('contagem') + change) or change < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(contagem=change, **bucket)
+    except IntegrityError:
+        # Another request created the bucket first
+        rows.update(contagem=F('contagem') + change)
+
+
+def first_trend_day(days=TREND_DAYS):
+    return timezone.localdate() - timedelta(days=days - 1)
+
+
+def trending(categoria, limit, days=TREND_DAYS):
+    """Most used names of ``categoria`` over the last ``days`` days, today included"""
+    totals = TendenciaDiaria.objects.filter(
+        categoria=categoria, dia__gte=first_trend_day(days)
+    ).values('nome').annotate(total=Sum('contagem')).filter(total__gt=0).order_by('-total', 'nome')
+    return [{'nome': row['nome'], 'contagem': row['total']} for row in totals[:limit]]
+
+
+def rebuild_trends(days=None):
+    """
+    Recount the buckets from the posts table: all of them, or only the last
+    ``days`` days. Returns the number of buckets written.
+    """
+    posts = Publicacao.objects.filter(visibilidade=1)
+    buckets = TendenciaDiaria.objects.all()
+    if days:
+        since = first_trend_day(days)
+        posts = posts.filter(data_publicacao__date__gte=since)
+        buckets = buckets.filter(dia__gte=since)
+
+    totals = Counter()
+    for row in posts.values_list(*TREND_FIELDS).iterator(chunk_size=2000):
+        totals.update(post_trend_keys(*row))
+
+    rows = [
+        TendenciaDiaria(dia=dia, categoria=categoria, nome=nome, contagem=count)
+        for (dia, categoria, nome), count in totals.items()
+    ]
+    with transaction.atomic():
+        buckets.delete()
+        TendenciaDiaria.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def hashtag_window_hours():
+    return getattr(settings, 'HASHTAG_TRENDING_WINDOW_HOURS', 6)
+
+
+def hashtag_retention_hours():
+    return getattr(settings, 'HASHTAG_TRENDING_RETENTION_HOURS', 7 * 24)
+
+
+def hashtag_rebuild_seconds():
+    return getattr(settings, 'HASHTAG_TRENDING_REBUILD_SECONDS', 300)
+
+
+def hour_of(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def count_hashtag_uses(hashtag_ids, when=None):
+    """Count one use of each hashtag in the hour of ``when`` (default: now)"""
+    hashtag_ids = set(hashtag_ids)
+    if not hashtag_ids:
+        return
+    hora = hour_of(when or timezone.now())
+    UsoHashtagHora.objects.bulk_create(
+        [UsoHashtagHora(hashtag_id=hashtag_id, hora=hora) for hashtag_id in hashtag_ids],
+        ignore_conflicts=True
+    )
+    UsoHashtagHora.objects.filter(hora=hora, hashtag_id__in=hashtag_ids).update(contagem=F('contagem') + 1)
+
+
+def uncount_hashtag_uses(uses):
+    """Take ``(hashtag_id, data_associacao)`` uses back out of the hours they were counted in"""
+    by_hour = defaultdict(set)
+    for hashtag_id, when in uses:
+        by_hour[hour_of(when)].add(hashtag_id)
+    for hora, hashtag_ids in by_hour.items():
+        UsoHashtagHora.objects.filter(hora=hora, hashtag_id__in=hashtag_ids).update(contagem=F('contagem') - 1)
+
+
+def restore_hashtag_uses(uses):
+    """Count ``(hashtag_id, data_associacao)`` uses again in their own hours, unless already pruned"""
+    since = hour_of(timezone.now()) - timedelta(hours=hashtag_retention_hours() - 1)
+    by_hour = defaultdict(set)
+    for hashtag_id, when in uses:
+        if hour_of(when) >= since:
+            by_hour[hour_of(when)].add(hashtag_id)
+    for hora, hashtag_ids in by_hour.items():
+        count_hashtag_uses(hashtag_ids, hora)
+
+
+def hashtag_score(recent, total, window_hours=None, retention_hours=None):
+    """
+    How far a hashtag runs above its own baseline: uses in the recent window
+    minus the uses expected there at the rate of the rest of the retention
+    period, scaled by the Poisson noise of that expectation
+    """
+    window_hours = window_hours or hashtag_window_hours()
+    retention_hours = retention_hours or hashtag_retention_hours()
+    expected = (total - recent) * window_hours / max(retention_hours - window_hours, 1)
+    return (recent - expected) / math.sqrt(expected + 1)
+
+
+def score_hashtags(now=None, limit=TRENDING_HASHTAGS):
+    """``(hashtag_id, score, recent_uses)`` of the top hashtags, best first"""
+    now = hour_of(now or timezone.now())
+    window, retention = hashtag_window_hours(), hashtag_retention_hours()
+    # Both periods end with the current hour
+    window_start = now - timedelta(hours=window - 1)
+    since = now - timedelta(hours=retention - 1)
+
+    usage = UsoHashtagHora.objects.filter(hora__gte=since).values('hashtag').annotate(
+        recent=Sum('contagem', filter=Q(hora__gte=window_start)),
+        total=Sum('contagem'),
+    ).filter(recent__gt=0)
+    scored = [
+        (row['hashtag'], hashtag_score(row['recent'], row['total'], window, retention), row['recent'])
+        for row in usage
+    ]
+    return heapq.nlargest(limit, (row for row in scored if row[1] > 0), key=lambda row: row[1])
+
+
+def rebuild_trending_hashtags(now=None):
+    """Prune expired hourly buckets and replace the trending hashtag table"""
+    now = now or timezone.now()
+    UsoHashtagHora.objects.filter(
+        hora__lt=hour_of(now) - timedelta(hours=hashtag_retention_hours() - 1)
+    ).delete()
+    rows = [
+        HashtagEmAlta(hashtag_id=hashtag_id, pontuacao=score, uso_recente=recent, data_calculo=now)
+        for hashtag_id, score, recent in score_hashtags(now)
+    ]
+    with transaction.atomic():
+        HashtagEmAlta.objects.all().delete()
+        HashtagEmAlta.objects.bulk_create(rows)
+    return len(rows)
+
+
+def rebuild_hashtag_buckets(now=None):
+    """Recount the hourly buckets of the retention period from publicacao_hashtags"""
+    now = now or timezone.now()
+    since = hour_of(now) - timedelta(hours=hashtag_retention_hours() - 1)
+    totals = Counter(
+        (hashtag_id, hour_of(when))
+        for hashtag_id, when in PublicacaoHashtag.objects.filter(
+            data_associacao__gte=since
+        ).values_list('hashtag_id', 'data_associacao').iterator(chunk_size=2000)
+    )
+    with transaction.atomic():
+        UsoHashtagHora.objects.all().delete()
+        UsoHashtagHora.objects.bulk_create([
+            UsoHashtagHora(hashtag_id=hashtag_id, hora=hora, contagem=count)
+            for (hashtag_id, hora), count in totals.items()
+        ], batch_size=500)
+    return len(totals)
+
+
+def trending_hashtags(limit=TRENDING_HASHTAGS):
+    """
+    The stored trending list; scored on the fly from the hourly buckets
+    while ``rank_hashtags`` has not produced one within the recent window
+    """
+    fresh_since = timezone.now() - timedelta(hours=hashtag_window_hours())
+    ranked = [
+        (row.hashtag, row.uso_recente)
+        for row in HashtagEmAlta.objects.filter(
+            data_calculo__gte=fresh_since
+        ).select_related('hashtag').order_by('-pontuacao')[:limit]
+    ]
+    if not ranked:
+        scored = score_hashtags(limit=limit)
+        hashtags = Hashtag.objects.in_bulk([hashtag_id for hashtag_id, _, _ in scored])
+        ranked = [(hashtags[hashtag_id], recent) for hashtag_id, _, recent in scored if hashtag_id in hashtags]
+    return [
+        {
+            'id_hashtag': hashtag.id_hashtag,
+            'texto_hashtag': hashtag.texto_hashtag,
+            'contagem_uso': hashtag.contagem_uso,
+            'uso_recente': recent,
+        }
+        for hashtag, recent in ranked
+    ]
@@ -5,14 +5,14 @@ from .views import (
     RegisterView, UserProfileView, UserDetailView, LogoutView, 
     RequestPasswordResetCodeView, VerifyAndResetPasswordView,
     AvatarUploadView, PublicacaoViewSet, FollowView, SuggestedUsersView, 
-    ComentarioViewSet, NotificacaoViewSet, SearchView, CustomTokenObtainPairView,
+    ComentarioViewSet, NotificacaoViewSet, SearchView, TypeaheadView, CustomTokenObtainPairView,
     GoogleLoginView,
     AdminStatsView, AdminUsersView, AdminUserDetailView, AdminReportsView, AdminReportActionView,
     CreateReportView, UserSettingsView, CloseFriendsManagerView, ToggleCloseFriendView,
     FollowRequestsView, FollowRequestActionView, ComunidadeViewSet, RascunhoViewSet,
-    BlockView, MuteView, TrendView, TopCommunityPostsView,
+    BlockView, MuteView, TrendView, HashtagDreamsView, TopCommunityPostsView, ImpressionsView,
     UserFollowersView, UserFollowingView,
-    ConversationListView, ChatView, MessageReadView
+    ConversationListView, ChatView, MessageReadView, TypingView, BadgesView, EventStreamView, EventTicketView
 )
 
 # Router for ViewSets
@@ -27,6 +27,7 @@ router.register(r'drafts', RascunhoViewSet, basename='drafts')
 comments_list = ComentarioViewSet.as_view({'get': 'list', 'post': 'create'})
 comments_detail = ComentarioViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'})
 comments_react = ComentarioViewSet.as_view({'post': 'react'})
+comments_replies = ComentarioViewSet.as_view({'get': 'replies'})
 
 urlpatterns = [
     # Auth endpoints
@@ -42,6 +43,7 @@ urlpatterns = [
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('users/suggested/', SuggestedUsersView.as_view(), name='suggested_users'),
     path('search/', SearchView.as_view(), name='search'),
+    path('search/typeahead/', TypeaheadView.as_view(), name='search-typeahead'),
     path('users/<uuid:pk>/', UserDetailView.as_view(), name='user_detail'),
     path('users/avatar/', AvatarUploadView.as_view(), name='avatar_upload'),
     
@@ -60,6 +62,7 @@ urlpatterns = [
     path('dreams/<uuid:dream_pk>/comments/', comments_list, name='dream-comments-list'),
     path('dreams/<uuid:dream_pk>/comments/<uuid:pk>/', comments_detail, name='dream-comments-detail'),
     path('dreams/<uuid:dream_pk>/comments/<uuid:pk>/react/', comments_react, name='dream-comments-react'),
+    path('dreams/<uuid:dream_pk>/comments/<uuid:pk>/replies/', comments_replies, name='dream-comments-replies'),
     
     # Admin endpoints - Issue #29
     path('admin/stats/', AdminStatsView.as_view(), name='admin-stats'),
@@ -76,14 +79,22 @@ urlpatterns = [
     path('friends/manage/', CloseFriendsManagerView.as_view(), name='close-friends-manage'),
     path('friends/toggle/<uuid:pk>/', ToggleCloseFriendView.as_view(), name='close-friends-toggle'),
     
+    # Impressions (views_count)
+    path('impressions/', ImpressionsView.as_view(), name='impressions'),
+    
     # Explore page endpoints
     path('trends/', TrendView.as_view(), name='trends'),
+    path('hashtags/<str:texto>/dreams/', HashtagDreamsView.as_view(), name='hashtag-dreams'),
     path('communities/top-posts/', TopCommunityPostsView.as_view(), name='community-top-posts'),
     
     # Chat / Direct Messages endpoints
     path('chat/conversations/', ConversationListView.as_view(), name='chat-conversations'),
     path('chat/messages/<uuid:pk>/', ChatView.as_view(), name='chat-messages'),
     path('chat/messages/<uuid:pk>/read/', MessageReadView.as_view(), name='chat-message-read'),
+    path('chat/typing/<uuid:pk>/', TypingView.as_view(), name='chat-typing'),
+    path('badges/', BadgesView.as_view(), name='badges'),
+    path('events/', EventStreamView.as_view(), name='events'),
+    path('events/ticket/', EventTicketView.as_view(), name='events-ticket'),
     
     # Include router URLs (dreams CRUD + notifications)
     path('', include(router.urls)),
@@ -0,0 +1,187 @@
+"""
+Relationship context of the requesting user ("viewer").
+
+Feeds and privacy checks all need the same handful of id sets: who the
+viewer follows, who they have blocked, who blocked them, and so on. They are
+loaded once per request with four queries and cached across requests under
+a per-user graph version. Signals in models.py bump that version whenever a
+Seguidor, Bloqueio or Silenciamento row touching the user changes, so a
+cached context is never served after the graph it was built from changed.
+Blocks and privacy are enforced from these sets, so the cache must be shared
+by every process serving requests (see CACHES in settings).
+
+The viewer's community roles are only memoized per request (community_roles).
+"""
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+VIEWER_CACHE_TIMEOUT = 600  # 10 minutes
+
+
+def _version_key(user_id):
+    return f'viewer:{user_id}:version'
+
+
+def graph_version(user_id):
+    """Opaque token that changes whenever the user's relationships change"""
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(user_ids):
+    cache.set_many({_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+
+
+def bump_graph_version(*user_ids):
+    """
+    Invalidate the cached context of every given user: right away, so the
+    writing request sees its own change, and again once the write commits,
+    since a concurrent request may have cached the pre-commit rows in between
+    """
+    _bump(user_ids)
+    transaction.on_commit(lambda: _bump(user_ids))
+
+
+class ViewerContext:
+    """In-memory relationship sets of one user, as seen from that user"""
+
+    FIELDS = ('following', 'pending', 'close_friend_of', 'close_friends', 'blocked', 'blocked_by', 'muted')
+
+    def __init__(self, user_id, **sets):
+        self.user_id = user_id
+        for name in self.FIELDS:
+            setattr(self, name, frozenset(sets.get(name, ())))
+
+    @classmethod
+    def load(cls, user_id):
+        from .models import Seguidor, Bloqueio, Silenciamento
+
+        sets = {name: set() for name in cls.FIELDS}
+        outgoing = Seguidor.objects.filter(
+            usuario_seguidor_id=user_id, status__in=[1, 3]
+        ).values_list('usuario_seguido_id', 'status', 'is_close_friend')
+        for followed_id, follow_status, close_friend in outgoing:
+            if follow_status == 3:
+                sets['pending'].add(followed_id)
+                continue
+            sets['following'].add(followed_id)
+            if close_friend:
+                # The followed user marked the viewer as a close friend
+                sets['close_friend_of'].add(followed_id)
+
+        sets['close_friends'] = set(Seguidor.objects.filter(
+            usuario_seguido_id=user_id, status=1, is_close_friend=True
+        ).values_list('usuario_seguidor_id', flat=True))
+
+        blocks = Bloqueio.objects.filter(
+            Q(usuario_id=user_id) | Q(usuario_bloqueado_id=user_id)
+        ).values_list('usuario_id', 'usuario_bloqueado_id')
+        for blocker_id, blocked_id in blocks:
+            if blocker_id == user_id:
+                sets['blocked'].add(blocked_id)
+            else:
+                sets['blocked_by'].add(blocker_id)
+
+        sets['muted'] = set(Silenciamento.objects.filter(
+            usuario_id=user_id
+        ).values_list('usuario_silenciado_id', flat=True))
+        return cls(user_id, **sets)
+
+    @classmethod
+    def for_user(cls, user):
+        """Cached context for ``user``, rebuilt when their graph version changes"""
+        key = f'viewer:{user.pk}:{graph_version(user.pk)}'
+        context = cache.get(key)
+        if context is None:
+            context = cls.load(user.pk)
+            cache.set(key, context, VIEWER_CACHE_TIMEOUT)
+        return context
+
+    @classmethod
+    def for_request(cls, request):
+        """Context of the requesting user, loaded at most once per request"""
+        context = getattr(request, '_viewer_context', None)
+        if context is None:
+            context = cls.for_user(request.user)
+            request._viewer_context = context
+        return context
+
+    def is_self(self, user_id):
+        return user_id == self.user_id
+
+    def is_blocked_either_way(self, user_id):
+        return user_id in self.blocked or user_id in self.blocked_by
+
+    def follow_status(self, user_id):
+        """'following', 'pending' or 'none' ('None' for the viewer themself)"""
+        if self.is_self(user_id):
+            return None
+        if user_id in self.following:
+            return 'following'
+        if user_id in self.pending:
+            return 'pending'
+        return 'none'
+
+    def can_see_account(self, user):
+        """Public accounts, the viewer's own and private accounts they follow"""
+        return user.privacidade_padrao != 2 or self.is_self(user.pk) or user.pk in self.following
+
+    def author_filter(self, field='usuario'):
+        """
+        Active authors the viewer has not blocked, whose account is public,
+        followed by the viewer, or the viewer's own.
+        """
+        return (
+            Q(**{f'{field}__status': 1}) &
+            ~Q(**{f'{field}__in': self.blocked}) &
+            (
+                Q(**{f'{field}__privacidade_padrao': 1}) |
+                Q(**{f'{field}__in': self.following}) |
+                Q(**{field: self.user_id})
+            )
+        )
+
+    def visibility_filter(self, field='usuario', visibility_field='visibilidade'):
+        """
+        Post visibility rules:
+        1: Public -> Visible to all who pass author_filter
+        2: Close Friends/Followers -> Visible if the viewer follows the author
+        3: Private -> Only visible to the author
+        """
+        return (
+            Q(**{visibility_field: 1}) |
+            (Q(**{visibility_field: 2}) & Q(**{f'{field}__in': self.following})) |
+            Q(**{field: self.user_id})
+        )
+
+
+def community_roles(request, community_ids):
+    """
+    The requesting user's role in each community (``None`` when not a
+    member). Roles are loaded with one query for all ids not seen yet and
+    memoized on the request, so serializers and permission checks share them.
+    """
+    from .models import MembroComunidade
+
+    known = getattr(request, '_community_roles', None)
+    if known is None:
+        known = request._community_roles = {}
+    missing = [pk for pk in community_ids if pk not in known]
+    if missing:
+        roles = dict(MembroComunidade.objects.filter(
+            usuario=request.user, comunidade__in=missing
+        ).values_list('comunidade_id', 'role'))
+        for pk in missing:
+            known[pk] = roles.get(pk)
+    return {pk: known[pk] for pk in community_ids}
+
+
+def community_role(request, community):
+    return community_roles(request, [community.pk])[community.pk]
@@ -5,7 +5,7 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.shortcuts import get_object_or_404
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
 from django.utils.translation import gettext as _
 import os
 import uuid
@@ -26,6 +26,8 @@ class SearchView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get(self, request):
+        from .models import prefix_range, search_key
+
         query = request.query_params.get('q', '').strip()
         search_type = request.query_params.get('type', 'all')
         limit = int(request.query_params.get('limit', 20))
@@ -35,17 +37,23 @@ class SearchView(APIView):
 
         results = {}
         counts = {}
+        next_pages = {}
 
-        # Search Posts
+        # Search Posts: full-text ranked (core/search.py), cursor-paginated
         if search_type in ['all', 'posts']:
-            posts = Publicacao.objects.filter(
-                models.Q(conteudo_texto__icontains=query) | models.Q(titulo__icontains=query),
-                visibilidade=1  # Only public posts
-            ).annotate(
-                engagement=Count('reacaopublicacao', distinct=True) + Count('comentario', distinct=True)
-            ).order_by('-engagement')[:limit]
-            results['posts'] = PublicacaoSerializer(posts, many=True, context={'request': request}).data
+            from .pagination import RankedListPagination
+            from .search import PostSearch
+
+            paginator = RankedListPagination()
+            paginator.page_size_query_param = 'limit'
+            post_search = PostSearch(request.user, ViewerContext.for_request(request), query)
+            page_ids = paginator.paginate_ranking(request, post_search.cached_ranking)
+            posts = Publicacao.objects.select_related('usuario', 'comunidade').in_bulk(page_ids)
+            results['posts'] = PublicacaoSerializer(
+                [posts[pk] for pk in page_ids if pk in posts], many=True, context={'request': request}
+            ).data
             counts['posts'] = len(results['posts'])
+            next_pages['posts'] = paginator.get_next_link()
 
         # Search Users
         if search_type in ['all', 'users']:
@@ -58,15 +66,63 @@ class SearchView(APIView):
         # Search Hashtags
         if search_type in ['all', 'hashtags']:
             hashtags = Hashtag.objects.filter(
-                texto_hashtag__istartswith=query.lstrip('#')
+                prefix_range('texto_busca', search_key(query.lstrip('#')))
             ).order_by('-contagem_uso')[:limit]
             results['hashtags'] = HashtagSerializer(hashtags, many=True).data
             counts['hashtags'] = len(results['hashtags'])
 
-        serializer = SearchSerializer(data={'results': results, 'counts': counts})
+        serializer = SearchSerializer(data={'results': results, 'counts': counts, 'next': next_pages})
         serializer.is_valid()
         return Response(serializer.data)
 
+class TypeaheadView(APIView):
+    """
+    Search-box suggestions: users whose username or name starts with ``q``
+    and hashtags starting with it, ranked by followers and by usage. Matching
+    only runs index range scans over the normalized *_busca columns, so it is
+    cheap enough to call on every keystroke. A leading '@' or '#' restricts
+    the results to users or hashtags.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+    default_limit = 8
+    max_limit = 20
+
+    def get(self, request):
+        from .models import Hashtag, prefix_range, search_key
+
+        query = request.query_params.get('q', '').strip()
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.default_limit)), 1), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+
+        prefix = search_key(query.lstrip('@#'))
+        results = {'users': [], 'hashtags': []}
+        if not prefix:
+            return Response(results)
+
+        if not query.startswith('#'):
+            viewer = ViewerContext.for_request(request)
+            users = User.objects.filter(
+                prefix_range('nome_usuario_busca', prefix) | prefix_range('nome_completo_busca', prefix),
+                status=1
+            ).exclude(
+                pk__in=viewer.blocked | viewer.blocked_by | {request.user.pk}
+            ).order_by('-seguidores_count', 'nome_usuario_busca').values(
+                'id_usuario', 'nome_usuario', 'nome_completo', 'avatar_url', 'seguidores_count'
+            )[:limit]
+            results['users'] = [
+                {**user, 'is_following': user['id_usuario'] in viewer.following} for user in users
+            ]
+
+        if not query.startswith('@'):
+            results['hashtags'] = list(Hashtag.objects.filter(
+                prefix_range('texto_busca', prefix)
+            ).order_by('-contagem_uso').values('id_hashtag', 'texto_hashtag', 'contagem_uso')[:limit])
+
+        return Response(results)
+
+
 class RegisterView(generics.CreateAPIView):
     serializer_class = RegisterSerializer
     permission_classes = (permissions.AllowAny,)
@@ -182,23 +238,9 @@ class UserDetailView(APIView):
         data = serializer.data
         
         # Add follow_status for the requesting user
-        if request.user.id_usuario != pk:
-            from .models import Seguidor
-            follow = Seguidor.objects.filter(
-                usuario_seguidor=request.user,
-                usuario_seguido=user
-            ).first()
-            if follow:
-                if follow.status == 1:
-                    data['follow_status'] = 'following'
-                elif follow.status == 3:
-                    data['follow_status'] = 'pending'
-                else:
-                    data['follow_status'] = 'none'
-            else:
-                data['follow_status'] = 'none'
-        else:
-            data['follow_status'] = None  # Own profile
+        # (None on the user's own profile)
+        from .viewer import ViewerContext
+        data['follow_status'] = ViewerContext.for_request(request).follow_status(user.pk)
         
         # Add ban info if user is banned
         if user.status == 2:
@@ -382,16 +424,12 @@ class SuggestedUsersView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get(self, request):
-        from .models import Seguidor
-        
-        # Get IDs of users the current user already follows
-        following_ids = Seguidor.objects.filter(
-            usuario_seguidor=request.user, status=1
-        ).values_list('usuario_seguido_id', flat=True)
+        from .viewer import ViewerContext
+        viewer = ViewerContext.for_request(request)
         
         # Get users that the current user doesn't follow yet (excluding self)
         suggested = User.objects.exclude(
-            id_usuario__in=list(following_ids) + [request.user.id_usuario]
+            id_usuario__in=[*viewer.following, request.user.id_usuario]
         ).order_by('?')[:5]  # Random 5 users
         
         serializer = UserSerializer(suggested, many=True, context={'request': request})
@@ -401,14 +439,23 @@ class SuggestedUsersView(APIView):
 # Dream (Publicacao) Views
 from rest_framework import viewsets
 from rest_framework.decorators import action
-from .models import Publicacao, Seguidor, ReacaoPublicacao, Comentario, Hashtag, PublicacaoHashtag, PublicacaoSalva
+from .models import Publicacao, Seguidor, ReacaoPublicacao, Comentario, Hashtag, PublicacaoHashtag, PublicacaoSalva, EntradaTimeline
 from .serializers import PublicacaoSerializer, PublicacaoCreateSerializer, SeguidorSerializer, HashtagSerializer, SearchSerializer, NotificacaoSerializer
 from django.utils import timezone
-from django.db.models import Count, Q
-
-class PublicacaoViewSet(viewsets.ModelViewSet):
+from django.db.models import Case, Count, F, FloatField, Q, Value, When
+from django.db.models.functions import Coalesce
+from .pagination import KeysetPagination
+from .timeline import fan_out_post, resync_post, backfill_author, remove_author, following_feed, following_version
+from .ranking import fresh_scores, is_ranked
+from .hashtags import sync_post_hashtags
+from .viewer import ViewerContext, graph_version
+from .feed_cache import ConditionalListMixin
+
+class PublicacaoViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     """ViewSet for dream posts CRUD operations"""
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = KeysetPagination
+    feed_cache_prefix = 'dreams'
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -421,36 +468,14 @@ class PublicacaoViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Return dreams based on tab parameter: following or foryou"""
         user = self.request.user
-        
-        # Helper to get following IDs
-        following_ids = Seguidor.objects.filter(
-            usuario_seguidor=user, status=1
-        ).values_list('usuario_seguido_id', flat=True)
-
-        # Get blocked user IDs to exclude their posts
-        from .models import Bloqueio
-        blocked_user_ids = Bloqueio.objects.filter(
-            usuario=user
-        ).values_list('usuario_bloqueado_id', flat=True)
+        viewer = ViewerContext.for_request(self.request)
 
         # Base filter: exclude posts from banned users, blocked users,
         # AND private accounts (unless followed or own posts)
-        privacy_filter = (
-            Q(usuario__privacidade_padrao=1) |  # Public accounts
-            Q(usuario__in=following_ids) |       # Followed private accounts
-            Q(usuario=user)                      # Own posts
-        )
-        base_filter = Q(usuario__status=1) & ~Q(usuario__in=blocked_user_ids) & privacy_filter
-
-        # Post visibility rules:
-        # 1: Public -> Visible to all who pass base_filter
-        # 2: Close Friends/Followers -> Visible if current user follows author
-        # 3: Private -> Only visible to the author
-        visibility_q = (
-            Q(visibilidade=1) |
-            (Q(visibilidade=2) & Q(usuario__in=following_ids)) |
-            Q(usuario=user)
-        )
+        base_filter = viewer.author_filter()
+
+        # Post visibility rules (public / followers / author only)
+        visibility_q = viewer.visibility_filter()
 
         if self.action == 'list':
             tab = self.request.query_params.get('tab', 'following')
@@ -463,11 +488,14 @@ class PublicacaoViewSet(viewsets.ModelViewSet):
 
             if tab == 'saved':
                 # Saved Dreams: Posts saved by the user
+                # (annotated so the cursor can key on the save date)
                 return Publicacao.objects.filter(
                     base_filter,
                     visibility_q,
                     publicacaosalva__usuario=user
-                ).order_by('-publicacaosalva__data_salvo')
+                ).annotate(
+                    data_salvo=F('publicacaosalva__data_salvo')
+                ).order_by('-data_salvo')
             
             if tab == 'community':
                 community_id = self.request.query_params.get('community_id')
@@ -491,10 +519,7 @@ class PublicacaoViewSet(viewsets.ModelViewSet):
                 if user_id:
                     target_user = get_object_or_404(User, pk=user_id)
                     # Respect privacy
-                    is_private = target_user.privacidade_padrao == 2
-                    is_following = target_user.pk in following_ids
-                    is_self = target_user.pk == user.pk
-                    if is_private and not is_following and not is_self:
+                    if not viewer.can_see_account(target_user):
                         return Publicacao.objects.none()
                     return Publicacao.objects.filter(
                         base_filter,
@@ -508,10 +533,8 @@ class PublicacaoViewSet(viewsets.ModelViewSet):
                 user_id = self.request.query_params.get('user_id')
                 if user_id:
                     target_user = get_object_or_404(User, pk=user_id)
-                    is_private = target_user.privacidade_padrao == 2
-                    is_following = target_user.pk in following_ids
-                    is_self = target_user.pk == user.pk
-                    if is_private and not is_following and not is_self:
+                    # Respect privacy
+                    if not viewer.can_see_account(target_user):
                         return Publicacao.objects.none()
                     return Publicacao.objects.filter(
                         base_filter,
@@ -526,10 +549,8 @@ class PublicacaoViewSet(viewsets.ModelViewSet):
                 media_filter = Q(imagem__isnull=False) & ~Q(imagem='')
                 if user_id:
                     target_user = get_object_or_404(User, pk=user_id)
-                    is_private = target_user.privacidade_padrao == 2
-                    is_following = target_user.pk in following_ids
-                    is_self = target_user.pk == user.pk
-                    if is_private and not is_following and not is_self:
+                    # Respect privacy
+                    if not viewer.can_see_account(target_user):
                         return Publicacao.objects.none()
                     return Publicacao.objects.filter(
                         base_filter,
@@ -543,20 +564,15 @@ class PublicacaoViewSet(viewsets.ModelViewSet):
                     ).filter(media_filter).order_by('-data_publicacao')
 
             if tab == 'foryou':
-                # For You: Public dreams ordered by engagement (likes + comments)
-                return Publicacao.objects.filter(
+                # For You: Public dreams ordered by time-decayed score
+                return self.rank_for_you(Publicacao.objects.filter(
                     base_filter,
                     visibilidade=1
-                ).annotate(
-                    engagement=Count('reacaopublicacao', distinct=True) + Count('comentario', distinct=True)
-                ).order_by('-engagement', '-data_publicacao')[:50]
+                ))[:50]
             
-            # Following: Dreams from people user follows + own dreams
-            return Publicacao.objects.filter(
-                base_filter,
-                visibility_q,
-                Q(usuario__in=following_ids) | Q(usuario=user)
-            ).order_by('-data_publicacao')
+            # Following: Dreams from people user follows + own dreams,
+            # read from the materialized timeline (see core/timeline.py)
+            return following_feed(user)
 
         # For detailed actions (retrieve, like, etc), return all accessible posts
         # Accessible = Satisfies visibility rules AND base filters
@@ -564,49 +580,86 @@ class PublicacaoViewSet(viewsets.ModelViewSet):
             base_filter,
             visibility_q
         ).distinct()
+
+    def get_list_version(self):
+        # Only the polled 'following' tab is cached (see core/feed_cache.py)
+        if self.request.query_params.get('tab', 'following') != 'following':
+            return None
+        return (graph_version(self.request.user.pk), *following_version(self.request.user))
+
+    def rank_for_you(self, queryset):
+        """
+        Order by the precomputed score in ranking_publicacoes (see core/ranking.py),
+        with posts published since the last rebuild scored on the fly, or by raw
+        engagement until `manage.py rank_posts` has run.
+        """
+        if is_ranked():
+            fresh = fresh_scores(queryset)
+            pontuacao = F('ranking__pontuacao')
+            if fresh:
+                pontuacao = Coalesce(pontuacao, Case(
+                    *[When(pk=pk, then=Value(value)) for pk, value in fresh.items()],
+                    output_field=FloatField()
+                ))
+            return queryset.filter(
+                Q(ranking__isnull=False) | Q(pk__in=list(fresh))
+            ).annotate(pontuacao=pontuacao).order_by('-pontuacao', '-data_publicacao')
+        return queryset.annotate(
+            engagement=F('likes_count') + F('comentarios_count')
+        ).order_by('-engagement', '-data_publicacao')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if queryset.model is EntradaTimeline:  # following_feed() joins the posts itself
+            return queryset
+        # Author and community are rendered for every post; join them in
+        return queryset.select_related('usuario', 'comunidade')
+
+    def paginate_queryset(self, queryset):
+        # 'foryou' is already capped at 50 and ranked by engagement
+        if self.action == 'list' and self.request.query_params.get('tab') == 'foryou':
+            return None
+        page = super().paginate_queryset(queryset)
+        if queryset.model is EntradaTimeline:
+            # Paged (and cursored) on the timeline rows; serialize their posts
+            return [entry.publicacao for entry in page]
+        return page
     
     @action(detail=False, methods=['get'])
     def algorithm(self, request):
         """
-        Endpoint reservado para o futuro algoritmo de recomendação de feed.
-        Atualmente retorna a mesma lógica da aba 'foryou' (baseado em engajamento).
+        Feed personalizado gerado pelo pipeline de recomendação (core/recommendation.py):
+        candidatos, features, pontuação e re-ranqueamento por diversidade.
+        A lista ranqueada fica em cache e é paginada por cursor; com DEBUG ativo,
+        o header Server-Timing traz a duração de cada estágio.
         URL acessível via: GET /api/dreams/algorithm/
         """
-        queryset = self.get_queryset().filter(
-            visibilidade=1
-        ).annotate(
-            engagement=Count('reacaopublicacao', distinct=True) + Count('comentario', distinct=True)
-        ).order_by('-engagement', '-data_publicacao')
-        
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+        from .pagination import RankedListPagination
+        from .recommendation import RecommendationPipeline
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        pipeline = RecommendationPipeline(request.user, ViewerContext.for_request(request))
+        paginator = RankedListPagination()
+        page_ids = paginator.paginate_ranking(request, pipeline.cached_ranking)
+
+        # Re-check access: the ranking may be a few minutes old
+        posts = self.filter_queryset(self.get_queryset()).in_bulk(page_ids)
+        serializer = self.get_serializer([posts[pk] for pk in page_ids if pk in posts], many=True)
+        response = paginator.get_paginated_response(serializer.data)
+        if settings.DEBUG and pipeline.timings:
+            response['Server-Timing'] = pipeline.server_timing()
+        return response
 
     def perform_create(self, serializer):
-        post = serializer.save(usuario=self.request.user)
-        
-        # Extract hashtags
-        import re
-        hashtags = re.findall(r'#(\w+)', post.conteudo_texto)
-        
-        for tag_text in set(hashtags):
-            hashtag, created = Hashtag.objects.get_or_create(texto_hashtag=tag_text)
-            if not created:
-                hashtag.contagem_uso += 1
-                hashtag.ultima_utilizacao = timezone.now()
-                hashtag.save()
-            
-            PublicacaoHashtag.objects.create(
-                publicacao=post,
-                hashtag=hashtag
-            )
+        with transaction.atomic():
+            post = serializer.save(usuario=self.request.user)
+            sync_post_hashtags(post)
+        fan_out_post(post)
     
     def perform_update(self, serializer):
-        serializer.save(editado=True, data_edicao=timezone.now())
+        with transaction.atomic():
+            post = serializer.save(editado=True, data_edicao=timezone.now())
+            sync_post_hashtags(post)
+        resync_post(post)
     
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -625,13 +678,10 @@ class PublicacaoViewSet(viewsets.ModelViewSet):
         is_author = instance.usuario.id_usuario == user.id_usuario
         is_community_mod = False
         
-        if instance.comunidade:
-            from .models import MembroComunidade
-            is_community_mod = MembroComunidade.objects.filter(
-                comunidade=instance.comunidade,
-                usuario=user,
-                role__in=['moderator', 'admin']
-            ).exists()
+        if instance.comunidade_id:
+            from .viewer import community_role
+            from .serializers import MODERATOR_ROLES
+            is_community_mod = community_role(request, instance.comunidade) in MODERATOR_ROLES
             
         if not (is_author or is_community_mod or user.is_admin):
             return Response(
@@ -651,25 +701,38 @@ class PublicacaoViewSet(viewsets.ModelViewSet):
         ).first()
 
         if existing_like:
-            existing_like.delete()
+            with transaction.atomic():
+                # A concurrent unlike may have deleted it already: count only our delete
+                deleted, _ = ReacaoPublicacao.objects.filter(pk=existing_like.pk).delete()
+                if deleted:
+                    Publicacao.objects.filter(pk=dream.pk).update(likes_count=F('likes_count') - 1)
             is_liked = False
         else:
-            ReacaoPublicacao.objects.create(
-                publicacao=dream,
-                usuario=request.user
-            )
+            try:
+                with transaction.atomic():
+                    ReacaoPublicacao.objects.create(
+                        publicacao=dream,
+                        usuario=request.user
+                    )
+                    Publicacao.objects.filter(pk=dream.pk).update(likes_count=F('likes_count') + 1)
+                created = True
+            except IntegrityError:
+                # A concurrent like by the same user got there first
+                created = False
             is_liked = True
-            # Create notification for like (tipo 3 = Curtida)
-            from .views import create_notification
-            create_notification(
-                usuario_destino=dream.usuario,
-                usuario_origem=request.user,
-                tipo=3,
-                id_referencia=dream.id_publicacao,
-                conteudo=dream.titulo or dream.conteudo_texto[:50]
-            )
+            if created:
+                # Create notification for like (tipo 3 = Curtida)
+                from .views import create_notification
+                create_notification(
+                    usuario_destino=dream.usuario,
+                    usuario_origem=request.user,
+                    tipo=3,
+                    id_referencia=dream.id_publicacao,
+                    conteudo=dream.titulo or dream.conteudo_texto[:50],
+                    agrupamento=f'like:{dream.pk}'
+                )
 
-        likes_count = ReacaoPublicacao.objects.filter(publicacao=dream).count()
+        likes_count = Publicacao.objects.filter(pk=dream.pk).values_list('likes_count', flat=True).get()
 
         return Response({
             'is_liked': is_liked,
@@ -703,6 +766,12 @@ class PublicacaoViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
 
 
+def adjust_follow_counters(follower_id, followed_id, delta):
+    """Apply +1/-1 for an active follow to both users' counters"""
+    User.objects.filter(pk=follower_id).update(seguindo_count=F('seguindo_count') + delta)
+    User.objects.filter(pk=followed_id).update(seguidores_count=F('seguidores_count') + delta)
+
+
 class FollowView(APIView):
     """Views for following/unfollowing users"""
     permission_classes = (permissions.IsAuthenticated,)
@@ -719,11 +788,7 @@ class FollowView(APIView):
             )
         
         # Can't follow a blocked user or a user who blocked you
-        from .models import Bloqueio
-        if Bloqueio.objects.filter(
-            Q(usuario=request.user, usuario_bloqueado=user_to_follow) |
-            Q(usuario=user_to_follow, usuario_bloqueado=request.user)
-        ).exists():
+        if ViewerContext.for_request(request).is_blocked_either_way(user_to_follow.pk):
             return Response(
                 {'error': _('Não é possível seguir este usuário')},
                 status=status.HTTP_400_BAD_REQUEST
@@ -756,8 +821,11 @@ class FollowView(APIView):
                     'follow_status': 'pending'
                 }, status=status.HTTP_200_OK)
             else:
-                existing.status = 1
-                existing.save()
+                with transaction.atomic():
+                    existing.status = 1
+                    existing.save()
+                    adjust_follow_counters(request.user.pk, user_to_follow.pk, 1)
+                backfill_author(request.user, user_to_follow)
         else:
             # Determine status based on target's privacy setting
             if user_to_follow.privacidade_padrao == 2:
@@ -780,11 +848,14 @@ class FollowView(APIView):
                 }, status=status.HTTP_200_OK)
             else:
                 # Public account: follow immediately
-                Seguidor.objects.create(
-                    usuario_seguidor=request.user,
-                    usuario_seguido=user_to_follow,
-                    status=1
-                )
+                with transaction.atomic():
+                    Seguidor.objects.create(
+                        usuario_seguidor=request.user,
+                        usuario_seguido=user_to_follow,
+                        status=1
+                    )
+                    adjust_follow_counters(request.user.pk, user_to_follow.pk, 1)
+                backfill_author(request.user, user_to_follow)
         
         # Create notification for new follower (tipo 4 = Seguidor Novo)
         from .views import create_notification
@@ -816,7 +887,11 @@ class FollowView(APIView):
             )
         
         was_pending = follow.status == 3
-        follow.delete()
+        with transaction.atomic():
+            follow.delete()
+            if not was_pending:
+                adjust_follow_counters(request.user.pk, user_to_unfollow.pk, -1)
+        remove_author(request.user, user_to_unfollow)
         
         return Response({
             'message': _('Você deixou de seguir %(username)s') % {'username': user_to_unfollow.nome_usuario} if not was_pending else _('Solicitação cancelada'),
@@ -830,20 +905,14 @@ class UserFollowersView(APIView):
 
     def get(self, request, pk):
         target_user = get_object_or_404(User, pk=pk)
-        is_own = request.user.id_usuario == pk
 
         # Privacy check: private accounts restrict list to owner or active followers
-        if not is_own and target_user.privacidade_padrao == 2:
-            is_follower = Seguidor.objects.filter(
-                usuario_seguidor=request.user,
-                usuario_seguido=target_user,
-                status=1
-            ).exists()
-            if not is_follower:
-                return Response(
-                    {'error': _('Esta conta é privada. Apenas seguidores aprovados podem ver esta lista.')},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+        viewer = ViewerContext.for_request(request)
+        if not viewer.can_see_account(target_user):
+            return Response(
+                {'error': _('Esta conta é privada. Apenas seguidores aprovados podem ver esta lista.')},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
         # Get active followers
         follower_relations = Seguidor.objects.filter(
@@ -851,13 +920,6 @@ class UserFollowersView(APIView):
             status=1
         ).select_related('usuario_seguidor')
 
-        # IDs the requesting user follows (for is_following flag)
-        my_following_ids = set(
-            Seguidor.objects.filter(
-                usuario_seguidor=request.user, status=1
-            ).values_list('usuario_seguido_id', flat=True)
-        )
-
         data = []
         for rel in follower_relations:
             u = rel.usuario_seguidor
@@ -866,7 +928,7 @@ class UserFollowersView(APIView):
                 'nome_usuario': u.nome_usuario,
                 'nome_completo': u.nome_completo,
                 'avatar_url': u.avatar_url,
-                'is_following': u.id_usuario in my_following_ids,
+                'is_following': u.id_usuario in viewer.following,
             })
 
         return Response(data)
@@ -878,20 +940,14 @@ class UserFollowingView(APIView):
 
     def get(self, request, pk):
         target_user = get_object_or_404(User, pk=pk)
-        is_own = request.user.id_usuario == pk
 
         # Privacy check
-        if not is_own and target_user.privacidade_padrao == 2:
-            is_follower = Seguidor.objects.filter(
-                usuario_seguidor=request.user,
-                usuario_seguido=target_user,
-                status=1
-            ).exists()
-            if not is_follower:
-                return Response(
-                    {'error': _('Esta conta é privada. Apenas seguidores aprovados podem ver esta lista.')},
-                    status=status.HTTP_403_FORBIDDEN
-                )
+        viewer = ViewerContext.for_request(request)
+        if not viewer.can_see_account(target_user):
+            return Response(
+                {'error': _('Esta conta é privada. Apenas seguidores aprovados podem ver esta lista.')},
+                status=status.HTTP_403_FORBIDDEN
+            )
 
         # Get users the target is actively following
         following_relations = Seguidor.objects.filter(
@@ -899,12 +955,6 @@ class UserFollowingView(APIView):
             status=1
         ).select_related('usuario_seguido')
 
-        my_following_ids = set(
-            Seguidor.objects.filter(
-                usuario_seguidor=request.user, status=1
-            ).values_list('usuario_seguido_id', flat=True)
-        )
-
         data = []
         for rel in following_relations:
             u = rel.usuario_seguido
@@ -913,7 +963,7 @@ class UserFollowingView(APIView):
                 'nome_usuario': u.nome_usuario,
                 'nome_completo': u.nome_completo,
                 'avatar_url': u.avatar_url,
-                'is_following': u.id_usuario in my_following_ids,
+                'is_following': u.id_usuario in viewer.following,
             })
 
         return Response(data)
@@ -935,12 +985,21 @@ class BlockView(APIView):
         if Bloqueio.objects.filter(usuario=request.user, usuario_bloqueado=user_to_block).exists():
             return Response({'message': _('Usuário já está bloqueado')}, status=status.HTTP_200_OK)
         
-        # Create block
-        Bloqueio.objects.create(usuario=request.user, usuario_bloqueado=user_to_block)
-        
-        # Also unfollow if following
-        Seguidor.objects.filter(usuario_seguidor=request.user, usuario_seguido=user_to_block).delete()
-        Seguidor.objects.filter(usuario_seguidor=user_to_block, usuario_seguido=request.user).delete()
+        with transaction.atomic():
+            # Create block
+            Bloqueio.objects.create(usuario=request.user, usuario_bloqueado=user_to_block)
+            
+            # Also unfollow if following (in both directions)
+            follows = Seguidor.objects.filter(
+                Q(usuario_seguidor=request.user, usuario_seguido=user_to_block) |
+                Q(usuario_seguidor=user_to_block, usuario_seguido=request.user)
+            )
+            for follow in follows:
+                follow.delete()
+                if follow.status == 1:
+                    adjust_follow_counters(follow.usuario_seguidor_id, follow.usuario_seguido_id, -1)
+        remove_author(request.user, user_to_block)
+        remove_author(user_to_block, request.user)
         
         return Response({'message': _('Você bloqueou %(username)s') % {'username': user_to_block.nome_usuario}}, status=status.HTTP_200_OK)
 
@@ -1034,8 +1093,11 @@ class FollowRequestActionView(APIView):
             )
         
         if action == 'accept':
-            follow_request.status = 1  # Ativo
-            follow_request.save()
+            with transaction.atomic():
+                follow_request.status = 1  # Ativo
+                follow_request.save()
+                adjust_follow_counters(follow_request.usuario_seguidor_id, request.user.pk, 1)
+            backfill_author(follow_request.usuario_seguidor, request.user)
             
             # Create notification for follower that request was accepted
             create_notification(
@@ -1065,10 +1127,26 @@ class FollowRequestActionView(APIView):
 # Comments ViewSet
 from .serializers import ComentarioSerializer, ComentarioCreateSerializer
 
+
+def adjust_comment_counters(comment, delta):
+    """Apply +1/-1 to the counters an active comment contributes to"""
+    Publicacao.objects.filter(pk=comment.publicacao_id).update(
+        comentarios_count=F('comentarios_count') + delta
+    )
+    if comment.comentario_pai_id:
+        Comentario.objects.filter(pk=comment.comentario_pai_id).update(
+            respostas_count=F('respostas_count') + delta
+        )
+
 class ComentarioViewSet(viewsets.ModelViewSet):
-    """ViewSet for comments on dream posts - Twitter-like"""
+    """
+    ViewSet for comments on dream posts - Twitter-like.
+    Root comments are cursor-paginated; each carries its first replies and a
+    ``respostas_next`` link to the ``replies`` action for the rest.
+    """
     permission_classes = (permissions.IsAuthenticated,)
     parser_classes = (MultiPartParser, FormParser,)
+    pagination_class = KeysetPagination
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -1092,27 +1170,23 @@ class ComentarioViewSet(viewsets.ModelViewSet):
         
         # For detail actions (retrieve, update, destroy), return ALL comments
         # This allows deleting/editing nested replies, not just root comments
-        if self.action in ['retrieve', 'update', 'partial_update', 'destroy', 'like']:
+        if self.action in ['retrieve', 'update', 'partial_update', 'destroy', 'react', 'replies']:
             return base_queryset
         
         # For list action, only return root comments (children are nested in serializer)
-        queryset = base_queryset.filter(comentario_pai__isnull=True)
+        queryset = base_queryset.filter(comentario_pai__isnull=True).select_related('usuario')
         
         # Handle ordering parameter
         ordering = self.request.query_params.get('ordering', 'recent')
         
         if ordering == 'relevance':
             # Order by engagement (likes + replies)
-            from django.db.models import Count
             queryset = queryset.annotate(
-                engagement=Count('reacaocomentario', distinct=True) + Count('respostas', distinct=True)
+                engagement=F('likes_count') + F('respostas_count')
             ).order_by('-engagement', '-data_comentario')
         elif ordering == 'likes':
             # Order by like count
-            from django.db.models import Count
-            queryset = queryset.annotate(
-                like_count=Count('reacaocomentario')
-            ).order_by('-like_count', '-data_comentario')
+            queryset = queryset.order_by('-likes_count', '-data_comentario')
         else:  # 'recent' is default
             queryset = queryset.order_by('-data_comentario')
         
@@ -1121,7 +1195,9 @@ class ComentarioViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         dream_id = self.kwargs.get('dream_pk')
         dream = get_object_or_404(Publicacao, pk=dream_id)
-        comment = serializer.save(usuario=self.request.user, publicacao=dream)
+        with transaction.atomic():
+            comment = serializer.save(usuario=self.request.user, publicacao=dream)
+            adjust_comment_counters(comment, 1)
         
         # Create notification
         if comment.comentario_pai:
@@ -1151,6 +1227,13 @@ class ComentarioViewSet(viewsets.ModelViewSet):
         """Override create to return full serialized comment"""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        # A reply inherits its parent's thread path, so both must belong to this dream
+        parent = serializer.validated_data.get('comentario_pai')
+        if parent is not None and parent.publicacao_id != self.kwargs.get('dream_pk'):
+            return Response(
+                {'error': _('O comentário respondido pertence a outro sonho')},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         self.perform_create(serializer)
         
         # Return full comment data with all fields, using the instance just created
@@ -1177,13 +1260,26 @@ class ComentarioViewSet(viewsets.ModelViewSet):
             )
         
         # Prevent deletion if comment has replies to preserve thread structure
-        if instance.respostas.filter(status=1).exists():
+        if instance.descendentes().filter(status=1).exists():
             return Response(
                 {'error': _('Não é possível excluir um comentário que possui respostas. Exclua as respostas primeiro.')},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        return super().destroy(request, *args, **kwargs)
+        with transaction.atomic():
+            adjust_comment_counters(instance, -1)
+            return super().destroy(request, *args, **kwargs)
+
+    @action(detail=True, methods=['get'])
+    def replies(self, request, dream_pk=None, pk=None):
+        """Direct replies of one comment, oldest first, cursor-paginated"""
+        parent = self.get_object()
+        queryset = Comentario.objects.filter(
+            comentario_pai=parent, status=1
+        ).select_related('usuario').order_by('data_comentario')
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def react(self, request, dream_pk=None, pk=None):
@@ -1195,103 +1291,147 @@ class ComentarioViewSet(viewsets.ModelViewSet):
         from .models import ReacaoComentario
         existing_reacao = ReacaoComentario.objects.filter(comentario=comment, usuario=user).first()
         
+        comment_likes = Comentario.objects.filter(pk=comment.pk)
+
         if existing_reacao:
             if existing_reacao.tipo_reacao == tipo:
-                # Remove reaction if clicking the same one
-                existing_reacao.delete()
-                return Response({'status': 'removed', 'likes_count': ReacaoComentario.objects.filter(comentario=comment).count()}, status=status.HTTP_200_OK)
+                # Remove reaction if clicking the same one; a concurrent
+                # removal may have deleted it already
+                with transaction.atomic():
+                    deleted, _ = ReacaoComentario.objects.filter(pk=existing_reacao.pk).delete()
+                    if deleted:
+                        comment_likes.update(likes_count=F('likes_count') - 1)
+                return Response({'status': 'removed', 'likes_count': comment_likes.values_list('likes_count', flat=True).get()}, status=status.HTTP_200_OK)
             else:
                 # Change reaction type
                 existing_reacao.tipo_reacao = tipo
                 existing_reacao.data_reacao = timezone.now()
                 existing_reacao.save()
-                return Response({'status': 'updated', 'tipo': tipo, 'likes_count': ReacaoComentario.objects.filter(comentario=comment).count()}, status=status.HTTP_200_OK)
+                return Response({'status': 'updated', 'tipo': tipo, 'likes_count': comment.likes_count}, status=status.HTTP_200_OK)
         else:
             # Create new reaction
-            ReacaoComentario.objects.create(comentario=comment, usuario=user, tipo_reacao=tipo)
-            
+            try:
+                with transaction.atomic():
+                    ReacaoComentario.objects.create(comentario=comment, usuario=user, tipo_reacao=tipo)
+                    comment_likes.update(likes_count=F('likes_count') + 1)
+                created = True
+            except IntegrityError:
+                # A concurrent reaction by the same user got there first
+                created = False
+
             # Notify comment author (tipo 3 = Curtida/Reação)
-            if comment.usuario.id_usuario != user.id_usuario:
+            if created and comment.usuario.id_usuario != user.id_usuario:
                 content = f"reagiu ao seu comentário"
                 create_notification(
                     usuario_destino=comment.usuario,
                     usuario_origem=user,
                     tipo=3,
                     id_referencia=comment.publicacao.id_publicacao,
-                    conteudo=content
+                    conteudo=content,
+                    agrupamento=f'reacao:{comment.pk}'
                 )
                 
-            return Response({'status': 'created', 'tipo': tipo, 'likes_count': ReacaoComentario.objects.filter(comentario=comment).count()}, status=status.HTTP_201_CREATED)
+            return Response({'status': 'created', 'tipo': tipo, 'likes_count': comment_likes.values_list('likes_count', flat=True).get()}, status=status.HTTP_201_CREATED)
 
 
 
 # Notifications ViewSet
 from .models import Notificacao
 from .serializers import NotificacaoSerializer
+from .pagination import NotificationPagination
 
-class NotificacaoViewSet(viewsets.ModelViewSet):
-    """ViewSet for user notifications"""
+class NotificacaoViewSet(ConditionalListMixin, viewsets.ModelViewSet):
+    """
+    ViewSet for user notifications, newest first, keyset-paginated over
+    (data_criacao, id_notificacao) on the (usuario_destino, data_criacao) index
+    """
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = NotificacaoSerializer
+    pagination_class = NotificationPagination
     http_method_names = ['get', 'patch']
+    feed_cache_prefix = 'notifications'
+
+    def get_list_version(self):
+        # Kept on the user row that authentication has already loaded
+        return (self.request.user.versao_notificacoes,)
     
     def get_queryset(self):
         """Return notifications for the current user"""
         return Notificacao.objects.filter(
             usuario_destino=self.request.user
-        ).order_by('-data_criacao')[:50]
+        ).select_related('usuario_origem').order_by('-data_criacao', '-id_notificacao')
     
     @action(detail=True, methods=['patch'])
     def read(self, request, pk=None):
         """Mark a notification as read"""
+        from .badges import NOTIFICATIONS, adjust_unread
+        from .notifications import bump_list_version
         notification = self.get_object()
-        notification.lida = True
-        notification.data_leitura = timezone.now()
-        notification.save()
+        # Conditional update: only the request that flips lida takes it off the badge
+        marked = Notificacao.objects.filter(
+            pk=notification.pk, lida=False
+        ).update(lida=True, data_leitura=timezone.now())
+        adjust_unread(NOTIFICATIONS, {request.user.pk: -marked})
+        if marked:
+            bump_list_version([request.user.pk])
         return Response({'lida': True}, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['patch'])
     def read_all(self, request):
         """Mark all notifications as read"""
+        from .badges import NOTIFICATIONS, adjust_unread
+        from .notifications import bump_list_version
         updated = Notificacao.objects.filter(
             usuario_destino=request.user,
             lida=False
         ).update(lida=True, data_leitura=timezone.now())
+        # Subtract rather than reset, so notifications delivered meanwhile still count
+        adjust_unread(NOTIFICATIONS, {request.user.pk: -updated})
+        if updated:
+            bump_list_version([request.user.pk])
         return Response({'marked_read': updated}, status=status.HTTP_200_OK)
 
+    @action(detail=False, methods=['patch'])
+    def read_up_to(self, request):
+        """
+        Mark the notification at ``cursor`` (a page's ``read_cursor``) and every
+        older one as read with a single UPDATE; newer ones stay unread
+        """
+        from django.core.exceptions import ValidationError
+        from .badges import NOTIFICATIONS, adjust_unread
+        from .notifications import bump_list_version
 
-# Helper function to create notifications
-def create_notification(usuario_destino, usuario_origem, tipo, id_referencia=None, conteudo=None):
-    """Create a notification if destino != origem AND user has that notification type enabled"""
-    if usuario_destino.id_usuario != usuario_origem.id_usuario:
-        # Check user's notification settings
+        cursor = request.data.get('cursor')
+        if not cursor:
+            return Response({'error': _('Cursor é obrigatório')}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            settings = ConfiguracaoUsuario.objects.get(usuario=usuario_destino)
-            
-            # Map notification types to settings fields
-            # tipo: 1=Nova Publicação, 2=Comentário, 3=Curtida, 4=Seguidor Novo
-            notification_settings = {
-                1: settings.notificacoes_novas_publicacoes,
-                2: settings.notificacoes_comentarios,
-                3: settings.notificacoes_reacoes,
-                4: settings.notificacoes_seguidor_novo,
-            }
-            
-            # Check if this notification type is enabled
-            if not notification_settings.get(tipo, True):
-                return  # User has disabled this notification type
-                
-        except ConfiguracaoUsuario.DoesNotExist:
-            # No settings exist, allow all notifications by default
-            pass
-        
-        Notificacao.objects.create(
-            usuario_destino=usuario_destino,
-            usuario_origem=usuario_origem,
-            tipo_notificacao=tipo,
-            id_referencia=str(id_referencia) if id_referencia else None,
-            conteudo=conteudo
-        )
+            (data_criacao, pk), _reverse = self.paginator.parse_cursor(
+                str(cursor), Notificacao.objects.all(), ['data_criacao', 'id_notificacao']
+            )
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            return Response({'error': _('Cursor inválido')}, status=status.HTTP_400_BAD_REQUEST)
+
+        updated = Notificacao.objects.filter(
+            Q(data_criacao__lt=data_criacao) | Q(data_criacao=data_criacao, id_notificacao__lte=pk),
+            usuario_destino=request.user,
+            data_criacao__lte=data_criacao,  # Lets the index range scan start at the cursor
+            lida=False
+        ).update(lida=True, data_leitura=timezone.now())
+        adjust_unread(NOTIFICATIONS, {request.user.pk: -updated})
+        if updated:
+            bump_list_version([request.user.pk])
+        return Response({'marked_read': updated}, status=status.HTTP_200_OK)
+
+
+# Helper function to create notifications
+def create_notification(usuario_destino, usuario_origem, tipo, id_referencia=None, conteudo=None, agrupamento=None):
+    """
+    Queue a notification if destino != origem; the outbox worker checks the
+    user's notification settings and delivers it, folding notifications with
+    the same ``agrupamento`` key into one (see core/notifications.py)
+    """
+    from .notifications import enqueue
+    enqueue(usuario_destino, usuario_origem, tipo, id_referencia, conteudo, agrupamento)
 
 
 # ==========================================
@@ -1400,8 +1540,8 @@ class AdminUserDetailView(APIView):
             'is_admin': user.is_admin,
             'verificado': user.verificado,
             'posts_count': Publicacao.objects.filter(usuario=user).count(),
-            'followers_count': Seguidor.objects.filter(usuario_seguido=user, status=1).count(),
-            'following_count': Seguidor.objects.filter(usuario_seguidor=user, status=1).count(),
+            'followers_count': user.seguidores_count,
+            'following_count': user.seguindo_count,
         })
 
     def patch(self, request, pk):
@@ -1503,7 +1643,11 @@ class AdminReportActionView(APIView):
             if report.tipo_conteudo == 1:  # Post
                 Publicacao.objects.filter(id_publicacao=report.id_conteudo).delete()
             elif report.tipo_conteudo == 2:  # Comment
-                Comentario.objects.filter(id_comentario=report.id_conteudo).update(status=2)
+                with transaction.atomic():
+                    comment = Comentario.objects.filter(id_comentario=report.id_conteudo, status=1).first()
+                    if comment:
+                        Comentario.objects.filter(pk=comment.pk).update(status=2)
+                        adjust_comment_counters(comment, -1)
             
             report.status_denuncia = 3
             report.acao_tomada = 2  # Removido
@@ -1667,7 +1811,8 @@ class ToggleCloseFriendView(APIView):
 # ==========================================
 
 from .models import Comunidade, MembroComunidade, BanimentoComunidade
-from .serializers import ComunidadeSerializer, CommunityStatsSerializer, BanimentoComunidadeSerializer
+from .serializers import ComunidadeSerializer, CommunityStatsSerializer, BanimentoComunidadeSerializer, MODERATOR_ROLES
+from .viewer import community_role
 
 class ComunidadeViewSet(viewsets.ModelViewSet):
     """ViewSet for communities"""
@@ -1690,11 +1835,11 @@ class ComunidadeViewSet(viewsets.ModelViewSet):
 
     def _check_moderator(self, request, community):
         """Check if user is moderator/admin of this community"""
-        return MembroComunidade.objects.filter(
-            comunidade=community,
-            usuario=request.user,
-            role__in=['moderator', 'admin']
-        ).exists() or request.user.is_admin
+        return community_role(request, community) in MODERATOR_ROLES or request.user.is_admin
+
+    def _check_admin(self, request, community):
+        """Check if user is admin of this community (or a site admin)"""
+        return community_role(request, community) == 'admin' or request.user.is_admin
 
     @action(detail=True, methods=['post'], url_path='upload-icon')
     def upload_icon(self, request, pk=None):
@@ -1794,16 +1939,8 @@ class ComunidadeViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         """Delete a community (Admins only)"""
         community = self.get_object()
-        user = request.user
-        
-        # Check if current user is admin of this community
-        is_community_admin = MembroComunidade.objects.filter(
-            comunidade=community, 
-            usuario=user,
-            role='admin'
-        ).exists()
         
-        if not is_community_admin and not user.is_admin:
+        if not self._check_admin(request, community):
             return Response({'error': _('Apenas administradores podem excluir a comunidade')}, status=status.HTTP_403_FORBIDDEN)
         
         community.delete()
@@ -1816,7 +1953,7 @@ class ComunidadeViewSet(viewsets.ModelViewSet):
         user = request.user
         
         # Check if already member
-        if MembroComunidade.objects.filter(comunidade=community, usuario=user).exists():
+        if community_role(request, community) is not None:
             return Response({'error': _('Você já é membro desta comunidade')}, status=status.HTTP_400_BAD_REQUEST)
         
         # Check if banned
@@ -1824,10 +1961,11 @@ class ComunidadeViewSet(viewsets.ModelViewSet):
             return Response({'error': _('Você está banido desta comunidade')}, status=status.HTTP_403_FORBIDDEN)
             
         MembroComunidade.objects.create(comunidade=community, usuario=user, role='member')
+        community.refresh_from_db(fields=['membros_count'])
         return Response({
             'message': _('Bem-vindo à comunidade!'),
             'is_member': True,
-            'membros_count': community.membros.count()
+            'membros_count': community.membros_count
         }, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'])
@@ -1847,10 +1985,11 @@ class ComunidadeViewSet(viewsets.ModelViewSet):
                 return Response({'error': _('Você é o único admin. Promova outro membro antes de sair.')}, status=status.HTTP_400_BAD_REQUEST)
         
         membership.delete()
+        community.refresh_from_db(fields=['membros_count'])
         return Response({
             'message': _('Você saiu da comunidade'),
             'is_member': False,
-            'membros_count': community.membros.count()
+            'membros_count': community.membros_count
         }, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], url_path='manage-role')
@@ -1859,14 +1998,7 @@ class ComunidadeViewSet(viewsets.ModelViewSet):
         community = self.get_object()
         user = request.user
         
-        # Check if current user is admin
-        is_admin = MembroComunidade.objects.filter(
-            comunidade=community, 
-            usuario=user,
-            role='admin'
-        ).exists()
-        
-        if not is_admin and not user.is_admin:
+        if not self._check_admin(request, community):
             return Response({'error': _('Apenas administradores podem gerenciar roles')}, status=status.HTTP_403_FORBIDDEN)
         
         target_user_id = request.data.get('user_id')
@@ -1926,16 +2058,9 @@ class ComunidadeViewSet(viewsets.ModelViewSet):
     def moderator_stats(self, request, pk=None):
         """Get community statistics (Moderators only)"""
         community = self.get_object()
-        user = request.user
 
         # Check permission (Owner or Moderator)
-        is_mod = MembroComunidade.objects.filter(
-            comunidade=community, 
-            usuario=user,
-            role__in=['moderator', 'admin']
-        ).exists()
-
-        if not is_mod and not user.is_admin:
+        if not self._check_moderator(request, community):
              return Response(
                 {'error': _('Apenas moderadores podem ver estatísticas')}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -1946,7 +2071,7 @@ class ComunidadeViewSet(viewsets.ModelViewSet):
         seven_days_ago = today - timedelta(days=7)
         thirty_days_ago = today - timedelta(days=30)
         
-        total_members = community.membros.count()
+        total_members = community.membros_count
         new_members_7 = MembroComunidade.objects.filter(comunidade=community, data_entrada__gte=seven_days_ago).count()
         new_members_30 = MembroComunidade.objects.filter(comunidade=community, data_entrada__gte=thirty_days_ago).count()
         
@@ -2086,13 +2211,7 @@ class ComunidadeViewSet(viewsets.ModelViewSet):
         community = self.get_object()
         
         # Only admins can invite moderators
-        is_admin = MembroComunidade.objects.filter(
-            comunidade=community,
-            usuario=request.user,
-            role='admin'
-        ).exists()
-        
-        if not is_admin and not request.user.is_admin:
+        if not self._check_admin(request, community):
             return Response({'error': _('Apenas administradores podem convidar moderadores')}, status=status.HTTP_403_FORBIDDEN)
         
         target_user_id = request.data.get('user_id')
@@ -2147,6 +2266,32 @@ class RascunhoViewSet(viewsets.ModelViewSet):
         serializer.save(usuario=self.request.user)
 
 
+# ==========================================
+# IMPRESSIONS (views_count)
+# ==========================================
+
+from .impressions import record_impressions
+from .serializers import ImpressionsSerializer
+
+class ImpressionsView(APIView):
+    """
+    Record that the client displayed a batch of posts/comments.
+    Counts are buffered in memory and flushed in bulk (see core/impressions.py).
+    POST /api/impressions/  {"posts": [...], "comments": [...]}
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        serializer = ImpressionsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # One view per item per batch
+        record_impressions(
+            posts=set(serializer.validated_data['posts']),
+            comments=set(serializer.validated_data['comments'])
+        )
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+
 # ==========================================
 # EXPLORE PAGE: TRENDS & TOP COMMUNITY POSTS
 # ==========================================
@@ -2154,71 +2299,44 @@ class RascunhoViewSet(viewsets.ModelViewSet):
 class TrendView(APIView):
     """
     Returns trending data for the Explore page:
-    - Top hashtags by usage count
-    - Top emotions/dream types from recent posts
+    - Hashtags gaining uses fastest (hourly buckets, see core/trends.py)
+    - Top emotions/dream types from recent posts (daily rollups)
     """
     permission_classes = (permissions.IsAuthenticated,)
 
-    # Valid options must match CreateDreamModal.jsx exactly
-    VALID_DREAM_TYPES = {'Lúcido', 'Normal', 'Pesadelo', 'Recorrente'}
-    VALID_EMOTIONS = {'Feliz', 'Medo', 'Surpresa', 'Triste', 'Raiva', 'Confuso', 'Paz', 'Êxtase'}
-
     def get(self, request):
-        from collections import Counter
+        from .trends import EMOCAO, TIPO_SONHO, trending, trending_hashtags
 
-        # --- Trending Hashtags (top 15 by contagem_uso) ---
-        trending_hashtags = Hashtag.objects.order_by('-contagem_uso', '-ultima_utilizacao')[:15]
-        hashtags_data = [
-            {
-                'id_hashtag': h.id_hashtag,
-                'texto_hashtag': h.texto_hashtag,
-                'contagem_uso': h.contagem_uso,
-            }
-            for h in trending_hashtags
-        ]
+        return Response({
+            'hashtags': trending_hashtags(),
+            'emocoes': trending(EMOCAO, 8),
+            'tipos_sonho': trending(TIPO_SONHO, 4),
+        })
 
-        # --- Trending Emotions & Dream Types from recent posts (last 30 days) ---
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        recent_posts = Publicacao.objects.filter(
-            data_publicacao__gte=thirty_days_ago,
-            visibilidade=1  # Only public posts
-        ).values_list('emocoes_sentidas', 'tipo_sonho')
-
-        emotion_counter = Counter()
-        tipo_counter = Counter()
-
-        for emocoes, tipo in recent_posts:
-            # emocoes_sentidas is a text field — may contain comma-separated values
-            # Values are stored as "😊 Feliz" — strip emoji prefix to get the keyword
-            if emocoes:
-                for emo in emocoes.split(','):
-                    cleaned = emo.strip()
-                    # Extract the text part after the emoji (e.g. "😊 Feliz" -> "Feliz")
-                    parts = cleaned.split(' ', 1)
-                    keyword = parts[-1] if len(parts) > 1 else parts[0]
-                    if keyword in self.VALID_EMOTIONS:
-                        # Use the cleaned text keyword (without emoji) as the counter key
-                        emotion_counter[keyword] += 1
-            if tipo:
-                stripped = tipo.strip()
-                if stripped in self.VALID_DREAM_TYPES:
-                    tipo_counter[stripped] += 1
-
-        trending_emotions = [
-            {'nome': nome, 'contagem': count}
-            for nome, count in emotion_counter.most_common(8)
-        ]
 
-        trending_tipos = [
-            {'nome': nome, 'contagem': count}
-            for nome, count in tipo_counter.most_common(4)
-        ]
+class HashtagDreamsView(APIView):
+    """
+    Posts tagged with a hashtag, most recently tagged first, under the same
+    privacy and block rules as the feed. The links are paged with a keyset
+    cursor on the (hashtag, data_associacao) index, so a deep page of a tag
+    with hundreds of thousands of posts costs the same as the first one.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
 
-        return Response({
-            'hashtags': hashtags_data,
-            'emocoes': trending_emotions,
-            'tipos_sonho': trending_tipos,
-        })
+    def get(self, request, texto):
+        hashtag = get_object_or_404(Hashtag, texto_hashtag=texto.lstrip('#'))
+        viewer = ViewerContext.for_request(request)
+
+        links = PublicacaoHashtag.objects.filter(
+            viewer.author_filter('publicacao__usuario'),
+            viewer.visibility_filter('publicacao__usuario', 'publicacao__visibilidade'),
+            hashtag=hashtag
+        ).select_related('publicacao__usuario').order_by('-data_associacao')
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(links, request, view=self)
+        serializer = PublicacaoSerializer([link.publicacao for link in page], many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
 
 class TopCommunityPostsView(APIView):
@@ -2252,9 +2370,7 @@ class TopCommunityPostsView(APIView):
             )
             .select_related('usuario', 'comunidade')
             .annotate(
-                likes_count=Count('reacaopublicacao'),
-                comentarios_count=Count('comentario'),
-                engagement=Count('reacaopublicacao') + Count('comentario'),
+                engagement=F('likes_count') + F('comentarios_count'),
             )
             .order_by('-engagement', '-data_publicacao')[:10]
         )
@@ -2270,7 +2386,7 @@ class TopCommunityPostsView(APIView):
                 'id_comunidade': c.id_comunidade,
                 'nome': c.nome,
                 'imagem': request.build_absolute_uri(c.imagem.url) if c.imagem else None,
-                'membros_count': c.membros.count(),
+                'membros_count': c.membros_count,
             }
             for c in selected_communities
         ]
@@ -2286,6 +2402,8 @@ class TopCommunityPostsView(APIView):
 # ==========================================
 from .models import MensagemDireta, Bloqueio
 from .serializers import MensagemDiretaSerializer
+from .badges import MESSAGES, adjust_unread, badges
+from .realtime import publish
 
 
 class ConversationListView(APIView):
@@ -2370,11 +2488,15 @@ class ChatView(APIView):
         ).select_related('usuario_remetente', 'usuario_destinatario').order_by('data_envio')
 
         # Auto-mark received messages as read
-        messages.filter(
+        now = timezone.now()
+        marked = messages.filter(
             usuario_remetente=partner,
             usuario_destinatario=user,
             lida=False
-        ).update(lida=True, data_leitura=timezone.now())
+        ).update(lida=True, data_leitura=now)
+        adjust_unread(MESSAGES, {user.pk: -marked})
+        if marked:
+            publish(partner.pk, 'read', {'id_usuario': user.pk, 'data_leitura': now})
 
         serializer = MensagemDiretaSerializer(messages, many=True, context={'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -2388,33 +2510,125 @@ class ChatView(APIView):
             return Response({'error': _('Você não pode enviar mensagem para si mesmo')}, status=status.HTTP_400_BAD_REQUEST)
 
         # Check if blocked
-        if Bloqueio.objects.filter(
-            Q(usuario=user, usuario_bloqueado=partner) |
-            Q(usuario=partner, usuario_bloqueado=user)
-        ).exists():
+        if ViewerContext.for_request(request).is_blocked_either_way(partner.pk):
             return Response({'error': _('Não é possível enviar mensagem para este usuário')}, status=status.HTTP_403_FORBIDDEN)
 
         conteudo = request.data.get('conteudo', '').strip()
         if not conteudo:
             return Response({'error': _('Mensagem não pode ser vazia')}, status=status.HTTP_400_BAD_REQUEST)
 
-        msg = MensagemDireta.objects.create(
-            usuario_remetente=user,
-            usuario_destinatario=partner,
-            conteudo=conteudo,
-        )
+        with transaction.atomic():
+            msg = MensagemDireta.objects.create(
+                usuario_remetente=user,
+                usuario_destinatario=partner,
+                conteudo=conteudo,
+            )
+            adjust_unread(MESSAGES, {partner.pk: 1})
 
         serializer = MensagemDiretaSerializer(msg, context={'request': request})
+        publish(partner.pk, 'message', {**serializer.data, 'is_mine': False})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+class TypingView(APIView):
+    """Tell user <pk> that the current user is typing to them"""
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request, pk):
+        partner = get_object_or_404(User, pk=pk)
+        if ViewerContext.for_request(request).is_blocked_either_way(partner.pk):
+            return Response({'error': _('Não é possível enviar mensagem para este usuário')}, status=status.HTTP_403_FORBIDDEN)
+        publish(partner.pk, 'typing', {'id_usuario': request.user.pk})
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class MessageReadView(APIView):
     """Mark a specific message as read"""
     permission_classes = (permissions.IsAuthenticated,)
 
     def patch(self, request, pk):
         msg = get_object_or_404(MensagemDireta, pk=pk, usuario_destinatario=request.user)
-        msg.lida = True
-        msg.data_leitura = timezone.now()
-        msg.save()
+        now = timezone.now()
+        marked = MensagemDireta.objects.filter(
+            pk=msg.pk, lida=False
+        ).update(lida=True, data_leitura=now)
+        adjust_unread(MESSAGES, {request.user.pk: -marked})
+        if marked:
+            publish(msg.usuario_remetente_id, 'read', {
+                'id_usuario': request.user.pk, 'id_mensagem': msg.pk, 'data_leitura': now
+            })
         return Response({'lida': True}, status=status.HTTP_200_OK)
+
+
+class BadgesView(APIView):
+    """Unread notification and direct message counts for the bell and chat icons"""
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        # Served from the counters on the user row authentication already loaded
+        return Response(badges(request.user), status=status.HTTP_200_OK)
+
+
+# ==========================================
+# REAL-TIME EVENTS (Server-Sent Events)
+# ==========================================
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from django.core.handlers.asgi import ASGIRequest
+from .realtime import TICKET_TIMEOUT, issue_ticket, redeem_ticket, stream_events
+
+
+class EventTicketView(APIView):
+    """Single-use ticket for opening the event stream from EventSource, which cannot send headers"""
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        return Response(
+            {'ticket': issue_ticket(request.user), 'expires_in': TICKET_TIMEOUT},
+            status=status.HTTP_201_CREATED
+        )
+
+
+class EventStreamView(View):
+    """Push stream of notifications, messages, read receipts and typing indicators (see core/realtime.py)"""
+
+    async def get(self, request):
+        if not isinstance(request, ASGIRequest):
+            # A WSGI server would buffer the endless stream in a worker thread
+            return JsonResponse(
+                {'error': _('Eventos em tempo real exigem um servidor ASGI')},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        user = await sync_to_async(self.authenticate)(request)
+        if user is None:
+            return JsonResponse({'error': _('Token de acesso inválido ou ausente')}, status=status.HTTP_401_UNAUTHORIZED)
+
+        response = StreamingHttpResponse(stream_events(user), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Don't let a proxy buffer the stream
+        return response
+
+    @staticmethod
+    def authenticate(request):
+        """
+        SimpleJWT access token from the Authorization header, or a ticket
+        from EventTicketView in ``?ticket=``; never a token in the URL,
+        where proxies and access logs would record it
+        """
+        auth = JWTAuthentication()
+        header = auth.get_header(request)
+        raw_token = auth.get_raw_token(header) if header else None
+        if raw_token:
+            try:
+                return auth.get_user(auth.get_validated_token(raw_token))
+            except (InvalidToken, AuthenticationFailed):
+                return None
+
+        user_id = redeem_ticket(request.GET.get('ticket', ''))
+        if user_id is None:
+            return None
+        return User.objects.filter(pk=user_id, is_active=True).first()
@@ -94,6 +94,21 @@ DATABASES = {
     }
 }
 
+# Cache
+# Shared by every worker process: block/privacy checks read the cached viewer
+# context (core/viewer.py), so a per-process cache would miss invalidations.
+# Point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached when running
+# on more than one host.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=10000, cast=int),
+        },
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -198,3 +213,65 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
 }
+
+# Home timeline (fan-out on write)
+# Authors with more active followers than this are merged into feeds at read time
+TIMELINE_CELEBRITY_THRESHOLD = config('TIMELINE_CELEBRITY_THRESHOLD', default=5000, cast=int)
+# How many of an author's recent posts are copied into a new follower's timeline
+TIMELINE_BACKFILL_LIMIT = config('TIMELINE_BACKFILL_LIMIT', default=200, cast=int)
+
+# "For You" ranking (recomputed by `manage.py rank_posts`)
+# Only posts younger than this are scored; older ones drop out of the ranking
+RANKING_WINDOW_DAYS = config('RANKING_WINDOW_DAYS', default=7, cast=int)
+# Higher gravity makes scores decay faster with age
+RANKING_GRAVITY = config('RANKING_GRAVITY', default=1.8, cast=float)
+# How often `rank_posts --loop` rebuilds the table
+RANKING_REBUILD_SECONDS = config('RANKING_REBUILD_SECONDS', default=300, cast=int)
+
+# Trending hashtags (hourly buckets, ranked by `manage.py rank_hashtags`)
+# Recent window compared against the rest of the retention period
+HASHTAG_TRENDING_WINDOW_HOURS = config('HASHTAG_TRENDING_WINDOW_HOURS', default=6, cast=int)
+# Hourly usage buckets older than this are pruned
+HASHTAG_TRENDING_RETENTION_HOURS = config('HASHTAG_TRENDING_RETENTION_HOURS', default=168, cast=int)
+# How often `rank_hashtags --loop` recomputes the list
+HASHTAG_TRENDING_REBUILD_SECONDS = config('HASHTAG_TRENDING_REBUILD_SECONDS', default=300, cast=int)
+
+# Recommendation pipeline behind /api/dreams/algorithm/ (core/recommendation.py)
+# Posts pulled from each candidate source per request
+RECOMMENDATION_CANDIDATE_BATCH = config('RECOMMENDATION_CANDIDATE_BATCH', default=200, cast=int)
+# Candidate sources are skipped once generation has taken this long
+RECOMMENDATION_BUDGET_MS = config('RECOMMENDATION_BUDGET_MS', default=150, cast=int)
+# Length of the ranked list cached per viewer
+RECOMMENDATION_MAX_RESULTS = config('RECOMMENDATION_MAX_RESULTS', default=200, cast=int)
+# Window used to find trending hashtags
+RECOMMENDATION_TRENDING_HOURS = config('RECOMMENDATION_TRENDING_HOURS', default=24, cast=int)
+
+# Notification outbox, drained by `manage.py send_notifications` (core/notifications.py)
+# Queued notifications delivered per transaction
+NOTIFICATIONS_BATCH_SIZE = config('NOTIFICATIONS_BATCH_SIZE', default=500, cast=int)
+# How long the worker waits before polling an empty outbox again
+NOTIFICATIONS_POLL_SECONDS = config('NOTIFICATIONS_POLL_SECONDS', default=2, cast=float)
+# Likes/reactions on the same post or comment within this window update one notification
+NOTIFICATIONS_COALESCE_HOURS = config('NOTIFICATIONS_COALESCE_HOURS', default=24, cast=int)
+
+# Buffered views_count increments (core/impressions.py)
+# A background thread writes pending impressions this often...
+IMPRESSIONS_FLUSH_SECONDS = config('IMPRESSIONS_FLUSH_SECONDS', default=10, cast=int)
+# ...or as soon as this many distinct posts/comments are pending
+IMPRESSIONS_FLUSH_SIZE = config('IMPRESSIONS_FLUSH_SIZE', default=1000, cast=int)
+
+# Per-viewer ETag response cache for polled lists (core/feed_cache.py)
+# Upper bound, in seconds, on how stale other users' counters in a cached page can be
+FEED_CACHE_TTL = config('FEED_CACHE_TTL', default=60, cast=int)
+
+# Full-text dream search (core/search.py)
+# Most matches ranked per query; later pages are slices of this list
+SEARCH_MAX_RESULTS = config('SEARCH_MAX_RESULTS', default=500, cast=int)
+
+# Server-Sent Events push channel (core/realtime.py)
+# Broker fanning events out to open streams; the default only reaches streams of the same process
+REALTIME_BROKER = config('REALTIME_BROKER', default='core.realtime.InProcessBroker')
+# How often each web process reads the realtime outbox for its open streams
+REALTIME_POLL_SECONDS = config('REALTIME_POLL_SECONDS', default=1, cast=float)
+# Idle stream interval between keep-alive comments
+REALTIME_HEARTBEAT_SECONDS = config('REALTIME_HEARTBEAT_SECONDS', default=15, cast=int)
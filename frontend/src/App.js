@@ -25,6 +25,7 @@ import UserProfile from './pages/UserProfile';
 import SearchPage from './pages/SearchPage';
 import CreatePostPage from './pages/CreatePostPage';
 import PostPage from './pages/PostPage';
+import HashtagPage from './pages/HashtagPage';
 
 // Admin - Issue #29
 import AdminLayout from './layouts/AdminLayout';
@@ -162,6 +163,16 @@ function App() {
                                 </PrivateRoute>
                             }
                         />
+                        <Route
+                            path="/hashtag/:tag"
+                            element={
+                                <PrivateRoute>
+                                    <Layout hideRightSidebar>
+                                        <HashtagPage />
+                                    </Layout>
+                                </PrivateRoute>
+                            }
+                        />
                         <Route
                             path="/communities"
                             element={
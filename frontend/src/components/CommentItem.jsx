@@ -6,7 +6,7 @@ import {
     FaFlag, FaEye, FaEyeSlash
 } from 'react-icons/fa';
 import { FaRegComment, FaRetweet } from 'react-icons/fa6';
-import { deleteComment, editComment, likeComment } from '../services/api';
+import { deleteComment, editComment, likeComment, getCommentsPage } from '../services/api';
 import ReplyInput from './ReplyInput';
 import { ChildBranch, ParentLine } from './ThreadConnectorSVG';
 
@@ -55,7 +55,12 @@ const CommentItem = ({
     // Derived values
     const canDelete = comment.can_delete;
     const canEdit = comment.can_edit;
-    const hasReplies = comment.respostas && comment.respostas.length > 0;
+    // Replies beyond the inlined preview, fetched on demand
+    const [moreReplies, setMoreReplies] = useState([]);
+    const [repliesNext, setRepliesNext] = useState(comment.respostas_next || null);
+    const [loadingReplies, setLoadingReplies] = useState(false);
+    const replies = [...(comment.respostas || []), ...moreReplies];
+    const hasReplies = replies.length > 0;
     const isReplying = activeReplyId === comment.id_comentario;
 
     // ===== HANDLERS =====
@@ -63,6 +68,20 @@ const CommentItem = ({
         setActiveReplyId(isReplying ? null : comment.id_comentario);
     };
 
+    const loadMoreReplies = async (e) => {
+        e.stopPropagation();
+        setLoadingReplies(true);
+        try {
+            const response = await getCommentsPage(repliesNext);
+            setMoreReplies(prev => [...prev, ...response.data]);
+            setRepliesNext(response.next);
+        } catch (err) {
+            console.error('Error loading replies:', err);
+        } finally {
+            setLoadingReplies(false);
+        }
+    };
+
     const toggleCollapse = (e) => {
         e.stopPropagation();
         setIsCollapsed(!isCollapsed);
@@ -290,7 +309,7 @@ const CommentItem = ({
                                 className="mt-1 text-[11px] font-mono text-gray-400 hover:text-primary transition-colors"
                                 title={isCollapsed ? 'Expandir' : 'Colapsar'}
                             >
-                                {isCollapsed ? `[+${comment.respostas?.length || 0}]` : '[-]'}
+                                {isCollapsed ? `[+${replies.length}]` : '[-]'}
                             </button>
                         )}
                     </div>
@@ -377,7 +396,7 @@ const CommentItem = ({
             {/* NESTED REPLIES - INFINITE RECURSION (NO DEPTH LIMIT!) */}
             {hasReplies && !isCollapsed && (
                 <div className="relative">
-                    {comment.respostas.map((reply, idx) => (
+                    {replies.map((reply, idx) => (
                         <CommentItem
                             key={reply.id_comentario}
                             comment={reply}
@@ -390,7 +409,7 @@ const CommentItem = ({
                             onReport={onReport}
                             formatDate={formatDate}
                             depth={depth + 1}
-                            isLast={idx === comment.respostas.length - 1}
+                            isLast={idx === replies.length - 1 && !repliesNext}
                             currentUser={currentUser}
                             activeReplyId={activeReplyId}
                             setActiveReplyId={setActiveReplyId}
@@ -398,6 +417,16 @@ const CommentItem = ({
                     ))}
                 </div>
             )}
+
+            {repliesNext && !isCollapsed && (
+                <button
+                    onClick={loadMoreReplies}
+                    disabled={loadingReplies}
+                    className="ml-16 mb-3 text-sm text-primary hover:underline disabled:opacity-50"
+                >
+                    {loadingReplies ? 'Carregando...' : 'Ver mais respostas'}
+                </button>
+            )}
         </div>
     );
 };
@@ -1,7 +1,7 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { FaChevronDown, FaSpinner, FaImage, FaVideo, FaTimes } from 'react-icons/fa';
 import { FaRegComment } from 'react-icons/fa6';
-import { getComments, createComment } from '../services/api';
+import { getComments, getCommentsPage, createComment } from '../services/api';
 import { motion, AnimatePresence } from 'framer-motion';
 import CommentItem from './CommentItem';
 
@@ -31,6 +31,8 @@ const CommentSection = ({
 }) => {
     // State
     const [comments, setComments] = useState([]);
+    const [nextPage, setNextPage] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [newComment, setNewComment] = useState('');
     const [loading, setLoading] = useState(true);
     const [submitting, setSubmitting] = useState(false);
@@ -76,6 +78,7 @@ const CommentSection = ({
         try {
             const response = await getComments(dreamId, sortBy);
             setComments(response.data);
+            setNextPage(response.next);
             setError(null);
         } catch (err) {
             console.error('Error fetching comments:', err);
@@ -85,6 +88,19 @@ const CommentSection = ({
         }
     };
 
+    const loadMoreComments = async () => {
+        setLoadingMore(true);
+        try {
+            const response = await getCommentsPage(nextPage);
+            setComments(prev => [...prev, ...response.data]);
+            setNextPage(response.next);
+        } catch (err) {
+            console.error('Error fetching comments:', err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     // ===== HELPERS =====
     const formatDate = (dateString) => {
         const date = new Date(dateString);
@@ -400,6 +416,18 @@ const CommentSection = ({
                     ))}
                 </AnimatePresence>
             </div>
+
+            {nextPage && (
+                <div className="flex justify-center py-4">
+                    <button
+                        onClick={loadMoreComments}
+                        disabled={loadingMore}
+                        className="text-sm text-primary hover:underline disabled:opacity-50"
+                    >
+                        {loadingMore ? 'Carregando...' : 'Carregar mais comentários'}
+                    </button>
+                </div>
+            )}
         </motion.div>
     );
 };
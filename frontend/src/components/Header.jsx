@@ -10,6 +10,11 @@ import { useTranslation } from 'react-i18next';
 import ThemeToggle from './ThemeToggle';
 import { logout, getProfile } from '../services/api';
 
+// Badge polling interval when the event stream is unavailable
+const BADGE_POLL_MS = 30000;
+// Pause before reopening a dropped event stream
+const STREAM_RETRY_MS = 3000;
+
 const Header = () => {
     const [showDropdown, setShowDropdown] = useState(false);
     const [isMobileMenuOpen, setIsMobileMenuOpen] = useState(false);
@@ -39,16 +44,61 @@ const Header = () => {
                 const profileRes = await getProfile();
                 setUser(profileRes.data);
 
-                // Fetch unread notifications to implement red-dot
-                const { getNotifications } = await import('../services/api');
-                const notifRes = await getNotifications();
-                const unread = notifRes.data.filter(n => !n.lida).length;
-                setHasUnreadNotifs(unread > 0);
+                // Unread counter for the red-dot
+                const { getBadges } = await import('../services/api');
+                const badgesRes = await getBadges();
+                setHasUnreadNotifs(badgesRes.data.notificacoes > 0);
             } catch (error) {
                 console.error('Error fetching header data:', error);
             }
         };
         fetchProfileAndNotifications();
+
+        // Live updates instead of polling
+        let stream;
+        let pollTimer;
+        let retryTimer;
+        let closed = false;
+        import('../services/api').then(({ openEventStream, getBadges }) => {
+            const startPolling = () => {
+                if (closed || pollTimer) return;
+                pollTimer = setInterval(() => {
+                    getBadges()
+                        .then((res) => setHasUnreadNotifs(res.data.notificacoes > 0))
+                        .catch(() => {});
+                }, BADGE_POLL_MS);
+            };
+            const connect = () => {
+                openEventStream().then((source) => {
+                    if (closed) {
+                        source.close();
+                        return;
+                    }
+                    stream = source;
+                    let opened = false;
+                    stream.addEventListener('open', () => { opened = true; });
+                    stream.addEventListener('badges', (e) => setHasUnreadNotifs(JSON.parse(e.data).notificacoes > 0));
+                    stream.addEventListener('notification', () => setHasUnreadNotifs(true));
+                    stream.addEventListener('error', () => {
+                        if (opened) {
+                            // Dropped: the ticket is spent, so reconnect with a new one
+                            source.close();
+                            retryTimer = setTimeout(connect, STREAM_RETRY_MS);
+                        } else if (source.readyState === EventSource.CLOSED) {
+                            // Refused for good (e.g. 501 from a non-ASGI dev server): poll the badges instead
+                            startPolling();
+                        }
+                    });
+                }).catch(startPolling);
+            };
+            if (!closed) connect();
+        });
+        return () => {
+            closed = true;
+            stream?.close();
+            clearInterval(pollTimer);
+            clearTimeout(retryTimer);
+        };
     }, []);
 
     const [hasUnreadNotifs, setHasUnreadNotifs] = useState(false);
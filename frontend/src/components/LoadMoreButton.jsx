@@ -0,0 +1,40 @@
+import React, { useState } from 'react';
+import { useTranslation } from 'react-i18next';
+import { getDreamsPage } from '../services/api';
+
+// "Load more" for cursor-paginated dream lists: fetches `nextUrl`, appends the
+// page with `setItems` and stores the following cursor with `setNextUrl`.
+const LoadMoreButton = ({ nextUrl, setNextUrl, setItems, onLoad }) => {
+    const { t } = useTranslation();
+    const [loading, setLoading] = useState(false);
+
+    if (!nextUrl) return null;
+
+    const loadMore = async () => {
+        setLoading(true);
+        try {
+            const response = await getDreamsPage(nextUrl);
+            setItems(prev => [...prev, ...response.data]);
+            setNextUrl(response.next);
+            onLoad?.(response.data);
+        } catch (err) {
+            console.error('Error loading more dreams:', err);
+        } finally {
+            setLoading(false);
+        }
+    };
+
+    return (
+        <div className="flex justify-center py-4">
+            <button
+                onClick={loadMore}
+                disabled={loading}
+                className="text-sm text-primary hover:underline disabled:opacity-50"
+            >
+                {loading ? t('home.loadingMore') : t('home.loadMore')}
+            </button>
+        </div>
+    );
+};
+
+export default LoadMoreButton;
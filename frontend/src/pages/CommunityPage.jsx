@@ -2,6 +2,7 @@ import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
 import { useTranslation } from 'react-i18next';
 import DreamCard from '../components/DreamCard';
+import LoadMoreButton from '../components/LoadMoreButton';
 import { getCommunity, joinCommunity, leaveCommunity, deleteCommunity, getDreams, uploadCommunityIcon, uploadCommunityBanner, updateCommunity, inviteModerator, search } from '../services/api';
 import { FaBirthdayCake, FaEllipsisH, FaChevronDown, FaChevronUp, FaPlus, FaPen, FaEnvelope, FaUserPlus, FaTrash, FaCamera, FaTimes, FaSearch, FaSpinner } from 'react-icons/fa';
 
@@ -13,6 +14,7 @@ const CommunityPage = () => {
 
     const [community, setCommunity] = useState(null);
     const [posts, setPosts] = useState([]);
+    const [nextUrl, setNextUrl] = useState(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
     const [uploadingIcon, setUploadingIcon] = useState(false);
@@ -52,6 +54,7 @@ const CommunityPage = () => {
                 ]);
                 setCommunity(commResponse.data);
                 setPosts(postsResponse.data);
+                setNextUrl(postsResponse.next);
             } catch (err) {
                 console.error('Error loading community:', err);
                 setError(t('communityPage.errNotFound'));
@@ -420,13 +423,16 @@ const CommunityPage = () => {
                     {/* Posts Feed */}
                     <div className="flex flex-col gap-4">
                         {posts.length > 0 ? (
-                            posts.map((dream) => (
-                                <DreamCard
-                                    key={dream.id_publicacao}
-                                    dream={dream}
-                                    currentUserId={currentUserId}
-                                />
-                            ))
+                            <>
+                                {posts.map((dream) => (
+                                    <DreamCard
+                                        key={dream.id_publicacao}
+                                        dream={dream}
+                                        currentUserId={currentUserId}
+                                    />
+                                ))}
+                                <LoadMoreButton nextUrl={nextUrl} setNextUrl={setNextUrl} setItems={setPosts} />
+                            </>
                         ) : (
                             <div className="bg-white dark:bg-[#1a1a1b] rounded border border-gray-200 dark:border-gray-700 p-12 text-center">
                                 <h3 className="text-lg font-bold text-gray-900 dark:text-white mb-2">{t('communityPage.emptyPostsTitle')}</h3>
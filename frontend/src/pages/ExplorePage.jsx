@@ -191,6 +191,9 @@ const ExplorePage = () => {
                                         count={activeTrendTab === 'hashtags' ? item.contagem_uso : item.contagem}
                                         rank={index + 1}
                                         type={activeTrendTab}
+                                        onClick={activeTrendTab === 'hashtags'
+                                            ? () => navigate(`/hashtag/${encodeURIComponent(item.texto_hashtag)}`)
+                                            : undefined}
                                     />
                                 ))}
                             </div>
@@ -360,7 +363,7 @@ const TrendTab = ({ label, icon, active, onClick }) => (
     </button>
 );
 
-const TrendPill = ({ text, count, rank, type }) => {
+const TrendPill = ({ text, count, rank, type, onClick }) => {
     const colors = {
         hashtags: 'from-blue-500/10 to-purple-500/10 border-blue-500/20 dark:border-blue-400/20 hover:border-blue-500/40',
         emocoes: 'from-pink-500/10 to-red-500/10 border-pink-500/20 dark:border-pink-400/20 hover:border-pink-500/40',
@@ -368,7 +371,7 @@ const TrendPill = ({ text, count, rank, type }) => {
     };
 
     return (
-        <button className={`flex items-center gap-2 px-4 py-2.5 rounded-xl bg-gradient-to-r ${colors[type]} border transition-all hover:scale-[1.02] active:scale-[0.98]`}>
+        <button onClick={onClick} className={`flex items-center gap-2 px-4 py-2.5 rounded-xl bg-gradient-to-r ${colors[type]} border transition-all hover:scale-[1.02] active:scale-[0.98]`}>
             {rank <= 3 && (
                 <span className={`text-[10px] font-black px-1.5 py-0.5 rounded ${rank === 1 ? 'bg-yellow-500/20 text-yellow-500' :
                     rank === 2 ? 'bg-gray-400/20 text-gray-400' :
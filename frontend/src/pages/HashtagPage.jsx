@@ -0,0 +1,67 @@
+import React, { useState, useEffect } from 'react';
+import { useParams } from 'react-router-dom';
+import DreamCard from '../components/DreamCard';
+import LoadMoreButton from '../components/LoadMoreButton';
+import { getHashtagDreams } from '../services/api';
+import { useTranslation } from 'react-i18next';
+
+const HashtagPage = () => {
+    const { t } = useTranslation();
+    const { tag } = useParams();
+    const [dreams, setDreams] = useState([]);
+    const [nextUrl, setNextUrl] = useState(null);
+    const [loading, setLoading] = useState(true);
+
+    useEffect(() => {
+        const fetchDreams = async () => {
+            setLoading(true);
+            try {
+                const response = await getHashtagDreams(tag);
+                setDreams(response.data);
+                setNextUrl(response.next);
+            } catch (error) {
+                // 404: nobody has used this hashtag yet
+                setDreams([]);
+                setNextUrl(null);
+            } finally {
+                setLoading(false);
+            }
+        };
+        fetchDreams();
+    }, [tag]);
+
+    const currentUserId = JSON.parse(localStorage.getItem('user'))?.id;
+
+    if (loading) {
+        return (
+            <div className="flex justify-center items-center min-h-[50vh]">
+                <div className="animate-spin rounded-full h-12 w-12 border-t-2 border-b-2 border-primary"></div>
+            </div>
+        );
+    }
+
+    return (
+        <div className="flex flex-col gap-6 max-w-2xl mx-auto pb-20">
+            <h1 className="text-2xl font-bold text-text-main dark:text-white mb-2">#{tag}</h1>
+
+            {dreams.length > 0 ? (
+                <>
+                    {dreams.map((dream) => (
+                        <DreamCard
+                            key={dream.id_publicacao}
+                            dream={dream}
+                            currentUserId={currentUserId}
+                        />
+                    ))}
+                    <LoadMoreButton nextUrl={nextUrl} setNextUrl={setNextUrl} setItems={setDreams} />
+                </>
+            ) : (
+                <div className="bg-white/5 backdrop-blur-sm border border-white/10 rounded-xl p-8 text-center">
+                    <p className="text-gray-400 text-lg">{t('hashtag.empty')}</p>
+                </div>
+            )}
+        </div>
+    );
+};
+
+export default HashtagPage;
@@ -4,11 +4,13 @@ import { useLocation, useNavigate } from 'react-router-dom';
 import { useTranslation } from 'react-i18next';
 import DreamCard from '../components/DreamCard';
 import CreateDreamModal from '../components/CreateDreamModal';
-import { getDreams, getProfile, getUserSettings } from '../services/api';
+import LoadMoreButton from '../components/LoadMoreButton';
+import { getDreams, getProfile, getUserSettings, queueImpressions } from '../services/api';
 
 const Home = () => {
     const { t } = useTranslation();
     const [dreams, setDreams] = useState([]);
+    const [nextUrl, setNextUrl] = useState(null);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState('');
     const [currentUserId, setCurrentUserId] = useState(null);
@@ -35,6 +37,8 @@ const Home = () => {
         try {
             const response = await getDreams(tab);
             setDreams(response.data);
+            setNextUrl(response.next);
+            queueImpressions('posts', response.data.map((dream) => dream.id_publicacao));
         } catch (err) {
             console.error('Error fetching dreams:', err);
             setError(t('home.errorLoading'));
@@ -191,6 +195,13 @@ const Home = () => {
                             onEdit={handleEditDream}
                         />
                     ))}
+                    <LoadMoreButton
+                        key={activeTab}
+                        nextUrl={nextUrl}
+                        setNextUrl={setNextUrl}
+                        setItems={setDreams}
+                        onLoad={(page) => queueImpressions('posts', page.map((dream) => dream.id_publicacao))}
+                    />
                 </div>
             )}
 
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { FaBell, FaHeart, FaComment, FaUserPlus, FaCheck, FaArrowLeft } from 'react-icons/fa';
 import { Link, useNavigate } from 'react-router-dom';
-import { acceptFollowRequest, getFollowRequests, getNotifications, markAllNotificationsRead, rejectFollowRequest } from '../services/api';
+import { acceptFollowRequest, getFollowRequests, getNotifications, getNotificationsPage, markNotificationsReadUpTo, rejectFollowRequest } from '../services/api';
 import { useTranslation } from 'react-i18next';
 
 const Notifications = () => {
@@ -9,6 +9,9 @@ const Notifications = () => {
     const navigate = useNavigate();
     const [notifications, setNotifications] = useState([]);
     const [loading, setLoading] = useState(true);
+    const [nextUrl, setNextUrl] = useState(null);
+    const [readCursor, setReadCursor] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [error, setError] = useState(null);
     const [followRequests, setFollowRequests] = useState([]);
     const [requestsLoading, setRequestsLoading] = useState(true);
@@ -23,6 +26,8 @@ const Notifications = () => {
         try {
             const response = await getNotifications();
             setNotifications(response.data);
+            setNextUrl(response.next);
+            setReadCursor(response.readCursor);
             setError(null);
         } catch (err) {
             console.error('Error fetching notifications:', err);
@@ -32,6 +37,20 @@ const Notifications = () => {
         }
     };
 
+    const loadMoreNotifications = async () => {
+        if (!nextUrl || loadingMore) return;
+        setLoadingMore(true);
+        try {
+            const response = await getNotificationsPage(nextUrl);
+            setNotifications(prev => [...prev, ...response.data]);
+            setNextUrl(response.next);
+        } catch (err) {
+            console.error('Error fetching more notifications:', err);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const fetchFollowRequests = async () => {
         setRequestsLoading(true);
         try {
@@ -106,7 +125,9 @@ const Notifications = () => {
 
     const markAllAsRead = async () => {
         try {
-            await markAllNotificationsRead();
+            // Only up to the newest one loaded: anything that arrived since stays unread
+            if (!readCursor) return;
+            await markNotificationsReadUpTo(readCursor);
             setNotifications(prev => prev.map(n => ({ ...n, lida: true })));
         } catch (err) {
             console.error('Error marking all as read:', err);
@@ -254,6 +275,13 @@ const Notifications = () => {
                                         <span className="font-semibold">
                                             {notification.usuario_origem?.nome_completo || t('notifications.someone')}
                                         </span>{' '}
+                                        {notification.total_atores > 1 && (
+                                            <span className="text-gray-600 dark:text-gray-300">
+                                                {notification.total_atores === 2
+                                                    ? t('notifications.andOneOther')
+                                                    : t('notifications.andOthers', { count: notification.total_atores - 1 })}{' '}
+                                            </span>
+                                        )}
                                         <span className="text-gray-600 dark:text-gray-300">{getMessage(notification)}</span>
                                     </p>
                                     <p className="text-sm text-gray-500 dark:text-gray-500 mt-1">{formatDate(notification.data_criacao)}</p>
@@ -266,6 +294,15 @@ const Notifications = () => {
                             </Link>
                         ))
                     )}
+                    {nextUrl && (
+                        <button
+                            onClick={loadMoreNotifications}
+                            disabled={loadingMore}
+                            className="w-full py-3 text-primary hover:underline disabled:opacity-50"
+                        >
+                            {loadingMore ? t('notifications.loadingMore') : t('notifications.loadMore')}
+                        </button>
+                    )}
                 </div>
             )}
         </div>
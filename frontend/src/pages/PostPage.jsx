@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
 import { FaArrowLeft, FaHeart, FaRegHeart, FaComment, FaShare, FaEllipsisH, FaEdit, FaTrash, FaFlag, FaBookmark, FaRegBookmark, FaUserFriends, FaChevronDown, FaRobot } from 'react-icons/fa';
-import { getDream, deleteDream, likeDream, saveDream, getComments, createComment, getProfile } from '../services/api';
+import { getDream, deleteDream, likeDream, saveDream, getComments, getCommentsPage, createComment, getProfile } from '../services/api';
 import { useTranslation } from 'react-i18next';
 import ReplyComposer from '../components/ReplyComposer';
 import CommentItem from '../components/CommentItem';
@@ -36,6 +36,7 @@ const PostPage = () => {
     // Comments
     const [comments, setComments] = useState([]);
     const [commentsLoading, setCommentsLoading] = useState(true);
+    const [commentsNext, setCommentsNext] = useState(null);
 
     // CENTRALIZED INLINE REPLY STATE - Only ONE reply input can be open at a time
     const [activeReplyId, setActiveReplyId] = useState(null);
@@ -100,6 +101,7 @@ const PostPage = () => {
             }));
 
             setComments(enrichedComments);
+            setCommentsNext(response.next);
         } catch (err) {
             console.error('Error fetching comments:', err);
         } finally {
@@ -107,6 +109,16 @@ const PostPage = () => {
         }
     };
 
+    const loadMoreComments = async () => {
+        try {
+            const response = await getCommentsPage(commentsNext);
+            setComments(prev => [...prev, ...response.data]);
+            setCommentsNext(response.next);
+        } catch (err) {
+            console.error('Error fetching comments:', err);
+        }
+    };
+
     // Re-fetch comments when sort changes
     useEffect(() => {
         if (id) {
@@ -549,6 +561,15 @@ const PostPage = () => {
                                 />
                             ))}
 
+                            {commentsNext && (
+                                <button
+                                    onClick={loadMoreComments}
+                                    className="w-full py-3 text-sm text-primary hover:underline"
+                                >
+                                    {t('post.loadMoreComments')}
+                                </button>
+                            )}
+
                             {/* SPAM SECTION */}
                             {spamComments.length > 0 && (
                                 <div className="border-t border-gray-200 dark:border-white/5">
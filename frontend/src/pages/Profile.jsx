@@ -3,6 +3,7 @@ import { Link } from 'react-router-dom';
 import { FaCalendarAlt, FaEdit, FaEllipsisH, FaBirthdayCake, FaMoon, FaLock, FaImage, FaUsers, FaCrown, FaShieldAlt } from 'react-icons/fa';
 import { getProfile, getMyDreams, getDreams, getMyCommunityPosts, getMyMediaPosts, getUserCommunities, getMyAdminCommunities } from '../services/api';
 import DreamCard from '../components/DreamCard';
+import LoadMoreButton from '../components/LoadMoreButton';
 import FollowersModal from '../components/FollowersModal';
 import { useTranslation } from 'react-i18next';
 
@@ -12,12 +13,16 @@ const Profile = () => {
     const [user, setUser] = useState(null);
     const [loading, setLoading] = useState(true);
     const [dreams, setDreams] = useState([]);
+    const [dreamsNext, setDreamsNext] = useState(null);
     const [dreamsLoading, setDreamsLoading] = useState(true);
     const [savedDreams, setSavedDreams] = useState([]);
+    const [savedNext, setSavedNext] = useState(null);
     const [savedLoading, setSavedLoading] = useState(false);
     const [communityPosts, setCommunityPosts] = useState([]);
+    const [communityNext, setCommunityNext] = useState(null);
     const [communityLoading, setCommunityLoading] = useState(false);
     const [mediaPosts, setMediaPosts] = useState([]);
+    const [mediaNext, setMediaNext] = useState(null);
     const [mediaLoading, setMediaLoading] = useState(false);
     const [communitySubTab, setCommunitySubTab] = useState('posts');
     const [memberCommunities, setMemberCommunities] = useState([]);
@@ -34,6 +39,7 @@ const Profile = () => {
                 try {
                     const res = await getDreams('saved');
                     setSavedDreams(res.data);
+                    setSavedNext(res.next);
                 } catch (error) {
                     console.error('Error fetching saved dreams:', error);
                 } finally {
@@ -51,6 +57,7 @@ const Profile = () => {
                 try {
                     const res = await getMyCommunityPosts();
                     setCommunityPosts(res.data);
+                    setCommunityNext(res.next);
                 } catch (error) {
                     console.error('Error fetching community posts:', error);
                 } finally {
@@ -96,6 +103,7 @@ const Profile = () => {
                 try {
                     const res = await getMyMediaPosts();
                     setMediaPosts(res.data);
+                    setMediaNext(res.next);
                 } catch (error) {
                     console.error('Error fetching media posts:', error);
                 } finally {
@@ -115,6 +123,7 @@ const Profile = () => {
                 ]);
                 setUser(profileRes.data);
                 setDreams(dreamsRes.data);
+                setDreamsNext(dreamsRes.next);
             } catch (error) {
                 console.error('Error fetching profile:', error);
             } finally {
@@ -206,7 +215,7 @@ const Profile = () => {
 
                         <div className="flex gap-8 mb-6 justify-center md:justify-start">
                             <div className="text-center md:text-left">
-                                <div className="text-xl font-bold">{dreams.length}</div>
+                                <div className="text-xl font-bold">{dreams.length}{dreamsNext ? '+' : ''}</div>
                                 <div className="text-sm opacity-90">{t('profile.statDreams')}</div>
                             </div>
                             <button
@@ -298,6 +307,7 @@ const Profile = () => {
                                         onDelete={handleDeleteDream}
                                     />
                                 ))}
+                                <LoadMoreButton nextUrl={dreamsNext} setNextUrl={setDreamsNext} setItems={setDreams} />
                             </div>
                         ) : (
                             <div className="text-center py-12">
@@ -354,6 +364,7 @@ const Profile = () => {
                                             onDelete={handleDeleteDream}
                                         />
                                     ))}
+                                    <LoadMoreButton nextUrl={communityNext} setNextUrl={setCommunityNext} setItems={setCommunityPosts} />
                                 </div>
                             ) : (
                                 <div className="text-center py-12">
@@ -478,6 +489,7 @@ const Profile = () => {
                                         onDelete={handleDeleteDream}
                                     />
                                 ))}
+                                <LoadMoreButton nextUrl={mediaNext} setNextUrl={setMediaNext} setItems={setMediaPosts} />
                             </div>
                         ) : (
                             <div className="text-center py-12">
@@ -509,6 +521,7 @@ const Profile = () => {
                                         currentUserId={user?.id_usuario}
                                     />
                                 ))}
+                                <LoadMoreButton nextUrl={savedNext} setNextUrl={setSavedNext} setItems={setSavedDreams} />
                             </div>
                         ) : (
                             <div className="text-center py-12">
@@ -1,11 +1,13 @@
 import React, { useState, useEffect } from 'react';
 import DreamCard from '../components/DreamCard';
+import LoadMoreButton from '../components/LoadMoreButton';
 import { getDreams } from '../services/api';
 import { useTranslation } from 'react-i18next';
 
 const Saved = () => {
     const { t } = useTranslation();
     const [savedDreams, setSavedDreams] = useState([]);
+    const [nextUrl, setNextUrl] = useState(null);
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
@@ -13,6 +15,7 @@ const Saved = () => {
             try {
                 const response = await getDreams('saved');
                 setSavedDreams(response.data);
+                setNextUrl(response.next);
             } catch (error) {
                 console.error('Error fetching saved dreams:', error);
             } finally {
@@ -37,13 +40,16 @@ const Saved = () => {
             <h1 className="text-2xl font-bold text-white mb-2">{t('saved.title')}</h1>
 
             {savedDreams.length > 0 ? (
-                savedDreams.map((dream) => (
-                    <DreamCard
-                        key={dream.id_publicacao}
-                        dream={{ ...dream, is_saved: true }}
-                        currentUserId={currentUserId}
-                    />
-                ))
+                <>
+                    {savedDreams.map((dream) => (
+                        <DreamCard
+                            key={dream.id_publicacao}
+                            dream={{ ...dream, is_saved: true }}
+                            currentUserId={currentUserId}
+                        />
+                    ))}
+                    <LoadMoreButton nextUrl={nextUrl} setNextUrl={setNextUrl} setItems={setSavedDreams} />
+                </>
             ) : (
                 <div className="bg-white/5 backdrop-blur-sm border border-white/10 rounded-xl p-8 text-center">
                     <p className="text-gray-400 text-lg mb-2">{t('saved.empty.title')}</p>
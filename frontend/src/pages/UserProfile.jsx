@@ -4,6 +4,7 @@ import { FaCalendarAlt, FaBirthdayCake, FaArrowLeft, FaLock, FaImage, FaUsers, F
 import { getUser, getProfile, followUser, unfollowUser, unblockUser, getUserPosts, getUserCommunityPosts, getUserMediaPosts, getUserMemberCommunities, getUserAdminCommunities } from '../services/api';
 import { useTranslation } from 'react-i18next';
 import DreamCard from '../components/DreamCard';
+import LoadMoreButton from '../components/LoadMoreButton';
 import FollowersModal from '../components/FollowersModal';
 
 const UserProfile = () => {
@@ -16,10 +17,13 @@ const UserProfile = () => {
     const [followLoading, setFollowLoading] = useState(false);
     const [activeTab, setActiveTab] = useState('dreams');
     const [userDreams, setUserDreams] = useState([]);
+    const [dreamsNext, setDreamsNext] = useState(null);
     const [dreamsLoading, setDreamsLoading] = useState(true);
     const [communityPosts, setCommunityPosts] = useState([]);
+    const [communityNext, setCommunityNext] = useState(null);
     const [communityLoading, setCommunityLoading] = useState(false);
     const [mediaPosts, setMediaPosts] = useState([]);
+    const [mediaNext, setMediaNext] = useState(null);
     const [mediaLoading, setMediaLoading] = useState(false);
     const [communitySubTab, setCommunitySubTab] = useState('posts');
     const [memberCommunities, setMemberCommunities] = useState([]);
@@ -56,6 +60,7 @@ const UserProfile = () => {
                 if (canSee) {
                     const dreamsRes = await getUserPosts(id);
                     setUserDreams(dreamsRes.data);
+                    setDreamsNext(dreamsRes.next);
                 }
             } catch (error) {
                 console.error('Error fetching user:', error);
@@ -80,6 +85,7 @@ const UserProfile = () => {
                     try {
                         const res = await getUserCommunityPosts(id);
                         setCommunityPosts(res.data);
+                        setCommunityNext(res.next);
                     } catch (error) {
                         console.error('Error fetching community posts:', error);
                     } finally {
@@ -131,6 +137,7 @@ const UserProfile = () => {
                 try {
                     const res = await getUserMediaPosts(id);
                     setMediaPosts(res.data);
+                    setMediaNext(res.next);
                 } catch (error) {
                     console.error('Error fetching media posts:', error);
                 } finally {
@@ -218,6 +225,7 @@ const UserProfile = () => {
             // Fetch posts now that we unblocked
             const dreamsRes = await getUserPosts(id);
             setUserDreams(dreamsRes.data);
+            setDreamsNext(dreamsRes.next);
         } catch (error) {
             console.error('Error unblocking user:', error);
         }
@@ -310,7 +318,7 @@ const UserProfile = () => {
 
                         <div className="flex gap-8 mb-6 justify-center md:justify-start">
                             <div className="text-center md:text-left">
-                                <div className="text-xl font-bold">{userDreams.length}</div>
+                                <div className="text-xl font-bold">{userDreams.length}{dreamsNext ? '+' : ''}</div>
                                 <div className="text-sm opacity-90">{t('userProfile.statDreams')}</div>
                             </div>
                             <button
@@ -433,6 +441,7 @@ const UserProfile = () => {
                                         currentUserId={currentUser?.id_usuario}
                                     />
                                 ))}
+                                <LoadMoreButton nextUrl={dreamsNext} setNextUrl={setDreamsNext} setItems={setUserDreams} />
                             </div>
                         ) : (
                             <div className="text-center py-8">
@@ -478,6 +487,7 @@ const UserProfile = () => {
                                                     currentUserId={currentUser?.id_usuario}
                                                 />
                                             ))}
+                                            <LoadMoreButton nextUrl={communityNext} setNextUrl={setCommunityNext} setItems={setCommunityPosts} />
                                         </div>
                                     ) : (
                                         <div className="text-center py-8">
@@ -598,6 +608,7 @@ const UserProfile = () => {
                                         currentUserId={currentUser?.id_usuario}
                                     />
                                 ))}
+                                <LoadMoreButton nextUrl={mediaNext} setNextUrl={setMediaNext} setItems={setMediaPosts} />
                             </div>
                         ) : (
                             <div className="text-center py-12">
@@ -80,25 +80,73 @@ export const uploadAvatar = (file) => {
 };
 
 // Dreams (Publicacao) endpoints
+
+// Feed tabs are cursor-paginated ({ next, previous, results }). Keep `data` as
+// the list of posts so pages can keep rendering it, and expose the cursors.
+const unwrapPage = (response) => {
+    if (Array.isArray(response.data)) {
+        return response;
+    }
+    return {
+        ...response,
+        data: response.data.results,
+        next: response.data.next,
+        previous: response.data.previous,
+    };
+};
+
+// Notification pages also carry the cursor for markNotificationsReadUpTo
+const unwrapNotificationPage = (response) => ({
+    ...unwrapPage(response),
+    readCursor: response.data.read_cursor,
+});
+
 export const getDreams = (tab = 'following', communityId = null) => {
     let url = `/api/dreams/?tab=${tab}`;
     if (communityId) {
         url += `&community_id=${communityId}`;
     }
-    return api.get(url);
+    return api.get(url).then(unwrapPage);
 };
 
-export const getMyDreams = () => api.get('/api/dreams/?tab=mine');
+export const getDreamsPage = (nextUrl) => api.get(nextUrl).then(unwrapPage);
+
+export const getMyDreams = () => api.get('/api/dreams/?tab=mine').then(unwrapPage);
+
+export const getMyCommunityPosts = () => api.get('/api/dreams/?tab=my_community_posts').then(unwrapPage);
+
+export const getUserPosts = (userId) => api.get(`/api/dreams/?tab=user_posts&user_id=${userId}`).then(unwrapPage);
+
+export const getUserCommunityPosts = (userId) => api.get(`/api/dreams/?tab=user_community_posts&user_id=${userId}`).then(unwrapPage);
 
-export const getMyCommunityPosts = () => api.get('/api/dreams/?tab=my_community_posts');
+export const getUserMediaPosts = (userId) => api.get(`/api/dreams/?tab=user_media&user_id=${userId}`).then(unwrapPage);
 
-export const getUserPosts = (userId) => api.get(`/api/dreams/?tab=user_posts&user_id=${userId}`);
+export const getMyMediaPosts = () => api.get('/api/dreams/?tab=user_media').then(unwrapPage);
 
-export const getUserCommunityPosts = (userId) => api.get(`/api/dreams/?tab=user_community_posts&user_id=${userId}`);
+// Impressions: ids are queued and sent in one batch every few seconds
+const IMPRESSION_FLUSH_MS = 5000;
+const pendingImpressions = { posts: new Set(), comments: new Set() };
+let impressionTimer = null;
 
-export const getUserMediaPosts = (userId) => api.get(`/api/dreams/?tab=user_media&user_id=${userId}`);
+const flushImpressions = () => {
+    impressionTimer = null;
+    const payload = {
+        posts: [...pendingImpressions.posts],
+        comments: [...pendingImpressions.comments],
+    };
+    pendingImpressions.posts.clear();
+    pendingImpressions.comments.clear();
+    if (payload.posts.length || payload.comments.length) {
+        api.post('/api/impressions/', payload).catch(() => {});
+    }
+};
 
-export const getMyMediaPosts = () => api.get('/api/dreams/?tab=user_media');
+export const queueImpressions = (kind, ids) => {
+    ids.forEach((id) => pendingImpressions[kind].add(id));
+    if (!impressionTimer) {
+        impressionTimer = setTimeout(flushImpressions, IMPRESSION_FLUSH_MS);
+    }
+};
 
 export const createDream = (data) => api.post('/api/dreams/', data);
 
@@ -127,10 +175,14 @@ export const unmuteUser = (userId) => api.delete(`/api/users/${userId}/mute/`);
 export const getSuggestedUsers = () => api.get('/api/users/suggested/');
 
 // Comments endpoints
+// Root comments are cursor-paginated; each carries its first replies and
+// `respostas_next`, the URL of the remaining ones (see getCommentsPage).
 export const getComments = (dreamId, ordering = 'recent') =>
     api.get(`/api/dreams/${dreamId}/comments/`, {
         params: { ordering },
-    });
+    }).then(unwrapPage);
+
+export const getCommentsPage = (nextUrl) => api.get(nextUrl).then(unwrapPage);
 
 export const createComment = (dreamId, formData) => {
     if (formData instanceof FormData) {
@@ -150,12 +202,25 @@ export const likeComment = (dreamId, commentId) => api.post(`/api/dreams/${dream
 
 
 // Notifications endpoints
-export const getNotifications = () => api.get('/api/notifications/');
+export const getNotifications = () => api.get('/api/notifications/').then(unwrapNotificationPage);
+
+export const getNotificationsPage = (nextUrl) => api.get(nextUrl).then(unwrapNotificationPage);
 
 export const markNotificationRead = (id) => api.patch(`/api/notifications/${id}/read/`);
 
 export const markAllNotificationsRead = () => api.patch('/api/notifications/read_all/');
 
+// Marks the notification at `cursor` (a page's readCursor) and everything older as read
+export const markNotificationsReadUpTo = (cursor) => api.patch('/api/notifications/read_up_to/', { cursor });
+
+export const getBadges = () => api.get('/api/badges/');
+
+// Server-Sent Events push channel; EventSource cannot send headers, so it opens with a
+// single-use ticket rather than the access token, which would end up in access logs
+export const openEventStream = () =>
+    api.post('/api/events/ticket/').then(({ data }) =>
+        new EventSource(`${api.defaults.baseURL}/api/events/?ticket=${encodeURIComponent(data.ticket)}`));
+
 export const search = (query, type = 'all', limit = 20) => api.get(`/api/search/?q=${query}&type=${type}&limit=${limit}`);
 
 // Settings endpoints
@@ -221,6 +286,7 @@ export const deleteDraft = (id) => api.delete(`/api/drafts/${id}/`);
 
 // Explore page endpoints
 export const getTrends = () => api.get('/api/trends/');
+export const getHashtagDreams = (texto) => api.get(`/api/hashtags/${encodeURIComponent(texto)}/dreams/`).then(unwrapPage);
 export const getTopCommunityPosts = () => api.get('/api/communities/top-posts/');
 
 export default api;
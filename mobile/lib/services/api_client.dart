@@ -9,6 +9,9 @@ class ApiClient {
   late final Dio dio;
   final FlutterSecureStorage _storage = const FlutterSecureStorage();
 
+  // Last ETag and body per GET url, replayed when the server answers 304
+  final Map<String, ({String etag, dynamic data})> _etagCache = {};
+
   ApiClient._internal() {
     final baseUrl = dotenv.env['API_BASE_URL'] ?? 'http://10.0.2.2:8000/api/';
 
@@ -29,9 +32,32 @@ class ApiClient {
         if (token != null) {
           options.headers['Authorization'] = 'Bearer $token';
         }
+        final cached = _etagCache[options.uri.toString()];
+        if (options.method == 'GET' && cached != null) {
+          options.headers['If-None-Match'] = cached.etag;
+        }
         return handler.next(options);
       },
+      onResponse: (response, handler) {
+        final etag = response.headers.value('etag');
+        if (response.requestOptions.method == 'GET' && etag != null) {
+          _etagCache[response.requestOptions.uri.toString()] =
+              (etag: etag, data: response.data);
+        }
+        return handler.next(response);
+      },
       onError: (error, handler) async {
+        // 304 Not Modified: serve the body we already have
+        final cached = _etagCache[error.requestOptions.uri.toString()];
+        if (error.response?.statusCode == 304 && cached != null) {
+          return handler.resolve(Response(
+            requestOptions: error.requestOptions,
+            data: cached.data,
+            statusCode: 200,
+            headers: error.response!.headers,
+          ));
+        }
+
         // If 401, try to refresh the token (only once per request)
         if (error.response?.statusCode == 401 &&
             error.requestOptions.extra['retry'] != true) {
@@ -81,6 +107,7 @@ class ApiClient {
   }
 
   Future<void> clearTokens() async {
+    _etagCache.clear();
     await _storage.delete(key: 'access_token');
     await _storage.delete(key: 'refresh_token');
   }
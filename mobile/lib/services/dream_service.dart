@@ -77,6 +77,22 @@ class DreamService {
     }
   }
 
+  /// Reports displayed dreams/comments; the server buffers the view counts.
+  Future<void> recordImpressions({
+    List<String> dreamIds = const [],
+    List<String> commentIds = const [],
+  }) async {
+    if (dreamIds.isEmpty && commentIds.isEmpty) return;
+    try {
+      await _api.dio.post('impressions/', data: {
+        'posts': dreamIds,
+        'comments': commentIds,
+      });
+    } on DioException {
+      // Impressions are best-effort
+    }
+  }
+
   Future<List<Comment>> getComments(String dreamId) async {
     try {
       final response = await _api.dio.get('dreams/$dreamId/comments/');
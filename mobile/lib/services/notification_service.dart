@@ -19,9 +19,7 @@ class NotificationService {
 
   Future<bool> markAsRead(String notificationId) async {
     try {
-      await _api.dio.patch('notifications/$notificationId/', data: {
-        'lida': true,
-      });
+      await _api.dio.patch('notifications/$notificationId/read/');
       return true;
     } on DioException {
       return false;
@@ -56,10 +56,11 @@ class UserService {
     }
   }
 
+  /// Username/name prefix matches, served by the typeahead endpoint.
   Future<List<User>> search(String query) async {
     try {
-      final response = await _api.dio.get('search/', queryParameters: {
-        'q': query,
+      final response = await _api.dio.get('search/typeahead/', queryParameters: {
+        'q': query.startsWith('@') ? query : '@$query',
       });
       final users = response.data['users'] as List? ?? [];
       return users.map((json) => User.fromJson(json)).toList();
@@ -57,6 +57,9 @@ class _DreamDetailState extends State<DreamDetail> {
         _currentUserId = currentUser?.id;
         _isLoading = false;
       });
+      _dreamService.recordImpressions(
+        commentIds: comments.map((comment) => comment.id).toList(),
+      );
     } catch (e) {
       setState(() => _isLoading = false);
     }
@@ -54,9 +54,11 @@ class _ExploreState extends State<Explore> {
       });
       return;
     }
-    _debounce = Timer(const Duration(milliseconds: 500), () async {
+    _debounce = Timer(const Duration(milliseconds: 150), () async {
       setState(() => _isSearching = true);
       final results = await _userService.search(query);
+      // A slower response for an older query must not replace newer results
+      if (!mounted || query != _searchController.text) return;
       setState(() {
         _results = results;
         _isSearching = false;
@@ -44,6 +44,9 @@ class _HomeState extends State<Home> with SingleTickerProviderStateMixin {
         _forYouDreams = dreams;
         _isLoadingForYou = false;
       });
+      _dreamService.recordImpressions(
+        dreamIds: dreams.map((dream) => dream.id).toList(),
+      );
     } catch (e) {
       setState(() {
         _isLoadingForYou = false;
@@ -63,6 +66,9 @@ class _HomeState extends State<Home> with SingleTickerProviderStateMixin {
         _followingDreams = dreams;
         _isLoadingFollowing = false;
       });
+      _dreamService.recordImpressions(
+        dreamIds: dreams.map((dream) => dream.id).toList(),
+      );
     } catch (e) {
       setState(() {
         _isLoadingFollowing = false;
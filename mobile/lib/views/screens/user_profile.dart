@@ -40,6 +40,9 @@ class _UserProfileState extends State<UserProfile> {
         _isFollowing = user?.isFollowing ?? false;
         _isLoading = false;
       });
+      _dreamService.recordImpressions(
+        dreamIds: dreams.map((dream) => dream.id).toList(),
+      );
     } catch (e) {
       setState(() => _isLoading = false);
     }